@@ -0,0 +1,372 @@
+import json
+import os
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from duckduckgo_search import DDGS
+
+from app.core.metrics import span
+from app.core.mock_db import MOCK_SELLERS
+
+# Optional seller dump (one JSON object per line, MOCK_SELLERS shape) for the full database
+JEFF_SELLERS_PATH = os.getenv("JEFF_SELLERS_PATH", "")
+
+
+class SellerRecord:
+    """One seller. __slots__ keeps millions of these at a fraction of a dict's size."""
+
+    __slots__ = ("id", "brand", "niche", "revenue", "email", "pain_point")
+
+    def __init__(self, id, brand, niche, revenue, email, pain_point=None):
+        self.id = id
+        self.brand = brand
+        self.niche = niche
+        self.revenue = int(revenue)
+        self.email = email
+        self.pain_point = pain_point
+
+    @classmethod
+    def from_dict(cls, row: dict) -> "SellerRecord":
+        return cls(row["id"], row["brand"], row["niche"], row["revenue"], row["email"], row.get("pain_point"))
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def normalize_niche(niche: str) -> str:
+    return " ".join(niche.lower().split())
+
+
+class SellerStore:
+    """
+    Inverted index niche -> sellers sorted by revenue.
+    Each niche keeps a compact int64 array of revenues (ascending) aligned with
+    its records, so "revenue >= min_revenue" is one bisect instead of a scan.
+    """
+
+    def __init__(self, records=()):
+        grouped = {}
+        for record in records:
+            grouped.setdefault(normalize_niche(record.niche), []).append(record)
+
+        self._revenues = {}
+        self._records = {}
+        for niche, group in grouped.items():
+            group.sort(key=lambda r: r.revenue)
+            self._revenues[niche] = array("q", (r.revenue for r in group))
+            self._records[niche] = group
+        self._size = sum(len(group) for group in grouped.values())
+
+    @classmethod
+    def from_dicts(cls, rows) -> "SellerStore":
+        return cls(SellerRecord.from_dict(row) for row in rows)
+
+    @classmethod
+    def from_jsonl(cls, path: str) -> "SellerStore":
+        with open(path, encoding="utf-8") as f:
+            return cls.from_dicts(json.loads(line) for line in f if line.strip())
+
+    def __len__(self):
+        return self._size
+
+    def niches(self):
+        return list(self._records)
+
+    def add(self, record: SellerRecord):
+        niche = normalize_niche(record.niche)
+        revenues = self._revenues.setdefault(niche, array("q"))
+        records = self._records.setdefault(niche, [])
+        # bisect_right keeps insertion order stable among equal revenues
+        position = bisect_right(revenues, record.revenue)
+        revenues.insert(position, record.revenue)
+        records.insert(position, record)
+        self._size += 1
+
+    def _range(self, niche: str, min_revenue: int = 0, max_revenue: int = None):
+        niche = normalize_niche(niche)
+        revenues = self._revenues.get(niche)
+        if not revenues:
+            return niche, 0, 0
+        lo = bisect_left(revenues, min_revenue)
+        hi = bisect_right(revenues, max_revenue) if max_revenue is not None else len(revenues)
+        return niche, lo, hi
+
+    def count(self, niche: str, min_revenue: int = 0, max_revenue: int = None) -> int:
+        _, lo, hi = self._range(niche, min_revenue, max_revenue)
+        return max(0, hi - lo)
+
+    def query(self, niche: str, min_revenue: int = 0, max_revenue: int = None, limit: int = 10):
+        """Qualifying sellers of a niche, highest revenue first."""
+        niche, lo, hi = self._range(niche, min_revenue, max_revenue)
+        if hi <= lo:
+            return []
+        records = self._records[niche]
+        return [records[i] for i in range(hi - 1, max(lo, hi - limit) - 1, -1)]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_seller_store() -> SellerStore:
+    """Process-wide store, built once from JEFF_SELLERS_PATH (or MOCK_SELLERS)."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if JEFF_SELLERS_PATH:
+                    _store = SellerStore.from_jsonl(JEFF_SELLERS_PATH)
+                else:
+                    _store = SellerStore.from_dicts(MOCK_SELLERS)
+    return _store
+
+
+def _seller_prospect(seller: SellerRecord) -> dict:
+    domain = seller.email.split("@")[-1]
+    snippet = f"{seller.niche} seller with ${seller.revenue:,} in revenue."
+    if seller.pain_point:
+        snippet += f" Known pain point: {seller.pain_point}."
+    return {
+        "name": seller.brand,
+        "url": f"https://{domain}",
+        "snippet": snippet,
+        "email": seller.email,
+        "revenue": seller.revenue,
+        "source": "seller_db",
+    }
+
+
+def find_seller_prospects(niche: str, min_revenue: int = 0, limit: int = 1) -> list:
+    """Qualifying sellers from our own database (highest revenue first), as prospects."""
+    return [_seller_prospect(s) for s in get_seller_store().query(niche, min_revenue=min_revenue or 0, limit=limit)]
+
+
+def find_seller_prospect(niche: str, min_revenue: int = 0):
+    """
+    Best qualifying seller from our own database, in find_real_prospect's shape
+    (name/url/snippet) plus email and revenue. None when no seller qualifies.
+    """
+    matches = find_seller_prospects(niche, min_revenue, limit=1)
+    return matches[0] if matches else None
+
+
+# =============================================================================
+# WEB SEARCH (DuckDuckGo) - cached, rate limited, shared by the task and the graph
+# =============================================================================
+
+JEFF_SEARCH_CONCURRENCY = int(os.getenv("JEFF_SEARCH_CONCURRENCY", "4"))
+JEFF_SEARCH_MIN_INTERVAL = float(os.getenv("JEFF_SEARCH_MIN_INTERVAL", "1.0"))  # seconds between query starts
+JEFF_SEARCH_CACHE_TTL = int(os.getenv("JEFF_SEARCH_CACHE_TTL", "3600"))
+JEFF_SEARCH_CACHE_SIZE = int(os.getenv("JEFF_SEARCH_CACHE_SIZE", "1024"))
+
+# Listicles and comparisons, not brands
+GENERIC_TITLE_WORDS = ['best', 'top 10', 'review', 'vs']
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+class SearchCache:
+    """
+    Thread-safe TTL + LRU cache of raw search hits, keyed on the normalized query.
+    Concurrent lookups of a query being searched wait for that search (begin/end)
+    instead of running their own. Hits and misses are counted by the caller, once
+    per lookup, when it knows which one it was.
+    """
+
+    def __init__(self, ttl: int = JEFF_SEARCH_CACHE_TTL, max_entries: int = JEFF_SEARCH_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._in_flight = {}  # key -> Event set when its search finishes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self._entries.pop(key, None)
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def begin(self, key):
+        """Claim the search for `key`: None if it's ours, else the Event to wait on."""
+        with self._lock:
+            if key in self._in_flight:
+                return self._in_flight[key]
+            self._in_flight[key] = threading.Event()
+            return None
+
+    def end(self, key):
+        with self._lock:
+            self._in_flight.pop(key).set()
+
+    def count(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses,
+                    "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0}
+
+
+class SearchThrottle:
+    """Spaces query starts at least min_interval apart across all threads of the process."""
+
+    def __init__(self, min_interval: float = JEFF_SEARCH_MIN_INTERVAL):
+        self.min_interval = min_interval
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+search_cache = SearchCache()
+search_throttle = SearchThrottle()
+
+
+def web_search(query: str, max_results: int = 5) -> list:
+    """DuckDuckGo text search through the shared cache and throttle."""
+    query = normalize_query(query)
+    while True:
+        cached = search_cache.get(query)
+        # A cached search that asked for at least as many results also answers this one
+        if cached is not None and cached[0] >= max_results:
+            search_cache.count(hit=True)
+            return cached[1][:max_results]
+        in_flight = search_cache.begin(query)
+        if in_flight is None:
+            break
+        # Same query already being searched (e.g. a batch with repeated niches): reuse it
+        in_flight.wait()
+
+    search_cache.count(hit=False)
+    try:
+        search_throttle.wait()
+        with span("web_search"), DDGS() as ddgs:
+            hits = list(ddgs.text(query, max_results=max_results))
+        search_cache.set(query, (max_results, hits))
+    finally:
+        search_cache.end(query)
+    return hits
+
+
+def _domain(url: str) -> str:
+    netloc = urlparse(url).netloc.lower()
+    return netloc[4:] if netloc.startswith("www.") else netloc
+
+
+def prospect_from_hit(hit: dict) -> dict:
+    return {
+        "name": hit.get('title', '').split(' - ')[0].split(' | ')[0][:50],  # Clean up title
+        "url": hit['href'],
+        "snippet": hit.get('body', '')[:200],
+        "source": "web",
+    }
+
+
+def find_web_prospects(niche: str, limit: int = 1) -> list:
+    """
+    Ranked prospects for a niche from the web, one per domain.
+    Real brand pages rank above listicles/reviews; otherwise search order is kept.
+    """
+    hits = web_search(f"best {niche} brand company", max_results=max(5, limit * 3))
+    ranked = sorted(
+        enumerate(hits),
+        key=lambda item: (any(skip in item[1].get('title', '').lower() for skip in GENERIC_TITLE_WORDS), item[0])
+    )
+    prospects, domains = [], set()
+    for _, hit in ranked:
+        domain = _domain(hit.get('href', ''))
+        if not domain or domain in domains:
+            continue
+        domains.add(domain)
+        prospects.append(prospect_from_hit(hit))
+        if len(prospects) >= limit:
+            break
+    return prospects
+
+
+def find_real_prospect(niche: str) -> dict:
+    """
+    Searches DuckDuckGo for a real company selling this product.
+    Returns: Name, URL, and a snippet of text about them.
+    """
+    print(f"--- JEFF: Searching DuckDuckGo for '{niche}' brands... ---")
+    try:
+        prospects = find_web_prospects(niche, limit=1)
+    except Exception as e:
+        print(f"Search error: {e}")
+        prospects = []
+    if prospects:
+        return prospects[0]
+    return {"name": "Generic Brand", "url": "N/A", "snippet": "No data found"}
+
+
+def prospect_batch(niches, min_revenue: int = 0, per_niche: int = 3) -> dict:
+    """
+    N ranked prospects for each niche: qualifying sellers from the store first,
+    then web results. Searches run concurrently (JEFF_SEARCH_CONCURRENCY) under
+    the shared throttle; a domain is only ever pitched once across the batch.
+    """
+    # "Tools" and " tools" are the same niche - keep the first spelling
+    unique = {}
+    for niche in niches:
+        if niche.strip():
+            unique.setdefault(normalize_niche(niche), niche.strip())
+    niches = list(unique.values())
+
+    def candidates(niche):
+        found = find_seller_prospects(niche, min_revenue, limit=per_niche)
+        if len(found) < per_niche:
+            try:
+                # Over-fetch: some domains may already be taken by another niche
+                found += find_web_prospects(niche, limit=per_niche * 2)
+            except Exception as e:
+                print(f"Search error for '{niche}': {e}")
+        return found
+
+    if not niches:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(JEFF_SEARCH_CONCURRENCY, len(niches))) as pool:
+        found = list(pool.map(candidates, niches))
+
+    results, taken = {}, set()
+    for niche, prospects in zip(niches, found):
+        results[niche] = []
+        for prospect in prospects:
+            domain = _domain(prospect["url"])
+            if domain in taken:
+                continue
+            taken.add(domain)
+            results[niche].append({"rank": len(results[niche]) + 1, **prospect})
+            if len(results[niche]) >= per_niche:
+                break
+    return results
@@ -1,14 +1,13 @@
 from typing import TypedDict
 from langgraph.graph import StateGraph, END
-from langgraph.checkpoint.memory import MemorySaver
 from dotenv import load_dotenv
-from openai import OpenAI
-from duckduckgo_search import DDGS
-import os
+from app.core.llm import llm
+from app.core.checkpoint import get_checkpointer
+from app.core.metrics import timed_node
+from app.agents.jeff import find_seller_prospect, find_real_prospect
 
-# Load API Key
+# Load API Key (used by the shared LLM gateway)
 load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 
 # 1. Define Jeff's State (Memory)
@@ -24,48 +23,24 @@ class JeffState(TypedDict):
 
 
 # 2. Node 1: Search for Prospects
+@timed_node("jeff")
 def search_node(state: JeffState):
-    """Search DuckDuckGo for real companies in the niche."""
+    """Find a prospect: our seller database first, then DuckDuckGo."""
     print(f"--- JEFF: Searching for '{state['niche']}' brands... ---")
-    
-    try:
-        with DDGS() as ddgs:
-            query = f"best {state['niche']} brand company"
-            results = list(ddgs.text(query, max_results=5))
-        
-        if results:
-            # Find first result with a real company name
-            for hit in results:
-                title = hit.get('title', '')
-                # Skip generic articles
-                if any(skip in title.lower() for skip in ['best', 'top 10', 'review', 'vs']):
-                    continue
-                return {
-                    "prospect_name": title.split(' - ')[0].split(' | ')[0][:50],
-                    "prospect_url": hit['href'],
-                    "prospect_snippet": hit['body'][:200],
-                    "status": "PROSPECT_FOUND"
-                }
-            # Use first result if no better match
-            top_hit = results[0]
-            return {
-                "prospect_name": top_hit['title'].split(' - ')[0][:50],
-                "prospect_url": top_hit['href'],
-                "prospect_snippet": top_hit['body'][:200],
-                "status": "PROSPECT_FOUND"
-            }
-    except Exception as e:
-        print(f"Search error: {e}")
-    
+
+    # Qualifying sellers from our own database win over a web search
+    # (same cached, rate-limited DuckDuckGo search as jeff_task)
+    prospect = find_seller_prospect(state["niche"], state.get("min_revenue") or 0) or find_real_prospect(state["niche"])
     return {
-        "prospect_name": "Generic Brand",
-        "prospect_url": "N/A",
-        "prospect_snippet": "No data found",
+        "prospect_name": prospect["name"],
+        "prospect_url": prospect["url"],
+        "prospect_snippet": prospect["snippet"],
         "status": "PROSPECT_FOUND"
     }
 
 
 # 3. Node 2: Draft Cold Email with LLM
+@timed_node("jeff")
 def draft_node(state: JeffState):
     """Generate a cold email using OpenAI."""
     print(f"--- JEFF: Drafting email to {state['prospect_name']}... ---")
@@ -80,11 +55,7 @@ def draft_node(state: JeffState):
     """
     
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}]
-        )
-        email_content = response.choices[0].message.content
+        email_content = llm.complete(prompt, model="gpt-4o-mini", agent="jeff")
     except Exception as e:
         email_content = f"Error generating email: {str(e)}"
     
@@ -95,6 +66,7 @@ def draft_node(state: JeffState):
 
 
 # 4. Node 3: Send Email (simulated)
+@timed_node("jeff")
 def send_node(state: JeffState):
     """Mark email as sent (simulated action)."""
     print(f"--- JEFF: Sending email to {state['prospect_name']}... ---")
@@ -123,8 +95,10 @@ workflow.add_edge("send_node", END)
 
 # --- THE MAGIC: Checkpointer & Interrupt ---
 # Stop BEFORE send_node so human can review the email
-checkpointer = MemorySaver()
-jeff_graph = workflow.compile(
-    checkpointer=checkpointer,
-    interrupt_before=["send_node"]
-)
+# Durable + pruned (CHECKPOINT_BACKEND), shared with the other HITL graph
+# Compiled on first use (app.agents.registry.get_graph("jeff")), not at import
+def build_jeff_graph():
+    return workflow.compile(
+        checkpointer=get_checkpointer(),
+        interrupt_before=["send_node"]
+    )
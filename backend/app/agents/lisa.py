@@ -0,0 +1,507 @@
+import asyncio
+import codecs
+import hashlib
+import os
+import re
+import time
+from collections import Counter
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urldefrag, urlparse
+from urllib.robotparser import RobotFileParser
+from xml.etree import ElementTree
+
+import httpx
+import requests
+
+from app.core.metrics import span
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+# Crawl politeness defaults (per host)
+CRAWL_MAX_PAGES = 50
+CRAWL_PER_HOST_CONCURRENCY = 4
+CRAWL_MIN_DELAY = 0.25  # seconds between request starts to the same host
+CRAWL_TIMEOUT = 10
+
+# Stop downloading after this many bytes - a runaway page must not exhaust a worker
+LISA_MAX_BYTES = int(os.getenv("LISA_MAX_BYTES", str(2 * 1024 * 1024)))
+CHUNK_SIZE = 64 * 1024
+# Text kept for the LLM prompt (the rest is only counted, never stored)
+PREVIEW_CHARS = 1500
+
+
+# =============================================================================
+# PAGE ANALYSIS (shared by lisa_task and the site crawler)
+# =============================================================================
+
+class PageAnalyzer(HTMLParser):
+    """
+    Single-pass SEO extractor. Feed it the document in chunks as they download;
+    it never builds a tree or keeps the full text, only:
+    title, first H1, meta description, word count, keyword occurrences,
+    a text preview for the LLM prompt and (optionally) outgoing links.
+    Text rules match BeautifulSoup's get_text(" ", strip=True): strings are
+    stripped and joined with single spaces; script/style/template are ignored.
+    """
+
+    SKIP_TAGS = {"script", "style", "template"}
+
+    def __init__(self, target_keyword: str = "", base_url: str = None, preview_chars: int = PREVIEW_CHARS):
+        super().__init__(convert_charrefs=True)
+        self.keyword = target_keyword.lower()
+        self.base_url = base_url
+        self.preview_chars = preview_chars
+
+        self.title = None
+        self.h1 = None
+        self.meta_description = None
+        self.word_count = 0
+        self.keyword_count = 0
+        self.links = []
+        self.preview = []
+        self._preview_len = 0
+
+        self._buffer = []      # pieces of the current text node (handle_data may split one)
+        self._skip_depth = 0
+        self._in_title = False
+        self._title_parts = None
+        self._in_h1 = False
+        self._h1_parts = None
+        self._tail = ""        # last len(keyword)-1 chars, so matches across strings still count
+        self._started = False
+
+    # --- Text handling ---
+    def _flush(self):
+        if not self._buffer:
+            return
+        raw = "".join(self._buffer)
+        self._buffer = []
+
+        if self._in_title and self._title_parts is not None:
+            self._title_parts.append(raw)
+        text = raw.strip()
+        if not text:
+            return
+        if self._in_h1 and self._h1_parts is not None:
+            self._h1_parts.append(text)
+
+        self.word_count += len(text.split())
+        joined = (" " if self._started else "") + text
+        self._started = True
+
+        if self.keyword:
+            window = self._tail + joined.lower()
+            self.keyword_count += window.count(self.keyword)
+            keep = len(self.keyword) - 1
+            self._tail = window[-keep:] if keep else ""
+
+        if self._preview_len < self.preview_chars:
+            piece = joined[:self.preview_chars - self._preview_len]
+            self.preview.append(piece)
+            self._preview_len += len(piece)
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self._buffer.append(data)
+
+    # --- Tags ---
+    def handle_starttag(self, tag, attrs):
+        self._flush()
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag == "title" and self.title is None and self._title_parts is None:
+            self._in_title, self._title_parts = True, []
+        elif tag == "h1" and self.h1 is None and self._h1_parts is None:
+            self._in_h1, self._h1_parts = True, []
+        elif tag == "meta" and self.meta_description is None:
+            attrs = dict(attrs)
+            if (attrs.get("name") or "").lower() == "description":
+                self.meta_description = attrs.get("content")
+        elif tag == "a" and self.base_url:
+            href = dict(attrs).get("href")
+            if href:
+                self.links.append(urljoin(self.base_url, href))
+
+    def handle_startendtag(self, tag, attrs):
+        # <meta ... />, <a ... /> - never opens a skip/title/h1 scope
+        self._flush()
+        if tag not in self.SKIP_TAGS and tag not in ("title", "h1"):
+            self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        self._flush()
+        if tag in self.SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag == "title" and self._in_title:
+            self._in_title = False
+            # Like soup.title.string: exactly one text node, else None
+            self.title = self._title_parts[0] if len(self._title_parts) == 1 else None
+        elif tag == "h1" and self._in_h1:
+            self._in_h1 = False
+            self.h1 = "".join(self._h1_parts)
+
+    def close(self):
+        super().close()
+        self._flush()
+        if self._in_title and self._title_parts:
+            self.title = self._title_parts[0] if len(self._title_parts) == 1 else None
+        if self._in_h1:
+            self.h1 = "".join(self._h1_parts)
+
+    def result(self) -> dict:
+        return {
+            "title": self.title,
+            "h1": self.h1,
+            "meta_description": self.meta_description,
+            "preview": "".join(self.preview),
+            "word_count": self.word_count,
+            "keyword_count": self.keyword_count,
+            "links": self.links,
+        }
+
+
+def analyze_chunks(chunks, target_keyword: str = "", base_url: str = None, encoding: str = "utf-8") -> dict:
+    """Run the analyzer over an iterable of byte chunks (decoding incrementally)."""
+    with span("parse"):
+        decoder = codecs.getincrementaldecoder(encoding or "utf-8")(errors="replace")
+        analyzer = PageAnalyzer(target_keyword, base_url)
+        for chunk in chunks:
+            analyzer.feed(decoder.decode(chunk))
+        analyzer.feed(decoder.decode(b"", final=True))
+        analyzer.close()
+        return analyzer.result()
+
+
+def parse_page(html: bytes, target_keyword: str = "", base_url: str = None) -> dict:
+    return analyze_chunks([html], target_keyword, base_url)
+
+
+def _charset(content_type: str) -> str:
+    match = re.search(r"charset=([\w-]+)", content_type or "", re.I)
+    if match:
+        try:
+            return codecs.lookup(match.group(1)).name
+        except LookupError:
+            pass
+    return "utf-8"
+
+
+def fetch_page(url: str, etag: str = None, last_modified: str = None,
+               max_bytes: int = LISA_MAX_BYTES, timeout: float = CRAWL_TIMEOUT) -> dict:
+    """
+    Conditional, capped download. Sends If-None-Match / If-Modified-Since when the
+    validators of a previous audit are given, and hashes the body while streaming it.
+    A 304 (or an unchanged content_hash) means the stored audit is still valid.
+    """
+    headers = {"User-Agent": USER_AGENT}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+
+    with span("fetch"), requests.get(url, headers=headers, timeout=timeout, stream=True) as response:
+        fetched = {
+            "status_code": response.status_code,
+            # Servers may omit validators on a 304; keep the ones we sent
+            "etag": response.headers.get("etag") or etag,
+            "last_modified": response.headers.get("last-modified") or last_modified,
+            "encoding": _charset(response.headers.get("content-type")),
+            "chunks": [],
+            "content_hash": None,
+            "bytes": 0,
+            "truncated": False,
+        }
+        if response.status_code != 200:
+            return fetched
+
+        digest = hashlib.sha256()
+        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+            if fetched["bytes"] + len(chunk) > max_bytes:
+                chunk = chunk[:max_bytes - fetched["bytes"]]
+                fetched["truncated"] = True
+            digest.update(chunk)
+            fetched["chunks"].append(chunk)
+            fetched["bytes"] += len(chunk)
+            if fetched["truncated"]:
+                break
+        fetched["content_hash"] = digest.hexdigest()
+        return fetched
+
+
+def diff_audits(previous: dict, current: dict) -> dict:
+    """What changed between two stored audits: score delta, metric changes, new/resolved issues."""
+    previous_issues, current_issues = set(previous.get("issues", [])), set(current.get("issues", []))
+    metrics = {}
+    for name, value in current.get("metrics", {}).items():
+        old = previous.get("metrics", {}).get(name)
+        if old != value:
+            metrics[name] = {"before": old, "after": value}
+    return {
+        "score": {"before": previous.get("score"), "after": current.get("score"),
+                  "delta": current.get("score", 0) - previous.get("score", 0)},
+        "metrics": metrics,
+        "new_issues": [issue for issue in current.get("issues", []) if issue not in previous_issues],
+        "resolved_issues": [issue for issue in previous.get("issues", []) if issue not in current_issues],
+    }
+
+
+def score_page(page: dict, target_keyword: str) -> dict:
+    """Lisa's hard-logic SEO rules. Returns score (0-100), issues and keyword density."""
+    word_count = page["word_count"]
+    keyword_count = page["keyword_count"]
+    density = (keyword_count / word_count * 100) if word_count > 0 else 0
+    title_tag, h1_tag = page["title"], page["h1"]
+
+    issues = []
+    score = 100
+
+    # Edge Case: Thin Content
+    if word_count < 300:
+        issues.append("CRITICAL: Thin content (< 300 words). Google will ignore this.")
+        score -= 30
+
+    # Edge Case: Missing H1
+    if not h1_tag:
+        issues.append("ERROR: Missing H1 Tag.")
+        score -= 20
+
+    # Edge Case: Keyword Stuffing
+    if density > 3.5:
+        issues.append(f"WARNING: Keyword Stuffing detected ({density:.2f}% density). Aim for 1-2%.")
+        score -= 15
+    elif density == 0:
+        issues.append(f"MISSING: Target keyword '{target_keyword}' not found in text.")
+        score -= 20
+
+    # Edge Case: Title optimization
+    if not title_tag:
+        issues.append("ERROR: Missing Page Title.")
+        score -= 20
+    elif len(title_tag) > 60:
+        issues.append("WARNING: Title is too long (truncated in search results).")
+        score -= 5
+
+    return {
+        "score": max(0, score),
+        "issues": issues,
+        "density": density,
+        "keyword_count": keyword_count,
+    }
+
+
+# =============================================================================
+# SITE CRAWLER (async, pooled, polite)
+# =============================================================================
+
+class HostThrottle:
+    """Per-host concurrency cap + minimum spacing between request starts."""
+
+    def __init__(self, concurrency: int, min_delay: float):
+        self.concurrency = concurrency
+        self.min_delay = min_delay
+        self._semaphores = {}
+        self._locks = {}
+        self._next_start = {}
+
+    def _for(self, host):
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(self.concurrency)
+            self._locks[host] = asyncio.Lock()
+            self._next_start[host] = 0.0
+        return self._semaphores[host], self._locks[host]
+
+    async def __call__(self, host, coro_fn):
+        semaphore, lock = self._for(host)
+        async with semaphore:
+            async with lock:
+                wait = self._next_start[host] - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                self._next_start[host] = time.monotonic() + self.min_delay
+            return await coro_fn()
+
+
+def _normalize(url: str) -> str:
+    return urldefrag(url)[0]
+
+
+def _same_site(url: str, root_host: str) -> bool:
+    parsed = urlparse(url)
+    return parsed.scheme in ("http", "https") and parsed.netloc == root_host
+
+
+async def _load_robots(client, root: str):
+    robots = RobotFileParser()
+    try:
+        response = await client.get(urljoin(root, "/robots.txt"))
+        robots.parse(response.text.splitlines() if response.status_code == 200 else [])
+    except httpx.HTTPError:
+        robots.parse([])
+    return robots
+
+
+async def _sitemap_urls(client, sitemap_url: str, limit: int):
+    """<loc> entries of a sitemap (one level of sitemap indexes is followed)."""
+    try:
+        response = await client.get(sitemap_url)
+        if response.status_code != 200:
+            return []
+        root = ElementTree.fromstring(response.content)
+    except (httpx.HTTPError, ElementTree.ParseError):
+        return []
+
+    locs = [el.text.strip() for el in root.iter() if el.tag.endswith("loc") and el.text]
+    if root.tag.endswith("sitemapindex"):
+        urls = []
+        for child in locs:
+            urls.extend(await _sitemap_urls(client, child, limit - len(urls)))
+            if len(urls) >= limit:
+                break
+        return urls[:limit]
+    return locs[:limit]
+
+
+async def crawl_site(seed_url: str, target_keyword: str, max_pages: int = CRAWL_MAX_PAGES,
+                     per_host_concurrency: int = CRAWL_PER_HOST_CONCURRENCY,
+                     min_delay: float = CRAWL_MIN_DELAY, timeout: float = CRAWL_TIMEOUT,
+                     max_bytes: int = LISA_MAX_BYTES) -> dict:
+    """
+    Audit a whole storefront. `seed_url` is either a page (links are followed on the
+    same host, breadth first) or a sitemap (*.xml). Returns per-page scores plus a
+    site-level summary.
+    """
+    started = time.perf_counter()
+    root_host = urlparse(seed_url).netloc
+    root = f"{urlparse(seed_url).scheme}://{root_host}"
+    throttle = HostThrottle(per_host_concurrency, min_delay)
+    limits = httpx.Limits(max_connections=per_host_concurrency * 2, max_keepalive_connections=per_host_concurrency)
+
+    async with httpx.AsyncClient(headers={"User-Agent": USER_AGENT}, timeout=timeout,
+                                 limits=limits, follow_redirects=True) as client:
+        robots = await _load_robots(client, root)
+
+        if seed_url.endswith(".xml"):
+            frontier = await _sitemap_urls(client, seed_url, max_pages)
+            follow_links = False
+        else:
+            frontier = [seed_url]
+            follow_links = True
+
+        seen = set()
+        queue = asyncio.Queue()
+        for url in frontier:
+            url = _normalize(url)
+            if url not in seen:
+                seen.add(url)
+                queue.put_nowait(url)
+
+        pages = []
+
+        async def fetch(url):
+            # Stream straight into the analyzer: no full body in memory, capped at max_bytes
+            # (so this "fetch" span includes the parsing of the page)
+            with span("fetch"):
+                return await fetch_and_analyze(url)
+
+        async def fetch_and_analyze(url):
+            async with client.stream("GET", url) as response:
+                if response.status_code != 200:
+                    return response.status_code, None
+                if "html" not in response.headers.get("content-type", "text/html"):
+                    return response.status_code, None
+                decoder = codecs.getincrementaldecoder(_charset(response.headers.get("content-type")))(errors="replace")
+                analyzer = PageAnalyzer(target_keyword, str(response.url))
+                received = 0
+                async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                    chunk = chunk[:max_bytes - received]
+                    received += len(chunk)
+                    analyzer.feed(decoder.decode(chunk))
+                    if received >= max_bytes:
+                        break
+                analyzer.feed(decoder.decode(b"", final=True))
+                analyzer.close()
+                page = analyzer.result()
+                page["truncated"] = received >= max_bytes
+                return response.status_code, page
+
+        async def audit(url):
+            if not robots.can_fetch(USER_AGENT, url):
+                pages.append({"url": url, "status": "SKIPPED", "error": "Disallowed by robots.txt"})
+                return
+            try:
+                status_code, page = await throttle(urlparse(url).netloc, lambda: fetch(url))
+            except httpx.HTTPError as e:
+                pages.append({"url": url, "status": "FAILED", "error": f"Could not connect: {e}"})
+                return
+            if status_code != 200:
+                pages.append({"url": url, "status": "FAILED", "error": f"Site returned status {status_code}"})
+                return
+            if page is None:
+                return
+
+            result = score_page(page, target_keyword)
+            pages.append({
+                "url": url,
+                "status": "AUDITED",
+                "title": page["title"],
+                "score": result["score"],
+                "word_count": page["word_count"],
+                "density": f"{result['density']:.2f}%",
+                "h1_found": bool(page["h1"]),
+                "truncated": page["truncated"],
+                "issues": result["issues"],
+            })
+
+            if follow_links:
+                for link in page["links"]:
+                    link = _normalize(link)
+                    if len(seen) >= max_pages:
+                        break
+                    if link not in seen and _same_site(link, root_host):
+                        seen.add(link)
+                        queue.put_nowait(link)
+
+        async def worker():
+            while True:
+                url = await queue.get()
+                try:
+                    await audit(url)
+                except Exception as e:
+                    # A malformed link or a page the parser chokes on fails that page only:
+                    # a dead worker would leave queue.join() waiting forever
+                    pages.append({"url": url, "status": "FAILED", "error": f"{type(e).__name__}: {e}"})
+                finally:
+                    queue.task_done()
+
+        workers = [asyncio.create_task(worker()) for _ in range(per_host_concurrency)]
+        await queue.join()
+        for w in workers:
+            w.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    return build_site_report(seed_url, target_keyword, pages, time.perf_counter() - started)
+
+
+def build_site_report(seed_url: str, target_keyword: str, pages: list, elapsed: float) -> dict:
+    audited = [p for p in pages if p["status"] == "AUDITED"]
+    # Group issues by kind: drop the per-page numbers in parentheses
+    issue_counts = Counter(re.sub(r"\s*\(.*?\)", "", issue) for p in audited for issue in p["issues"])
+    titles = Counter(p["title"] for p in audited if p["title"])
+
+    return {
+        "seed_url": seed_url,
+        "keyword": target_keyword,
+        "summary": {
+            "pages_audited": len(audited),
+            "pages_failed": sum(1 for p in pages if p["status"] == "FAILED"),
+            "pages_skipped": sum(1 for p in pages if p["status"] == "SKIPPED"),
+            "average_score": round(sum(p["score"] for p in audited) / len(audited), 1) if audited else 0,
+            "pages_missing_h1": sum(1 for p in audited if not p["h1_found"]),
+            "duplicate_titles": {title: n for title, n in titles.items() if n > 1},
+            "top_issues": issue_counts.most_common(5),
+            "crawl_seconds": round(elapsed, 2),
+            "pages_per_second": round(len(pages) / elapsed, 2) if elapsed else 0,
+        },
+        "worst_pages": sorted(audited, key=lambda p: p["score"])[:5],
+        "pages": sorted(pages, key=lambda p: p["url"]),
+    }
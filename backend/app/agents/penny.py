@@ -0,0 +1,91 @@
+import numpy as np
+
+# Beat competitor by 5 cents, but respect the floor (min_price)
+UNDERCUT_BY = 0.05
+
+ACTION_NONE = 0
+ACTION_DECREASE = 1
+ACTION_HOLD = 2
+
+
+class RepricingEngine:
+    """
+    Columnar version of Penny's repricing rule.
+    Prices live in float64 NumPy arrays so the whole catalog is decided in a
+    handful of vectorized operations instead of a Python loop per SKU.
+    """
+
+    def __init__(self, skus, price, competitor_price, min_price):
+        self.skus = np.asarray(skus, dtype=object)
+        self.price = np.asarray(price, dtype=np.float64)
+        self.competitor_price = np.asarray(competitor_price, dtype=np.float64)
+        self.min_price = np.asarray(min_price, dtype=np.float64)
+        self._decided = None
+
+    @classmethod
+    def from_inventory(cls, inventory: dict) -> "RepricingEngine":
+        """Build from the MOCK_INVENTORY shape: {sku: {"price", "competitor_price", "min_price", ...}}"""
+        n = len(inventory)
+        skus = np.empty(n, dtype=object)
+        price = np.empty(n, dtype=np.float64)
+        competitor = np.empty(n, dtype=np.float64)
+        floor = np.empty(n, dtype=np.float64)
+        for i, (sku, data) in enumerate(inventory.items()):
+            skus[i] = sku
+            price[i] = data["price"]
+            competitor[i] = data["competitor_price"]
+            floor[i] = data["min_price"]
+        return cls(skus, price, competitor, floor)
+
+    def __len__(self):
+        return len(self.price)
+
+    def decide(self):
+        """
+        Returns (actions, new_prices, event_index):
+        - actions: int8 per SKU (ACTION_NONE / ACTION_DECREASE / ACTION_HOLD)
+        - new_prices: rounded target price (only meaningful where DECREASE)
+        - event_index: positions of SKUs that produce an event, in catalog order
+        """
+        if self._decided is None:
+            undercut = self.competitor_price < self.price
+            target = self.competitor_price - UNDERCUT_BY
+            decrease = undercut & (target >= self.min_price)
+
+            actions = np.zeros(len(self.price), dtype=np.int8)
+            actions[decrease] = ACTION_DECREASE
+            actions[undercut & ~decrease] = ACTION_HOLD
+            self._decided = (actions, np.round(target, 2), np.flatnonzero(undercut))
+        return self._decided
+
+    def event_count(self) -> int:
+        return len(self.decide()[2])
+
+    def events(self, offset: int = 0, limit: int = None):
+        """Yield optimization events (same shape as the old per-SKU loop) for one page."""
+        actions, new_prices, event_index = self.decide()
+        end = len(event_index) if limit is None else offset + limit
+        for i in event_index[offset:end]:
+            if actions[i] == ACTION_DECREASE:
+                yield {
+                    "sku": self.skus[i],
+                    "action": "DECREASE_PRICE",
+                    "old_price": float(self.price[i]),
+                    "new_price": float(new_prices[i]),
+                    "reason": "Competitor dropped price."
+                }
+            else:
+                yield {
+                    "sku": self.skus[i],
+                    "action": "HOLD",
+                    "reason": "Competitor below Min Price (Profit Protection)."
+                }
+
+    def summary(self) -> dict:
+        actions, _, event_index = self.decide()
+        return {
+            "skus_checked": len(self),
+            "events": len(event_index),
+            "decrease_price": int(np.count_nonzero(actions == ACTION_DECREASE)),
+            "hold": int(np.count_nonzero(actions == ACTION_HOLD)),
+        }
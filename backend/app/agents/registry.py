@@ -0,0 +1,93 @@
+import asyncio
+import os
+import threading
+from importlib import import_module
+
+from app.core.celery_app import celery_app
+
+# =============================================================================
+# LAZY AGENT REGISTRY
+# =============================================================================
+# The API only needs task *names* to queue work, so it no longer imports
+# app.worker (and with it every agent's dependencies) or langgraph at startup:
+# - dispatch(): queue a task by name. Routing and priority still come from
+#   task_routes. In eager mode (CELERY_EAGER, no worker) the task module is
+#   imported on the first dispatch and the task runs inline (adispatch(): in a
+#   thread, for async endpoints).
+# - get_graph(): import + compile a HITL graph on first use, once per process
+#   (rebuilt after a fork, like the checkpointer it is compiled against).
+# - get_repricing_engine(): Penny's vectorized catalog (numpy), built on first use.
+#
+# AGENT_PRELOAD=jeff,sue,penny builds those up front instead, for deployments
+# that prefer a slower boot over a slow first request.
+
+TASKS_MODULE = "app.worker"
+GRAPHS = {
+    "jeff": ("app.agents.jeff_graph", "build_jeff_graph"),
+    "sue": ("app.agents.sue_graph", "build_sue_graph"),
+}
+AGENT_PRELOAD = [a.strip() for a in os.getenv("AGENT_PRELOAD", "").split(",") if a.strip()]
+
+_graphs = {}
+_graphs_pid = None
+_graphs_lock = threading.Lock()
+
+_repricing_engine = None
+_repricing_engine_lock = threading.Lock()
+
+
+def dispatch(task_name: str, args=(), task_id: str = None):
+    """Queue `task_name` (e.g. "app.worker.jeff_task") without importing its module. Returns the AsyncResult."""
+    if celery_app.conf.task_always_eager:
+        import_module(TASKS_MODULE)
+        return celery_app.tasks[task_name].apply_async(args, task_id=task_id)
+    return celery_app.send_task(task_name, args, task_id=task_id)
+
+
+async def adispatch(task_name: str, args=(), task_id: str = None):
+    """
+    dispatch() for async endpoints. Eager tasks run in the threadpool: inline on the
+    event loop they would stall every other request of the process while they run.
+    """
+    if celery_app.conf.task_always_eager:
+        return await asyncio.to_thread(dispatch, task_name, args, task_id)
+    return dispatch(task_name, args, task_id)
+
+
+def get_graph(agent: str):
+    """The compiled HITL graph for `agent` ("jeff" or "sue"), built on first use in this process."""
+    global _graphs_pid
+    graph = _graphs.get(agent) if _graphs_pid == os.getpid() else None
+    if graph is None:
+        with _graphs_lock:
+            if _graphs_pid != os.getpid():
+                _graphs.clear()
+                _graphs_pid = os.getpid()
+            graph = _graphs.get(agent)
+            if graph is None:
+                module, builder = GRAPHS[agent]
+                graph = _graphs[agent] = getattr(import_module(module), builder)()
+    return graph
+
+
+def get_repricing_engine():
+    """Penny's engine over the (static) mock catalog, decided once per process."""
+    global _repricing_engine
+    if _repricing_engine is None:
+        with _repricing_engine_lock:
+            if _repricing_engine is None:
+                from app.agents.penny import RepricingEngine
+                from app.core.mock_db import MOCK_INVENTORY
+                _repricing_engine = RepricingEngine.from_inventory(MOCK_INVENTORY)
+    return _repricing_engine
+
+
+def preload(agents=None):
+    """Build the given agents' graphs / engines now instead of on first use (default: AGENT_PRELOAD)."""
+    for agent in AGENT_PRELOAD if agents is None else agents:
+        if agent in GRAPHS:
+            get_graph(agent)
+        elif agent == "penny":
+            get_repricing_engine()
+        else:
+            raise ValueError(f"Unknown agent '{agent}' in AGENT_PRELOAD (expected jeff, sue or penny)")
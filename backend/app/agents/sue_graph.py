@@ -1,14 +1,13 @@
 from typing import TypedDict
 from langgraph.graph import StateGraph, END
-from langgraph.checkpoint.memory import MemorySaver
 from dotenv import load_dotenv
-from openai import OpenAI
-import psycopg2
-import os
+from app.core.llm import llm
+from app.core.checkpoint import get_checkpointer
+from app.core.metrics import timed_node
+from app.core.vector_index import retrieve_policies
 
-# Load API Key
+# Load API Key (used by the shared LLM gateway)
 load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 
 # 1. Define Sue's State (Memory)
@@ -25,30 +24,11 @@ class SueState(TypedDict):
 def get_relevant_policy(query_text: str) -> str:
     """Search the vector database for relevant policy."""
     try:
-        # Embed the user's query
-        response = client.embeddings.create(
-            input=query_text,
-            model="text-embedding-3-small"
-        )
-        query_embedding = response.data[0].embedding
-
-        # Search DB for nearest neighbor
-        conn = psycopg2.connect(
-            host="db", database="agency_os", user="admin", password="admin"
-        )
-        cur = conn.cursor()
-        
-        cur.execute("""
-            SELECT text FROM policies 
-            ORDER BY embedding <=> %s::vector 
-            LIMIT 1;
-        """, (query_embedding,))
-        
-        result = cur.fetchone()
-        conn.close()
+        # Embed the query (shared cache with sue_task) and search the ANN index
+        matches = retrieve_policies(query_text, k=1)
         
-        if result:
-            return result[0]
+        if matches:
+            return matches[0]["text"]
         return "No specific policy found. Use general customer service guidelines."
         
     except Exception as e:
@@ -57,6 +37,7 @@ def get_relevant_policy(query_text: str) -> str:
 
 
 # 2. Node 1: Draft Reply (RAG + LLM)
+@timed_node("sue")
 def draft_node(state: SueState):
     """Retrieve policy and generate a draft reply."""
     print(f"--- SUE: Processing ticket... ---")
@@ -83,11 +64,7 @@ def draft_node(state: SueState):
     """
     
     try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}]
-        )
-        draft = response.choices[0].message.content
+        draft = llm.complete(prompt, model="gpt-3.5-turbo", agent="sue")
     except Exception as e:
         draft = f"Error generating reply: {str(e)}"
     
@@ -99,6 +76,7 @@ def draft_node(state: SueState):
 
 
 # 3. Node 2: Publish Reply (simulated)
+@timed_node("sue")
 def publish_node(state: SueState):
     """Post the reply to Amazon (simulated)."""
     print("--- SUE: Publishing to Amazon ---")
@@ -125,8 +103,10 @@ workflow.add_edge("publish_node", END)
 
 # --- THE MAGIC: Checkpointer & Interrupt ---
 # Stop BEFORE publish_node so human can review the reply
-checkpointer = MemorySaver()
-sue_graph = workflow.compile(
-    checkpointer=checkpointer,
-    interrupt_before=["publish_node"]
-)
+# Durable + pruned (CHECKPOINT_BACKEND), shared with the other HITL graph
+# Compiled on first use (app.agents.registry.get_graph("sue")), not at import
+def build_sue_graph():
+    return workflow.compile(
+        checkpointer=get_checkpointer(),
+        interrupt_before=["publish_node"]
+    )
@@ -1,15 +1,158 @@
 import os
+import sys
 from celery import Celery
+from celery.signals import task_postrun, worker_init
+from kombu import Queue
+
+from app.core.llm_cache import parse_agent_ttls
+from app.core.result_serializer import SERIALIZER_NAME
 
 # Use environment variables for Redis URL (Docker uses service names, local uses localhost)
 REDIS_BROKER_URL = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
 REDIS_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", "redis://localhost:6379/0")
 
+# CELERY_EAGER=1: no broker and no worker - .delay() runs the task inline in the
+# caller (i.e. the API process) and results live in process memory. For local
+# runs and the HTTP load tests (benchmarks/load_test.py), not for production.
+CELERY_EAGER = os.getenv("CELERY_EAGER", "").lower() in ("1", "true", "yes")
+
 celery_app = Celery(
     "worker",
-    broker=REDIS_BROKER_URL,
-    backend=REDIS_RESULT_BACKEND,
+    broker="memory://" if CELERY_EAGER else REDIS_BROKER_URL,
+    backend="cache+memory://" if CELERY_EAGER else REDIS_RESULT_BACKEND,
     include=["app.worker"]
 )
 
-celery_app.conf.timezone = 'UTC'
\ No newline at end of file
+celery_app.conf.timezone = 'UTC'
+# Report STARTED (not just PENDING -> SUCCESS) to status/stream endpoints
+celery_app.conf.task_track_started = True
+
+if CELERY_EAGER:
+    celery_app.conf.task_always_eager = True
+    # Keep eager results in the backend, so /tasks/{task_id} and HITL sessions can read them
+    celery_app.conf.task_store_eager_result = True
+
+# =============================================================================
+# QUEUES, ROUTING & PRIORITIES
+# =============================================================================
+# One queue per agent, so a burst of Lisa crawls or Jeff searches cannot starve
+# Ivan/Penny checks. Worker profiles (docker-compose) consume them by workload:
+#   io  (gevent, many green threads): LLM / HTTP bound   -> jeff, sue, penny, lisa
+#   db  (prefork, few processes):     Postgres bound      -> adam, ivan
+# The io tasks still touch Postgres (pgvector, SEO audit history, checkpoints), so
+# the gevent worker makes both drivers cooperative - see _cooperative_postgres.
+# Within a queue, interactive requests jump ahead of batch jobs (0 = first).
+PRIORITY_INTERACTIVE = 0
+PRIORITY_DEFAULT = 3
+PRIORITY_BATCH = 9
+
+AGENT_QUEUES = ["jeff", "sue", "penny", "lisa", "adam", "ivan"]
+IO_QUEUES = ["jeff", "sue", "penny", "lisa"]
+DB_QUEUES = ["adam", "ivan"]
+
+TASK_ROUTES = {
+    "app.worker.jeff_task": ("jeff", PRIORITY_DEFAULT),
+    "app.worker.jeff_batch_task": ("jeff", PRIORITY_BATCH),
+    "app.worker.jeff_workflow_task": ("jeff", PRIORITY_INTERACTIVE),
+    "app.worker.jeff_resume_task": ("jeff", PRIORITY_INTERACTIVE),
+    "app.worker.sue_task": ("sue", PRIORITY_DEFAULT),
+    "app.worker.sue_workflow_task": ("sue", PRIORITY_INTERACTIVE),
+    "app.worker.sue_resume_task": ("sue", PRIORITY_INTERACTIVE),
+    "app.worker.penny_task": ("penny", PRIORITY_INTERACTIVE),
+    "app.worker.lisa_task": ("lisa", PRIORITY_DEFAULT),
+    "app.worker.lisa_site_audit_task": ("lisa", PRIORITY_BATCH),
+    "app.worker.adam_task": ("adam", PRIORITY_INTERACTIVE),
+    "app.worker.adam_portfolio_task": ("adam", PRIORITY_BATCH),
+    "app.worker.ivan_task": ("ivan", PRIORITY_INTERACTIVE),
+    "app.worker.ivan_sweep_task": ("ivan", PRIORITY_BATCH),
+}
+
+celery_app.conf.task_default_queue = "celery"  # anything unrouted (served by the io workers)
+# Explicit routing keys: unkeyed queues would all bind with the default key and receive every task
+celery_app.conf.task_queues = [Queue(name, routing_key=name) for name in ["celery"] + AGENT_QUEUES]
+celery_app.conf.task_routes = {
+    task: {"queue": queue, "priority": priority} for task, (queue, priority) in TASK_ROUTES.items()
+}
+celery_app.conf.task_default_priority = PRIORITY_DEFAULT
+
+celery_app.conf.broker_transport_options = {
+    # Redis emulates priorities with one list per step; sep ":" keeps the keys readable (lisa:9)
+    "priority_steps": [PRIORITY_INTERACTIVE, PRIORITY_DEFAULT, 6, PRIORITY_BATCH],
+    "sep": ":",
+    "queue_order_strategy": "priority",
+    # With acks_late a task is redelivered if not acked within this window - longer than any crawl
+    "visibility_timeout": int(os.getenv("CELERY_VISIBILITY_TIMEOUT", "7200")),
+}
+
+# --- Prefetch / acknowledgement ---
+# Tasks are long (LLM calls, crawls): reserving a batch per worker would park quick
+# tasks behind slow ones. Take one at a time and ack only after it finished, so a
+# killed worker hands its task to another instead of losing it.
+celery_app.conf.worker_prefetch_multiplier = int(os.getenv("CELERY_PREFETCH_MULTIPLIER", "1"))
+celery_app.conf.task_acks_late = True
+celery_app.conf.task_reject_on_worker_lost = True
+
+
+@worker_init.connect
+def _cooperative_postgres(**kwargs):
+    """
+    On the gevent pool a blocking libpq call stalls every green thread in the process.
+    psycopg2 needs a wait callback (psycogreen); psycopg 3 (checkpointer) detects the
+    monkey-patched select module by itself, as long as it is imported after the patch -
+    which `celery worker -P gevent` applies before loading the app.
+    """
+    monkey = sys.modules.get("gevent.monkey")
+    if monkey is None or not monkey.is_module_patched("socket"):
+        return
+    from psycogreen.gevent import patch_psycopg
+    patch_psycopg()
+
+
+def queue_depths() -> dict:
+    """
+    Messages waiting per queue (all priority steps; LLEN on Redis) - the autoscaling signal.
+    Reserved/running tasks are not included: they already left the queue.
+    """
+    depths = {}
+    with celery_app.connection_for_read() as conn:
+        channel = conn.default_channel
+        for queue in celery_app.conf.task_queues:
+            depths[queue.name] = channel.queue_declare(queue=queue.name, passive=True).message_count
+    return depths
+
+
+# =============================================================================
+# RESULT BACKEND STORAGE
+# =============================================================================
+# Results are compact (msgpack, zlib above RESULT_COMPRESS_THRESHOLD) and expire
+# per agent, so the Redis footprint stays bounded under sustained traffic.
+# Quick checks are read once by the dashboard; audits/drafts are kept longer.
+CELERY_RESULT_EXPIRES = int(os.getenv("CELERY_RESULT_EXPIRES", "86400"))
+CELERY_RESULT_TTLS = os.getenv("CELERY_RESULT_TTLS", "penny:3600,ivan:3600,adam:21600,lisa:21600")
+
+celery_app.conf.result_serializer = os.getenv("CELERY_RESULT_SERIALIZER", SERIALIZER_NAME)
+# JSON stays accepted so results written before the switch still decode
+celery_app.conf.result_accept_content = ["json", SERIALIZER_NAME]
+celery_app.conf.result_expires = CELERY_RESULT_EXPIRES
+
+RESULT_TTLS = parse_agent_ttls(CELERY_RESULT_TTLS, CELERY_RESULT_EXPIRES)
+
+
+def result_ttl_for(task_name: str) -> int:
+    queue = TASK_ROUTES.get(task_name, ("celery", None))[0]
+    return RESULT_TTLS.get(queue, CELERY_RESULT_EXPIRES)
+
+
+@task_postrun.connect
+def _expire_result(task_id=None, task=None, **kwargs):
+    # Runs after the result was stored; the backend wrote it with result_expires
+    if task is None or task.ignore_result:
+        return
+    ttl = result_ttl_for(task.name)
+    backend = celery_app.backend
+    if ttl == CELERY_RESULT_EXPIRES or not hasattr(backend, "expire"):
+        return
+    try:
+        backend.expire(backend.get_key_for_task(task_id), ttl)
+    except Exception as e:
+        print(f"Result TTL error: {e}")
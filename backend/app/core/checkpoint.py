@@ -0,0 +1,341 @@
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+
+from app.core.db import DB_CONFIG
+
+# =============================================================================
+# HITL CHECKPOINTER (LangGraph)
+# =============================================================================
+# The Jeff/Sue graphs pause for human review, so their state has to outlive the
+# request - and, with several uvicorn workers, be visible to all of them.
+#   sqlite   (default) one file, shared by every worker on the host
+#   postgres shared by every API host (PostgresSaver on a psycopg 3 pool)
+#   memory   in-process stand-in for tests and local hacking
+# Every backend prunes: only the last CHECKPOINT_KEEP_LAST checkpoints of a
+# thread are kept, and threads idle longer than CHECKPOINT_MAX_AGE are deleted.
+
+CHECKPOINT_BACKEND = os.getenv("CHECKPOINT_BACKEND", "sqlite")
+CHECKPOINT_SQLITE_PATH = os.getenv("CHECKPOINT_SQLITE_PATH", "checkpoints.sqlite")
+CHECKPOINT_POSTGRES_URL = os.getenv(
+    "CHECKPOINT_POSTGRES_URL",
+    "postgresql://{user}:{password}@{host}:5432/{database}".format(**DB_CONFIG)
+)
+CHECKPOINT_POOL_SIZE = int(os.getenv("CHECKPOINT_POOL_SIZE", "10"))
+CHECKPOINT_KEEP_LAST = int(os.getenv("CHECKPOINT_KEEP_LAST", "10"))
+CHECKPOINT_MAX_AGE = int(os.getenv("CHECKPOINT_MAX_AGE", str(7 * 24 * 3600)))  # seconds, 0 = keep forever
+CHECKPOINT_SWEEP_INTERVAL = int(os.getenv("CHECKPOINT_SWEEP_INTERVAL", "300"))
+
+
+class RetentionMixin(ABC):
+    """
+    Prunes after every put():
+    - keeps the newest `keep_last` checkpoints (and their pending writes) of the thread
+    - at most every `sweep_interval` seconds, deletes threads idle for over `max_age`
+    Last activity per thread lives in a small side table (a dict for memory).
+    Checkpoint ids are time-ordered UUIDs, so "newest" is simply the largest id.
+    Savers must implement the three backend hooks; a missing one fails at construction.
+    """
+
+    def _init_retention(self, keep_last: int, max_age: int, sweep_interval: int):
+        self.keep_last = max(1, keep_last)  # the newest checkpoint is the one a paused graph resumes from
+        self.max_age = max_age
+        self.sweep_interval = sweep_interval
+        self._last_sweep = 0.0
+        self._sweep_lock = threading.Lock()
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        next_config = super().put(config, checkpoint, metadata, new_versions)
+        configurable = next_config["configurable"]
+        try:
+            self._touch_and_trim(configurable["thread_id"], configurable.get("checkpoint_ns", ""))
+            self._maybe_sweep()
+        except Exception as e:
+            # Retention is housekeeping - never fail a graph step because of it
+            print(f"Checkpoint retention error: {e}")
+        return next_config
+
+    def _maybe_sweep(self):
+        if not self.max_age:
+            return
+        now = time.time()
+        with self._sweep_lock:
+            if now - self._last_sweep < self.sweep_interval:
+                return
+            self._last_sweep = now
+        for thread_id in self._idle_threads(now - self.max_age):
+            self.delete_thread(thread_id)
+            self._forget_thread(thread_id)
+
+    # Backend specific
+    @abstractmethod
+    def _touch_and_trim(self, thread_id: str, checkpoint_ns: str):
+        """Record activity on the thread and drop all but its newest `keep_last` checkpoints."""
+
+    @abstractmethod
+    def _idle_threads(self, cutoff: float) -> list:
+        """Ids of threads last touched before `cutoff` (epoch seconds)."""
+
+    @abstractmethod
+    def _forget_thread(self, thread_id: str):
+        """Drop the thread's retention bookkeeping (its checkpoints are already deleted)."""
+
+
+def _memory_saver_class():
+    # langgraph is imported on first use only, like the optional backends below
+    from langgraph.checkpoint.memory import MemorySaver
+
+    class PruningMemorySaver(RetentionMixin, MemorySaver):
+        def __init__(self, keep_last=CHECKPOINT_KEEP_LAST, max_age=CHECKPOINT_MAX_AGE,
+                     sweep_interval=CHECKPOINT_SWEEP_INTERVAL, **kwargs):
+            super().__init__(**kwargs)
+            self._init_retention(keep_last, max_age, sweep_interval)
+            self._touched = {}
+
+        def _touch_and_trim(self, thread_id, checkpoint_ns):
+            self._touched[thread_id] = time.time()
+            checkpoints = self.storage[thread_id][checkpoint_ns]
+            for checkpoint_id in sorted(checkpoints, reverse=True)[self.keep_last:]:
+                del checkpoints[checkpoint_id]
+                self.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+
+            # Channel values are stored once per version; drop versions no kept checkpoint points at
+            blobs = getattr(self, "blobs", None)
+            if blobs is not None:
+                referenced = set()
+                for saved in checkpoints.values():
+                    referenced.update(self.serde.loads_typed(saved[0]).get("channel_versions", {}).items())
+                for key in [k for k in blobs if k[0] == thread_id and k[1] == checkpoint_ns]:
+                    if (key[2], key[3]) not in referenced:
+                        del blobs[key]
+
+        def _idle_threads(self, cutoff):
+            return [thread_id for thread_id, touched in list(self._touched.items()) if touched < cutoff]
+
+        def _forget_thread(self, thread_id):
+            self._touched.pop(thread_id, None)
+
+    return PruningMemorySaver
+
+
+def _sqlite_saver_class():
+    from langgraph.checkpoint.sqlite import SqliteSaver
+
+    class PruningSqliteSaver(RetentionMixin, SqliteSaver):
+        def __init__(self, conn, keep_last=CHECKPOINT_KEEP_LAST, max_age=CHECKPOINT_MAX_AGE,
+                     sweep_interval=CHECKPOINT_SWEEP_INTERVAL, **kwargs):
+            super().__init__(conn, **kwargs)
+            self._init_retention(keep_last, max_age, sweep_interval)
+
+        def setup(self):
+            if self.is_setup:
+                return
+            super().setup()
+            # Called from inside cursor() while self.lock is held - don't take it again
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS checkpoint_retention (
+                    thread_id TEXT PRIMARY KEY,
+                    updated_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS checkpoint_retention_updated_idx
+                    ON checkpoint_retention (updated_at);
+            """)
+
+        def _touch_and_trim(self, thread_id, checkpoint_ns):
+            with self.cursor() as cur:
+                cur.execute("""
+                    INSERT INTO checkpoint_retention (thread_id, updated_at) VALUES (?, ?)
+                    ON CONFLICT (thread_id) DO UPDATE SET updated_at = excluded.updated_at;
+                """, (thread_id, time.time()))
+                cur.execute("""
+                    DELETE FROM checkpoints
+                    WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id NOT IN (
+                        SELECT checkpoint_id FROM checkpoints
+                        WHERE thread_id = ? AND checkpoint_ns = ?
+                        ORDER BY checkpoint_id DESC LIMIT ?
+                    );
+                """, (thread_id, checkpoint_ns, thread_id, checkpoint_ns, self.keep_last))
+                cur.execute("""
+                    DELETE FROM writes
+                    WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id NOT IN (
+                        SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?
+                    );
+                """, (thread_id, checkpoint_ns, thread_id, checkpoint_ns))
+
+        def _idle_threads(self, cutoff):
+            with self.cursor(transaction=False) as cur:
+                cur.execute("SELECT thread_id FROM checkpoint_retention WHERE updated_at < ?;", (cutoff,))
+                return [row[0] for row in cur.fetchall()]
+
+        def _forget_thread(self, thread_id):
+            with self.cursor() as cur:
+                cur.execute("DELETE FROM checkpoint_retention WHERE thread_id = ?;", (thread_id,))
+
+    return PruningSqliteSaver
+
+
+def _postgres_saver_class():
+    from langgraph.checkpoint.postgres import PostgresSaver
+
+    class PruningPostgresSaver(RetentionMixin, PostgresSaver):
+        def __init__(self, conn, keep_last=CHECKPOINT_KEEP_LAST, max_age=CHECKPOINT_MAX_AGE,
+                     sweep_interval=CHECKPOINT_SWEEP_INTERVAL, **kwargs):
+            super().__init__(conn, **kwargs)
+            self._init_retention(keep_last, max_age, sweep_interval)
+
+        def setup(self):
+            super().setup()
+            with self._cursor() as cur:
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS checkpoint_retention (
+                        thread_id TEXT PRIMARY KEY,
+                        updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+                    );
+                """)
+                cur.execute("""
+                    CREATE INDEX IF NOT EXISTS checkpoint_retention_updated_idx
+                    ON checkpoint_retention (updated_at);
+                """)
+
+        def _touch_and_trim(self, thread_id, checkpoint_ns):
+            with self._cursor() as cur:
+                cur.execute("""
+                    INSERT INTO checkpoint_retention (thread_id) VALUES (%s)
+                    ON CONFLICT (thread_id) DO UPDATE SET updated_at = NOW();
+                """, (thread_id,))
+                cur.execute("""
+                    DELETE FROM checkpoints
+                    WHERE thread_id = %s AND checkpoint_ns = %s AND checkpoint_id NOT IN (
+                        SELECT checkpoint_id FROM checkpoints
+                        WHERE thread_id = %s AND checkpoint_ns = %s
+                        ORDER BY checkpoint_id DESC LIMIT %s
+                    );
+                """, (thread_id, checkpoint_ns, thread_id, checkpoint_ns, self.keep_last))
+                cur.execute("""
+                    DELETE FROM checkpoint_writes
+                    WHERE thread_id = %s AND checkpoint_ns = %s AND checkpoint_id NOT IN (
+                        SELECT checkpoint_id FROM checkpoints WHERE thread_id = %s AND checkpoint_ns = %s
+                    );
+                """, (thread_id, checkpoint_ns, thread_id, checkpoint_ns))
+                # Blobs are shared between checkpoints by (channel, version): keep referenced ones only
+                cur.execute("""
+                    DELETE FROM checkpoint_blobs b
+                    WHERE b.thread_id = %s AND b.checkpoint_ns = %s AND NOT EXISTS (
+                        SELECT 1 FROM checkpoints c
+                        WHERE c.thread_id = b.thread_id AND c.checkpoint_ns = b.checkpoint_ns
+                        AND c.checkpoint -> 'channel_versions' ->> b.channel = b.version
+                    );
+                """, (thread_id, checkpoint_ns))
+
+        def _idle_threads(self, cutoff):
+            with self._cursor() as cur:
+                cur.execute(
+                    "SELECT thread_id FROM checkpoint_retention WHERE updated_at < to_timestamp(%s);",
+                    (cutoff,)
+                )
+                return [row["thread_id"] for row in cur.fetchall()]
+
+        def _forget_thread(self, thread_id):
+            with self._cursor() as cur:
+                cur.execute("DELETE FROM checkpoint_retention WHERE thread_id = %s;", (thread_id,))
+
+    return PruningPostgresSaver
+
+
+def build_checkpointer(backend: str = None):
+    """Create the configured checkpointer. Every backend imports its packages lazily."""
+    backend = backend or CHECKPOINT_BACKEND
+    if backend == "memory":
+        return _memory_saver_class()()
+
+    if backend == "sqlite":
+        # One connection shared by the threads of this process (SqliteSaver serializes with a lock);
+        # WAL lets the other uvicorn workers read while one writes
+        conn = sqlite3.connect(CHECKPOINT_SQLITE_PATH, check_same_thread=False, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL;")
+        saver = _sqlite_saver_class()(conn)
+        saver.setup()
+        return saver
+
+    if backend == "postgres":
+        from psycopg.rows import dict_row
+        from psycopg_pool import ConnectionPool
+
+        pool = ConnectionPool(
+            CHECKPOINT_POSTGRES_URL,
+            max_size=CHECKPOINT_POOL_SIZE,
+            kwargs={"autocommit": True, "prepare_threshold": 0, "row_factory": dict_row},
+        )
+        saver = _postgres_saver_class()(pool)
+        saver.setup()
+        return saver
+
+    raise ValueError(f"Unknown CHECKPOINT_BACKEND '{backend}' (expected sqlite, postgres or memory)")
+
+
+_checkpointer = None
+_checkpointer_pid = None
+_checkpointer_lock = threading.Lock()
+
+
+def get_checkpointer():
+    """
+    One checkpointer per process, shared by every HITL graph (threads are keyed by thread_id).
+    Rebuilt after a fork: sqlite connections and psycopg pools must not cross processes.
+    """
+    global _checkpointer, _checkpointer_pid
+    if _checkpointer is None or _checkpointer_pid != os.getpid():
+        with _checkpointer_lock:
+            if _checkpointer is None or _checkpointer_pid != os.getpid():
+                _checkpointer = build_checkpointer()
+                _checkpointer_pid = os.getpid()
+    return _checkpointer
+
+
+# --- HITL sessions: one LangGraph thread per review ---
+def new_session_id(agent: str) -> str:
+    return f"{agent}-{uuid.uuid4().hex}"
+
+
+def session_config(session_id: str) -> dict:
+    return {"configurable": {"thread_id": session_id}}
+
+
+def resume_task_id(session_id: str) -> str:
+    """The approval's resume task has a fixed id, so its status can be looked up from the session."""
+    return f"{session_id}-resume"
+
+
+# --- Approval claims: a session is resumed at most once, however many approves arrive ---
+APPROVAL_CLAIM_PREFIX = "hitl-approval:"
+_local_claims = set()  # no Redis result backend (eager runs): claims only hold within this process
+_local_claims_lock = threading.Lock()
+
+
+def _claims_redis():
+    from celery.backends.redis import RedisBackend
+    from app.core.celery_app import celery_app
+    backend = celery_app.backend
+    return backend.client if isinstance(backend, RedisBackend) else None
+
+
+def claim_approval(session_id: str) -> bool:
+    """Atomically mark the session as approved (SET NX). False if another request got there first."""
+    client = _claims_redis()
+    if client is not None:
+        return bool(client.set(APPROVAL_CLAIM_PREFIX + session_id, 1, nx=True, ex=CHECKPOINT_MAX_AGE or None))
+    with _local_claims_lock:
+        if session_id in _local_claims:
+            return False
+        _local_claims.add(session_id)
+        return True
+
+
+def approval_claimed(session_id: str) -> bool:
+    client = _claims_redis()
+    if client is not None:
+        return bool(client.exists(APPROVAL_CLAIM_PREFIX + session_id))
+    return session_id in _local_claims
@@ -1,9 +1,31 @@
 import os
+import threading
+import time
+from contextlib import contextmanager
+
 import psycopg2
+from psycopg2 import pool as pg_pool
 from dotenv import load_dotenv
 
+from app.core.metrics import span
+
 load_dotenv()
 
+# Agents run INSIDE Docker, so the pool talks to the 'db' service by default
+DB_CONFIG = {
+    "host": os.getenv("POSTGRES_HOST", "db"),
+    "database": os.getenv("POSTGRES_DB", "agency_os"),
+    "user": os.getenv("POSTGRES_USER", "admin"),
+    "password": os.getenv("POSTGRES_PASSWORD", "admin"),
+}
+
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+# Connections idle longer than this get a "SELECT 1" before being handed out
+DB_POOL_HEALTHCHECK_INTERVAL = float(os.getenv("DB_POOL_HEALTHCHECK_INTERVAL", "30"))
+
+
 def get_db_connection():
     return psycopg2.connect(
         host="localhost", 
@@ -12,8 +34,342 @@ def get_db_connection():
         password="admin"
     )
 
-def init_db():
-    conn = get_db_connection()
+
+# =============================================================================
+# CONNECTION POOL (one per process)
+# =============================================================================
+# Celery's prefork workers fork() after the parent may already have opened
+# sockets, and a libpq connection must never be shared between processes.
+# The pool remembers the pid that created it and is rebuilt in every child.
+
+class PoolTimeout(Exception):
+    """Raised when no connection frees up within DB_POOL_TIMEOUT seconds."""
+
+
+class ConnectionPool:
+    def __init__(self, minconn=DB_POOL_MIN_SIZE, maxconn=DB_POOL_MAX_SIZE,
+                 timeout=DB_POOL_TIMEOUT, healthcheck_interval=DB_POOL_HEALTHCHECK_INTERVAL,
+                 **conn_kwargs):
+        self.pid = os.getpid()
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.healthcheck_interval = healthcheck_interval
+        self._pool = pg_pool.ThreadedConnectionPool(minconn, maxconn, **(conn_kwargs or DB_CONFIG))
+        # psycopg2 raises instead of waiting when the pool is empty, so callers queue here
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._last_used = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "discarded": 0,
+            "wait_time_total": 0.0,
+        }
+
+    def _is_healthy(self, conn) -> bool:
+        if conn.closed:
+            return False
+        last_used = self._last_used.get(id(conn))
+        if last_used is None or time.monotonic() - last_used < self.healthcheck_interval:
+            return True
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT 1;")
+            cur.close()
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def getconn(self):
+        started = time.monotonic()
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._stats["waits"] += 1
+            if not self._slots.acquire(timeout=self.timeout):
+                with self._lock:
+                    self._stats["timeouts"] += 1
+                raise PoolTimeout(f"No database connection available after {self.timeout}s")
+
+        try:
+            conn = self._pool.getconn()
+            while not self._is_healthy(conn):
+                with self._lock:
+                    self._stats["discarded"] += 1
+                self._last_used.pop(id(conn), None)
+                self._pool.putconn(conn, close=True)
+                conn = self._pool.getconn()
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._stats["checkouts"] += 1
+            self._stats["wait_time_total"] += time.monotonic() - started
+        return conn
+
+    def putconn(self, conn, close=False):
+        if not close and not conn.closed:
+            try:
+                # Never hand a half-finished transaction to the next caller
+                if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                close = True
+        if close or conn.closed:
+            with self._lock:
+                self._stats["discarded"] += 1
+            self._last_used.pop(id(conn), None)
+        else:
+            self._last_used[id(conn)] = time.monotonic()
+        try:
+            self._pool.putconn(conn, close=close or bool(conn.closed))
+        finally:
+            self._slots.release()
+
+    def closeall(self):
+        self._pool.closeall()
+        self._last_used.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats.update({
+            "pid": self.pid,
+            "min_size": self.minconn,
+            "max_size": self.maxconn,
+            "in_use": len(self._pool._used),
+            "idle": len(self._pool._pool),
+        })
+        checkouts = stats["checkouts"] or 1
+        stats["avg_wait_ms"] = round(stats.pop("wait_time_total") / checkouts * 1000, 3)
+        return stats
+
+
+_pool = None
+_pool_lock = threading.Lock()
+# Pools inherited through fork(). Kept referenced so garbage collection never
+# sends a Terminate over a socket that still belongs to the parent process.
+_inherited_pools = []
+
+
+def _forget_pool_after_fork():
+    global _pool, _pool_lock
+    if _pool is not None:
+        _inherited_pools.append(_pool)
+    _pool = None
+    _pool_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_pool_after_fork)
+
+
+def get_pool() -> ConnectionPool:
+    global _pool
+    pool = _pool
+    if pool is None or pool.pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool.pid != os.getpid():
+                _pool = ConnectionPool()
+            pool = _pool
+    return pool
+
+
+@contextmanager
+def pooled_connection():
+    """Borrow a connection from this process's pool and always give it back."""
+    pool = get_pool()
+    conn = pool.getconn()
+    broken = False
+    try:
+        yield conn
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        broken = True
+        raise
+    finally:
+        pool.putconn(conn, close=broken)
+
+
+@contextmanager
+def db_cursor(commit: bool = False):
+    """
+    Usage:
+        with db_cursor() as cur:
+            cur.execute("SELECT ...")
+    """
+    # The "db" span covers the pool checkout, the queries and the commit
+    with span("db"), pooled_connection() as conn:
+        cur = conn.cursor()
+        try:
+            yield cur
+            if commit:
+                conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+
+
+def pool_stats() -> dict:
+    if _pool is None or _pool.pid != os.getpid():
+        return {"pid": os.getpid(), "initialized": False}
+    return {"initialized": True, **_pool.stats()}
+
+
+def ensure_policy_ingest_columns(cur):
+    """
+    Columns used by seed_policies.py for idempotent ingestion:
+    - content_hash: sha256 of the policy text, so unchanged text is never re-embedded
+    - policy_key: stable id of a policy (defaults to its hash) - the upsert target
+    - source: the file a policy was ingested from, so a re-seed can drop what the file no longer has
+    """
+    cur.execute("ALTER TABLE policies ADD COLUMN IF NOT EXISTS content_hash TEXT;")
+    cur.execute("ALTER TABLE policies ADD COLUMN IF NOT EXISTS policy_key TEXT;")
+    cur.execute("ALTER TABLE policies ADD COLUMN IF NOT EXISTS source TEXT;")
+    # Backfill rows seeded before hashing existed, then drop exact duplicates
+    cur.execute("""
+        UPDATE policies
+        SET content_hash = encode(sha256(convert_to(text, 'UTF8')), 'hex')
+        WHERE content_hash IS NULL AND text IS NOT NULL;
+    """)
+    cur.execute("UPDATE policies SET policy_key = content_hash WHERE policy_key IS NULL;")
+    cur.execute("""
+        DELETE FROM policies a USING policies b
+        WHERE a.id > b.id AND a.policy_key = b.policy_key;
+    """)
+    cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS policies_policy_key_idx ON policies (policy_key);")
+    cur.execute("CREATE INDEX IF NOT EXISTS policies_content_hash_idx ON policies (content_hash);")
+    cur.execute("CREATE INDEX IF NOT EXISTS policies_source_idx ON policies (source) WHERE source IS NOT NULL;")
+
+
+def ensure_ad_metrics_rollup(cur):
+    """
+    ad_metrics_daily: one row per (campaign, day), kept in sync by statement-level
+    triggers on ad_metrics. Adam reads this instead of re-aggregating raw rows, so
+    a 7-day window costs 7 rows per campaign no matter how much history piles up.
+    row_count tracks the raw rows behind each day; a day whose rows are all deleted
+    disappears from the rollup instead of lingering with zeros.
+    """
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS ad_metrics_daily (
+            campaign_name TEXT NOT NULL,
+            date DATE NOT NULL,
+            impressions BIGINT NOT NULL DEFAULT 0,
+            clicks BIGINT NOT NULL DEFAULT 0,
+            spend DECIMAL(14, 2) NOT NULL DEFAULT 0.00,
+            sales DECIMAL(14, 2) NOT NULL DEFAULT 0.00,
+            row_count BIGINT NOT NULL DEFAULT 0,
+            PRIMARY KEY (campaign_name, date)
+        );
+    """)
+    # Rollups created before row_count existed: add it and recount below
+    cur.execute("""
+        SELECT NOT EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'ad_metrics_daily' AND column_name = 'row_count'
+        );
+    """)
+    needs_recount = cur.fetchone()[0]
+    if needs_recount:
+        cur.execute("ALTER TABLE ad_metrics_daily ADD COLUMN row_count BIGINT NOT NULL DEFAULT 0;")
+
+    # Transition tables let one trigger call fold a whole bulk INSERT/UPDATE/DELETE in
+    cur.execute("""
+        CREATE OR REPLACE FUNCTION ad_metrics_rollup_apply() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('DELETE', 'UPDATE') THEN
+                INSERT INTO ad_metrics_daily AS d (campaign_name, date, impressions, clicks, spend, sales, row_count)
+                SELECT campaign_name, date, -SUM(COALESCE(impressions, 0)), -SUM(COALESCE(clicks, 0)),
+                       -SUM(COALESCE(spend, 0)), -SUM(COALESCE(sales, 0)), -COUNT(*)
+                FROM old_rows GROUP BY campaign_name, date
+                ON CONFLICT (campaign_name, date) DO UPDATE SET
+                    impressions = d.impressions + EXCLUDED.impressions,
+                    clicks = d.clicks + EXCLUDED.clicks,
+                    spend = d.spend + EXCLUDED.spend,
+                    sales = d.sales + EXCLUDED.sales,
+                    row_count = d.row_count + EXCLUDED.row_count;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO ad_metrics_daily AS d (campaign_name, date, impressions, clicks, spend, sales, row_count)
+                SELECT campaign_name, date, SUM(COALESCE(impressions, 0)), SUM(COALESCE(clicks, 0)),
+                       SUM(COALESCE(spend, 0)), SUM(COALESCE(sales, 0)), COUNT(*)
+                FROM new_rows GROUP BY campaign_name, date
+                ON CONFLICT (campaign_name, date) DO UPDATE SET
+                    impressions = d.impressions + EXCLUDED.impressions,
+                    clicks = d.clicks + EXCLUDED.clicks,
+                    spend = d.spend + EXCLUDED.spend,
+                    sales = d.sales + EXCLUDED.sales,
+                    row_count = d.row_count + EXCLUDED.row_count;
+            END IF;
+            IF TG_OP IN ('DELETE', 'UPDATE') THEN
+                -- Days left without raw rows (an UPDATE may also move rows to another day)
+                DELETE FROM ad_metrics_daily d
+                USING (SELECT DISTINCT campaign_name, date FROM old_rows) o
+                WHERE d.campaign_name = o.campaign_name AND d.date = o.date AND d.row_count <= 0;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    cur.execute("""
+        CREATE OR REPLACE FUNCTION ad_metrics_rollup_truncate() RETURNS trigger AS $$
+        BEGIN
+            TRUNCATE ad_metrics_daily;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+
+    # A trigger with transition tables can only fire on one event, hence three of them
+    for event, referencing in [
+        ("INSERT", "NEW TABLE AS new_rows"),
+        ("UPDATE", "OLD TABLE AS old_rows NEW TABLE AS new_rows"),
+        ("DELETE", "OLD TABLE AS old_rows"),
+    ]:
+        name = f"ad_metrics_rollup_{event.lower()}"
+        cur.execute(f"DROP TRIGGER IF EXISTS {name} ON ad_metrics;")
+        cur.execute(f"""
+            CREATE TRIGGER {name}
+            AFTER {event} ON ad_metrics
+            REFERENCING {referencing}
+            FOR EACH STATEMENT EXECUTE FUNCTION ad_metrics_rollup_apply();
+        """)
+    cur.execute("DROP TRIGGER IF EXISTS ad_metrics_rollup_truncate ON ad_metrics;")
+    cur.execute("""
+        CREATE TRIGGER ad_metrics_rollup_truncate
+        AFTER TRUNCATE ON ad_metrics
+        FOR EACH STATEMENT EXECUTE FUNCTION ad_metrics_rollup_truncate();
+    """)
+
+    # First run on an existing database: build the rollup from history once
+    cur.execute("SELECT EXISTS (SELECT 1 FROM ad_metrics_daily);")
+    if not cur.fetchone()[0] or needs_recount:
+        rebuild_ad_metrics_rollup(cur)
+
+
+def rebuild_ad_metrics_rollup(cur, since=None):
+    """Recompute the rollup from raw ad_metrics (everything, or only dates >= since)."""
+    if since is None:
+        cur.execute("DELETE FROM ad_metrics_daily;")
+    else:
+        cur.execute("DELETE FROM ad_metrics_daily WHERE date >= %s;", (since,))
+    cur.execute("""
+        INSERT INTO ad_metrics_daily (campaign_name, date, impressions, clicks, spend, sales, row_count)
+        SELECT campaign_name, date, SUM(COALESCE(impressions, 0)), SUM(COALESCE(clicks, 0)),
+               SUM(COALESCE(spend, 0)), SUM(COALESCE(sales, 0)), COUNT(*)
+        FROM ad_metrics
+        WHERE %s::date IS NULL OR date >= %s::date
+        GROUP BY campaign_name, date;
+    """, (since, since))
+
+
+def init_db(conn=None):
+    # Any connection works (the benchmarks pass one to a throwaway database); closed when done
+    conn = conn or get_db_connection()
     cur = conn.cursor()
     
     # 1. Enable Vector (for Sue) - ALREADY DONE
@@ -25,6 +381,11 @@ def init_db():
             embedding vector(1536)
         );
     """)
+    ensure_policy_ingest_columns(cur)
+
+    # ANN index so "ORDER BY embedding <=> ..." stops being a sequential scan
+    from app.core.vector_index import ensure_policy_index
+    ensure_policy_index(cur)
 
     # 2. CREATE ANALYTICS TABLE (For Adam) <--- NEW
     cur.execute("""
@@ -38,6 +399,12 @@ def init_db():
             sales DECIMAL(10, 2) DEFAULT 0.00
         );
     """)
+    # Covering index: per-campaign lookups and the portfolio GROUP BY both become index-only scans
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS ad_metrics_campaign_date_idx
+        ON ad_metrics (campaign_name, date) INCLUDE (spend, sales, clicks);
+    """)
+    ensure_ad_metrics_rollup(cur)
 
     # 3. CREATE INVENTORY TABLE (For Ivan) <--- NEW
     cur.execute("""
@@ -51,7 +418,28 @@ def init_db():
             unit_cost DECIMAL(10, 2) NOT NULL
         );
     """)
-    
+    # Reorder sweep: only low-stock rows are indexed, already grouped by supplier
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS inventory_low_stock_idx
+        ON inventory (supplier_email, sku)
+        WHERE current_stock < reorder_point;
+    """)
+
+    # 4. SEO AUDIT HISTORY (For Lisa) - validators + hash make re-audits incremental
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS seo_audits (
+            url TEXT NOT NULL,
+            keyword TEXT NOT NULL,
+            etag TEXT,
+            last_modified TEXT,
+            content_hash TEXT NOT NULL,
+            audit JSONB NOT NULL,
+            audited_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            checked_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            PRIMARY KEY (url, keyword)
+        );
+    """)
+
     conn.commit()
     cur.close()
     conn.close()
@@ -0,0 +1,218 @@
+import hashlib
+import os
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+from app.core.llm import llm
+
+# Shared by app/worker.py (sue_task) and app/agents/sue_graph.py (draft_node)
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+# In-process LRU tier, bounded by the bytes held in vectors (1536 floats ~= 6 KB each)
+EMBEDDING_CACHE_MAX_BYTES = int(os.getenv("EMBEDDING_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+# Optional Redis tier so every worker process shares the same embeddings
+EMBEDDING_CACHE_REDIS_URL = os.getenv("EMBEDDING_CACHE_REDIS_URL", "")
+EMBEDDING_CACHE_TTL = int(os.getenv("EMBEDDING_CACHE_TTL", str(7 * 24 * 3600)))
+# Fleet-wide counters ride along with the Redis round trips of hits/misses; memory hits
+# make none, so theirs are pushed at most this often
+EMBEDDING_CACHE_STATS_FLUSH_SECONDS = float(os.getenv("EMBEDDING_CACHE_STATS_FLUSH_SECONDS", "10"))
+
+REDIS_KEY_PREFIX = "embedding-cache:"
+REDIS_STATS_KEY = "embedding-cache:stats"
+
+
+def normalize_text(text: str) -> str:
+    """What actually gets embedded (and hashed): surrounding whitespace changes neither."""
+    return text.strip()
+
+
+def embedding_cache_key(text: str, model: str = EMBEDDING_MODEL) -> str:
+    """Content hash of (model, normalized text) - the same ticket always maps to the same key."""
+    digest = hashlib.sha256(f"{model}\x00{text}".encode("utf-8")).hexdigest()
+    return digest
+
+
+class EmbeddingCache:
+    def __init__(self, max_bytes=EMBEDDING_CACHE_MAX_BYTES, redis_url=EMBEDDING_CACHE_REDIS_URL,
+                 ttl=EMBEDDING_CACHE_TTL, stats_flush_seconds=EMBEDDING_CACHE_STATS_FLUSH_SECONDS):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.stats_flush_seconds = stats_flush_seconds
+        self._entries = OrderedDict()  # key -> array('f')
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._redis = None
+        if redis_url:
+            import redis
+            self._redis = redis.Redis.from_url(redis_url)
+        self._stats = {
+            "memory_hits": 0,
+            "redis_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "miss_seconds_total": 0.0,
+        }
+        self._unflushed = {}  # counts not yet added to REDIS_STATS_KEY
+        self._last_flush = time.monotonic()
+
+    # --- In-process LRU tier ---
+    def _memory_get(self, key):
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+            return vector
+
+    def _memory_put(self, key, vector: array):
+        size = vector.itemsize * len(vector)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.itemsize * len(old)
+            self._entries[key] = vector
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.itemsize * len(evicted)
+                self._stats["evictions"] += 1
+
+    # --- Optional Redis tier (best effort: a Redis outage must never break RAG) ---
+    def _redis_get(self, key):
+        if self._redis is None:
+            return None
+        try:
+            raw = self._redis.get(REDIS_KEY_PREFIX + key)
+        except Exception as e:
+            print(f"Embedding cache (redis) error: {e}")
+            return None
+        if raw is None:
+            return None
+        vector = array("f")
+        vector.frombytes(raw)
+        return vector
+
+    def _redis_put(self, key, vector: array):
+        if self._redis is None:
+            return
+        try:
+            self._redis.set(REDIS_KEY_PREFIX + key, vector.tobytes(), ex=self.ttl)
+        except Exception as e:
+            print(f"Embedding cache (redis) error: {e}")
+
+    def _count(self, field, amount=1):
+        with self._lock:
+            self._stats[field] += amount
+            if self._redis is not None:
+                self._unflushed[field] = self._unflushed.get(field, 0) + amount
+
+    def _flush_stats(self, force: bool = True):
+        """Add the pending counts to the shared hash in one pipelined round trip."""
+        if self._redis is None:
+            return
+        with self._lock:
+            if not self._unflushed or (not force and time.monotonic() - self._last_flush < self.stats_flush_seconds):
+                return
+            pending, self._unflushed = self._unflushed, {}
+            self._last_flush = time.monotonic()
+        try:
+            pipe = self._redis.pipeline(transaction=False)
+            for field, amount in pending.items():
+                if isinstance(amount, float):
+                    pipe.hincrbyfloat(REDIS_STATS_KEY, field, amount)
+                else:
+                    pipe.hincrby(REDIS_STATS_KEY, field, amount)
+            pipe.execute()
+        except Exception:
+            # Keep them for the next flush
+            with self._lock:
+                for field, amount in pending.items():
+                    self._unflushed[field] = self._unflushed.get(field, 0) + amount
+
+    def get_or_create(self, text: str, embed_fn, model: str = EMBEDDING_MODEL) -> list:
+        """
+        Return the cached embedding for `text`, calling embed_fn only on a miss. The key
+        and embed_fn both get the normalized text, so a cached vector is always the
+        embedding of exactly what was hashed.
+        """
+        text = normalize_text(text)
+        key = embedding_cache_key(text, model)
+
+        vector = self._memory_get(key)
+        if vector is not None:
+            # The hot path stays local: no Redis round trip unless a flush is overdue
+            self._count("memory_hits")
+            self._flush_stats(force=False)
+            return vector.tolist()
+
+        vector = self._redis_get(key)
+        if vector is not None:
+            self._count("redis_hits")
+            self._flush_stats()
+            self._memory_put(key, vector)
+            return vector.tolist()
+
+        started = time.perf_counter()
+        embedding = embed_fn(text)
+        self._count("misses")
+        self._count("miss_seconds_total", float(time.perf_counter() - started))
+        self._flush_stats()
+
+        # float32 is what pgvector stores anyway, and halves the footprint
+        vector = array("f", embedding)
+        self._memory_put(key, vector)
+        self._redis_put(key, vector)
+        return embedding
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self, shared: bool = False) -> dict:
+        """
+        Hit/miss counters for this process, or for the whole fleet (shared=True)
+        when the Redis tier is enabled. Other processes' memory hits show up there
+        within EMBEDDING_CACHE_STATS_FLUSH_SECONDS.
+        """
+        if shared:
+            self._flush_stats()
+        with self._lock:
+            counters = dict(self._stats)
+            entries, used = len(self._entries), self._bytes
+
+        if shared and self._redis is not None:
+            try:
+                raw = self._redis.hgetall(REDIS_STATS_KEY)
+                counters = {k.decode(): float(v) for k, v in raw.items()}
+            except Exception as e:
+                print(f"Embedding cache (redis) error: {e}")
+
+        hits = counters.get("memory_hits", 0) + counters.get("redis_hits", 0)
+        misses = counters.get("misses", 0)
+        lookups = hits + misses
+        avg_miss_seconds = counters.get("miss_seconds_total", 0.0) / misses if misses else 0.0
+        return {
+            "memory_hits": int(counters.get("memory_hits", 0)),
+            "redis_hits": int(counters.get("redis_hits", 0)),
+            "misses": int(misses),
+            "evictions": int(counters.get("evictions", 0)),
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            # Every hit skipped one embeddings round trip of roughly the average miss latency
+            "estimated_seconds_saved": round(hits * avg_miss_seconds, 3),
+            "entries": entries,
+            "bytes": used,
+            "max_bytes": self.max_bytes,
+            "redis_enabled": self._redis is not None,
+        }
+
+
+embedding_cache = EmbeddingCache()
+
+
+def embed_text(text: str, model: str = EMBEDDING_MODEL) -> list:
+    """Embed `text` through the LLM gateway, going through the shared cache."""
+    return embedding_cache.get_or_create(text, lambda value: llm.embed(value, model), model=model)
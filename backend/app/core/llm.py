@@ -0,0 +1,306 @@
+import asyncio
+import contextvars
+import os
+import random
+import threading
+import time
+
+from dotenv import load_dotenv
+
+from app.core.llm_cache import LLMResponseCache, llm_cache_key
+from app.core.metrics import current_agent, record_llm_request, record_llm_usage, span
+
+load_dotenv()
+
+# =============================================================================
+# LLM GATEWAY (one per process, shared by every agent)
+# =============================================================================
+# - AsyncOpenAI client, so one process can keep many completions in flight
+# - Global semaphore caps concurrent requests
+# - Token buckets for requests/min AND tokens/min (OpenAI enforces both)
+# - Retries with full-jitter exponential backoff on 429 / 5xx / connection errors
+# - Sync facade (llm.complete / llm.embed) so Celery tasks keep their plain-function shape;
+#   llm.run(coro) runs other async work (Lisa's crawler) on the same loop
+# - Optional Redis response cache for agents with deterministic prompts (app/core/llm_cache.py)
+# - Prometheus: "llm"/"embed" spans, requests by outcome and token usage per agent (app/core/metrics.py)
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "500"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "200000"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "20"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+
+DEFAULT_CHAT_MODEL = "gpt-3.5-turbo"
+# Budgeted per completion when the caller gives no max_tokens
+DEFAULT_COMPLETION_TOKENS = 512
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token for English; close enough for rate budgeting
+    return max(1, len(text) // 4)
+
+
+class TokenBucket:
+    """Async token bucket refilled continuously at `per_minute / 60` units per second."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = float(per_minute)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1) -> float:
+        """Wait until `amount` units are available. Returns seconds spent waiting."""
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return waited
+                delay = (amount - self.tokens) / self.rate
+                waited += delay
+                await asyncio.sleep(delay)
+
+    def adjust(self, amount: float):
+        """Give back (positive) or take (negative) units once the real usage is known."""
+        self._refill()
+        self.tokens = max(-self.capacity, min(self.capacity, self.tokens + amount))
+
+
+class LLMGateway:
+    def __init__(self, max_concurrency=LLM_MAX_CONCURRENCY, requests_per_minute=LLM_REQUESTS_PER_MINUTE,
+                 tokens_per_minute=LLM_TOKENS_PER_MINUTE, max_retries=LLM_MAX_RETRIES):
+        self.max_concurrency = max_concurrency
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_retries = max_retries
+
+        self._pid = None
+        self._loop = None
+        self._thread = None
+        self._client = None
+        self._semaphore = None
+        self._request_bucket = None
+        self._token_bucket = None
+        self.cache = LLMResponseCache()
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "requests": 0,
+            "retries": 0,
+            "failures": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "throttled_seconds": 0.0,
+        }
+
+    # --- Event loop plumbing (rebuilt after fork: threads don't survive it) ---
+    def _ensure_loop(self):
+        if self._pid == os.getpid() and self._loop is not None:
+            return
+        with self._start_lock:
+            if self._pid == os.getpid() and self._loop is not None:
+                return
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name="llm-gateway", daemon=True)
+            thread.start()
+            self._loop, self._thread, self._pid = loop, thread, os.getpid()
+            self._client = None
+            # asyncio primitives must be created on the loop that uses them
+            asyncio.run_coroutine_threadsafe(self._init_primitives(), loop).result()
+
+    async def _init_primitives(self):
+        from openai import AsyncOpenAI
+        self._client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), timeout=LLM_TIMEOUT, max_retries=0)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._request_bucket = TokenBucket(self.requests_per_minute)
+        self._token_bucket = TokenBucket(self.tokens_per_minute)
+        self.cache.reset()
+
+    def _run(self, coro):
+        self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    async def _run_async(self, coro):
+        # Callers on another event loop (e.g. FastAPI) await the gateway loop's future
+        self._ensure_loop()
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self._loop))
+
+    def _count(self, **amounts):
+        with self._stats_lock:
+            for field, amount in amounts.items():
+                self._stats[field] += amount
+
+    def _count_agent(self, agent):
+        with self._stats_lock:
+            by_agent = self._stats.setdefault("by_agent", {})
+            by_agent[agent or "unknown"] = by_agent.get(agent or "unknown", 0) + 1
+
+    # --- Retry policy ---
+    @staticmethod
+    def _is_retryable(error) -> bool:
+        import openai
+        if isinstance(error, (openai.RateLimitError, openai.APIConnectionError, openai.APITimeoutError)):
+            return True
+        return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+    @staticmethod
+    def _retry_after(error):
+        response = getattr(error, "response", None)
+        value = response.headers.get("retry-after") if response is not None else None
+        try:
+            return float(value) if value is not None else None
+        except ValueError:
+            return None
+
+    async def _call(self, make_request, estimated_tokens: int):
+        """Run one API call under the semaphore + rate limits, retrying transient failures."""
+        attempt = 0
+        while True:
+            async with self._semaphore:
+                waited = await self._request_bucket.acquire(1)
+                waited += await self._token_bucket.acquire(estimated_tokens)
+                self._count(requests=1, throttled_seconds=waited)
+                try:
+                    return await make_request()
+                except Exception as e:
+                    if attempt >= self.max_retries or not self._is_retryable(e):
+                        self._count(failures=1)
+                        raise
+                    error = e
+
+            # Back off OUTSIDE the semaphore so other callers can use the slot
+            attempt += 1
+            self._count(retries=1)
+            delay = self._retry_after(error)
+            if delay is None:
+                delay = random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2 ** attempt))
+            print(f"LLM retry {attempt}/{self.max_retries} in {delay:.2f}s ({type(error).__name__})")
+            await asyncio.sleep(delay)
+
+    # --- Coroutines that run on the gateway loop ---
+    async def _complete(self, prompt: str, model: str, agent: str = None, **kwargs) -> str:
+        self._count_agent(agent)
+
+        # Deterministic prompts from opted-in agents skip the API entirely on a hit
+        cache_key = None
+        if self.cache.enabled_for(agent):
+            cache_key = llm_cache_key(model, prompt, kwargs)
+            cached = await self.cache.get(agent, cache_key)
+            if cached is not None:
+                record_llm_request(agent, model, "cache_hit")
+                return cached
+
+        budget = estimate_tokens(prompt) + kwargs.get("max_tokens", DEFAULT_COMPLETION_TOKENS)
+        try:
+            response = await self._call(
+                lambda: self._client.chat.completions.create(
+                    model=model,
+                    messages=[{"role": "user", "content": prompt}],
+                    **kwargs
+                ),
+                budget
+            )
+        except Exception:
+            record_llm_request(agent, model, "error")
+            raise
+        record_llm_request(agent, model, "ok")
+
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            self._count(prompt_tokens=usage.prompt_tokens, completion_tokens=usage.completion_tokens)
+            record_llm_usage(agent, model, usage.prompt_tokens, usage.completion_tokens)
+            # Return what we over-reserved to the tokens/min bucket
+            self._token_bucket.adjust(budget - usage.total_tokens)
+
+        content = response.choices[0].message.content
+        if cache_key is not None and content:
+            await self.cache.set(agent, cache_key, content)
+        return content
+
+    async def _embed(self, text, model: str, agent: str = None):
+        inputs = [text] if isinstance(text, str) else list(text)
+        budget = sum(estimate_tokens(t) for t in inputs)
+
+        try:
+            response = await self._call(
+                lambda: self._client.embeddings.create(input=inputs, model=model),
+                budget
+            )
+        except Exception:
+            record_llm_request(agent, model, "error")
+            raise
+        record_llm_request(agent, model, "ok")
+
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            self._count(prompt_tokens=usage.prompt_tokens)
+            record_llm_usage(agent, model, prompt_tokens=usage.prompt_tokens)
+        vectors = [item.embedding for item in sorted(response.data, key=lambda d: d.index)]
+        return vectors[0] if isinstance(text, str) else vectors
+
+    # --- Async API (any event loop) ---
+    # Spans are opened here, on the caller's side: the caller's context knows the running task's agent
+    async def acomplete(self, prompt: str, model: str = DEFAULT_CHAT_MODEL, agent: str = None, **kwargs) -> str:
+        agent = agent or current_agent()
+        with span("llm", agent):
+            return await self._run_async(self._complete(prompt, model, agent, **kwargs))
+
+    async def aembed(self, text, model: str, agent: str = None):
+        """Embed one string (returns a vector) or a list of strings (returns a list of vectors)."""
+        agent = agent or current_agent()
+        with span("embed", agent):
+            return await self._run_async(self._embed(text, model, agent))
+
+    # --- Sync facade (Celery tasks, LangGraph nodes, scripts) ---
+    def complete(self, prompt: str, model: str = DEFAULT_CHAT_MODEL, agent: str = None, **kwargs) -> str:
+        agent = agent or current_agent()
+        with span("llm", agent):
+            return self._run(self._complete(prompt, model, agent, **kwargs))
+
+    def embed(self, text, model: str, agent: str = None):
+        agent = agent or current_agent()
+        with span("embed", agent):
+            return self._run(self._embed(text, model, agent))
+
+    def run(self, coro):
+        """
+        Run any coroutine on the gateway loop and wait for it, instead of asyncio.run().
+        Under the gevent pool all greenlets share one OS thread, so once the gateway loop
+        is running asyncio.run() anywhere in the process raises "cannot be called from a
+        running event loop". The coroutine sees the caller's context (agent, trace) and
+        must only use the async API (acomplete/aembed), never the sync facade.
+        """
+        context = contextvars.copy_context()
+
+        async def in_caller_context():
+            for var, value in context.items():
+                var.set(value)
+            return await coro
+
+        return self._run(in_caller_context())
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+            stats["by_agent"] = dict(self._stats.get("by_agent", {}))
+        stats["throttled_seconds"] = round(stats["throttled_seconds"], 3)
+        stats.update({
+            "max_concurrency": self.max_concurrency,
+            "requests_per_minute": self.requests_per_minute,
+            "tokens_per_minute": self.tokens_per_minute,
+        })
+        return stats
+
+
+llm = LLMGateway()
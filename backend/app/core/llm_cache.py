@@ -0,0 +1,107 @@
+import hashlib
+import json
+import os
+
+# Redis-backed cache of LLM completions, keyed on (model, normalized prompt).
+# Adam/Ivan/Penny/Lisa build their prompts purely from numbers and page data,
+# so the same inputs always produce the same prompt - and can reuse the answer.
+# Jeff and Sue stay off by default: their drafts go to a human for review and
+# should not be recycled across customers.
+LLM_CACHE_REDIS_URL = os.getenv("LLM_CACHE_REDIS_URL", "")
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", "3600"))
+LLM_CACHE_AGENTS = os.getenv("LLM_CACHE_AGENTS", "adam,ivan,penny,lisa")
+
+REDIS_KEY_PREFIX = "llm-cache:"
+REDIS_STATS_KEY = "llm-cache:stats"
+
+
+def parse_agent_ttls(spec: str, default_ttl: int = LLM_CACHE_TTL) -> dict:
+    """'adam,penny:600' -> {"adam": default_ttl, "penny": 600}"""
+    ttls = {}
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        agent, _, ttl = item.partition(":")
+        ttls[agent.strip()] = int(ttl) if ttl else default_ttl
+    return ttls
+
+
+def normalize_prompt(prompt: str) -> str:
+    # Prompts are indented triple-quoted f-strings; whitespace changes must not miss the cache
+    return " ".join(prompt.split())
+
+
+def llm_cache_key(model: str, prompt: str, params: dict = None) -> str:
+    payload = json.dumps(
+        {"model": model, "prompt": normalize_prompt(prompt), "params": params or {}},
+        sort_keys=True
+    )
+    return REDIS_KEY_PREFIX + hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    def __init__(self, redis_url=LLM_CACHE_REDIS_URL, agents=LLM_CACHE_AGENTS, ttl=LLM_CACHE_TTL):
+        self.redis_url = redis_url
+        self.agent_ttls = parse_agent_ttls(agents, ttl)
+        self._async_redis = None
+        self._sync_redis = None
+
+    def enabled_for(self, agent: str) -> bool:
+        return bool(self.redis_url) and agent in self.agent_ttls
+
+    def reset(self):
+        """Drop the async client (it is bound to the event loop that created it)."""
+        self._async_redis = None
+
+    def _client(self):
+        if self._async_redis is None:
+            import redis.asyncio
+            self._async_redis = redis.asyncio.Redis.from_url(self.redis_url)
+        return self._async_redis
+
+    async def get(self, agent: str, key: str):
+        try:
+            redis = self._client()
+            cached = await redis.get(key)
+            await redis.hincrby(REDIS_STATS_KEY, f"{agent}:{'hits' if cached is not None else 'misses'}", 1)
+        except Exception as e:
+            # A cache outage only costs latency, never the answer
+            print(f"LLM cache error: {e}")
+            return None
+        return cached.decode("utf-8") if cached is not None else None
+
+    async def set(self, agent: str, key: str, value: str):
+        try:
+            await self._client().set(key, value, ex=self.agent_ttls[agent])
+        except Exception as e:
+            print(f"LLM cache error: {e}")
+
+    def stats(self) -> dict:
+        """Per-agent hit ratios, shared by every process that writes to the cache."""
+        result = {"enabled": bool(self.redis_url), "agents": {}}
+        if not self.redis_url:
+            return result
+        try:
+            if self._sync_redis is None:
+                import redis
+                self._sync_redis = redis.Redis.from_url(self.redis_url)
+            raw = {k.decode(): int(v) for k, v in self._sync_redis.hgetall(REDIS_STATS_KEY).items()}
+        except Exception as e:
+            # Like get/set: a cache outage must not turn into a 500
+            print(f"LLM cache error: {e}")
+            result["error"] = str(e)
+            return result
+
+        for agent, ttl in self.agent_ttls.items():
+            hits, misses = raw.get(f"{agent}:hits", 0), raw.get(f"{agent}:misses", 0)
+            result["agents"][agent] = {
+                "ttl_seconds": ttl,
+                "hits": hits,
+                "misses": misses,
+                "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            }
+        hits = sum(a["hits"] for a in result["agents"].values())
+        lookups = hits + sum(a["misses"] for a in result["agents"].values())
+        result["hit_ratio"] = round(hits / lookups, 4) if lookups else 0.0
+        return result
@@ -0,0 +1,162 @@
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from celery.signals import task_prerun, task_postrun, worker_init, worker_process_shutdown
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram,
+                               generate_latest, multiprocess, start_http_server)
+
+# =============================================================================
+# METRICS & TRACING (Prometheus)
+# =============================================================================
+# span("llm") / span("embed") / span("db") / span("fetch") / span("parse") / span("web_search")
+# time the hot paths. They sit in the shared helpers (LLM gateway, db_cursor,
+# Lisa's fetch/parse, Jeff's search) so tasks and both graphs are covered alike.
+# Every span lands in one histogram labelled (agent, stage); the agent comes from
+# the running Celery task (its queue) unless given explicitly.
+#
+# A task also collects its spans as a trace; tasks slower than
+# METRICS_SLOW_TASK_SECONDS print their breakdown, e.g.
+#   TRACE app.worker.sue_task 2.41s: embed 1.92s | db 0.03s | llm 0.44s
+#
+# Multiple processes (uvicorn --workers, prefork Celery): set PROMETHEUS_MULTIPROC_DIR
+# to an empty, per-container directory; every process writes its own files there
+# and /metrics (or the worker's CELERY_METRICS_PORT server) aggregates them.
+
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR", "")
+CELERY_METRICS_PORT = int(os.getenv("CELERY_METRICS_PORT", "0"))  # 0 = no worker metrics server
+METRICS_SLOW_TASK_SECONDS = float(os.getenv("METRICS_SLOW_TASK_SECONDS", "10"))
+
+# LLM calls take seconds, DB queries milliseconds: one bucket set wide enough for both
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+STAGE_SECONDS = Histogram(
+    "agent_stage_seconds", "Time spent in one stage (llm, embed, db, fetch, parse, web_search)",
+    ["agent", "stage"], buckets=LATENCY_BUCKETS,
+)
+STAGE_ERRORS = Counter("agent_stage_errors_total", "Stages that raised", ["agent", "stage"])
+TASK_SECONDS = Histogram(
+    "agent_task_seconds", "End-to-end Celery task duration", ["agent", "task", "state"], buckets=LATENCY_BUCKETS,
+)
+NODE_SECONDS = Histogram(
+    "agent_graph_node_seconds", "LangGraph node duration", ["agent", "node"], buckets=LATENCY_BUCKETS,
+)
+LLM_TOKENS = Counter("llm_tokens_total", "Tokens reported by the API", ["agent", "model", "kind"])
+LLM_REQUESTS = Counter("llm_requests_total", "LLM gateway calls by outcome", ["agent", "model", "outcome"])
+
+_agent = ContextVar("metrics_agent", default="unknown")
+_trace = ContextVar("metrics_trace", default=None)
+_task_started = {}
+
+
+def current_agent() -> str:
+    return _agent.get()
+
+
+@contextmanager
+def span(stage: str, agent: str = None):
+    """Time a block as `stage` of `agent` (default: the running task's agent)."""
+    agent = agent or _agent.get()
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        STAGE_ERRORS.labels(agent, stage).inc()
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.labels(agent, stage).observe(elapsed)
+        trace = _trace.get()
+        if trace is not None:
+            trace.append((stage, elapsed))
+
+
+def timed_node(agent: str):
+    """Decorator for LangGraph nodes: one agent_graph_node_seconds sample per run."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                NODE_SECONDS.labels(agent, fn.__name__).observe(time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+def record_llm_usage(agent: str, model: str, prompt_tokens: int = 0, completion_tokens: int = 0):
+    agent = agent or "unknown"
+    if prompt_tokens:
+        LLM_TOKENS.labels(agent, model, "prompt").inc(prompt_tokens)
+    if completion_tokens:
+        LLM_TOKENS.labels(agent, model, "completion").inc(completion_tokens)
+
+
+def record_llm_request(agent: str, model: str, outcome: str):
+    LLM_REQUESTS.labels(agent or "unknown", model, outcome).inc()
+
+
+def format_trace(trace) -> str:
+    totals = {}
+    for stage, seconds in trace:
+        totals[stage] = totals.get(stage, 0.0) + seconds
+    return " | ".join(f"{stage} {seconds:.2f}s" for stage, seconds in totals.items())
+
+
+# --- Celery: agent context, per-task trace and duration ---
+def _agent_for(task_name: str) -> str:
+    from app.core.celery_app import TASK_ROUTES
+    return TASK_ROUTES.get(task_name, ("unknown", None))[0]
+
+
+@task_prerun.connect
+def _on_task_prerun(task_id=None, task=None, **kwargs):
+    if task is None:
+        return
+    _agent.set(_agent_for(task.name))
+    _trace.set([])
+    _task_started[task_id] = time.perf_counter()
+
+
+@task_postrun.connect
+def _on_task_postrun(task_id=None, task=None, state=None, **kwargs):
+    started = _task_started.pop(task_id, None)
+    if task is None or started is None:
+        return
+    elapsed = time.perf_counter() - started
+    TASK_SECONDS.labels(_agent_for(task.name), task.name, state or "UNKNOWN").observe(elapsed)
+    trace = _trace.get()
+    if trace and elapsed >= METRICS_SLOW_TASK_SECONDS:
+        print(f"TRACE {task.name} {elapsed:.2f}s: {format_trace(trace)}")
+    _agent.set("unknown")
+    _trace.set(None)
+
+
+# --- Exposition ---
+def metrics_registry():
+    if not PROMETHEUS_MULTIPROC_DIR:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def render_metrics():
+    """(body, content type) for a /metrics response."""
+    return generate_latest(metrics_registry()), CONTENT_TYPE_LATEST
+
+
+@worker_init.connect
+def _start_worker_metrics_server(**kwargs):
+    # Main worker process only; prefork children report through PROMETHEUS_MULTIPROC_DIR
+    if CELERY_METRICS_PORT:
+        start_http_server(CELERY_METRICS_PORT, registry=metrics_registry())
+
+
+@worker_process_shutdown.connect
+def _mark_process_dead(pid=None, **kwargs):
+    if PROMETHEUS_MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid or os.getpid())
@@ -0,0 +1,109 @@
+import json
+import os
+import threading
+import time
+
+from celery import current_task
+from celery.signals import task_prerun, task_success, task_failure, task_retry, task_revoked
+
+# =============================================================================
+# TASK PROGRESS EVENTS (Redis pub/sub)
+# =============================================================================
+# Workers publish state transitions (STARTED/SUCCESS/...) and intermediate agent
+# stages ("policy retrieved", "drafting") to `task-progress:<task_id>`.
+# Every event is also appended to a short-lived history list, so a client that
+# subscribes after the task started still receives everything it missed.
+# An empty PROGRESS_REDIS_URL turns publishing off (eager/local runs without Redis).
+
+PROGRESS_REDIS_URL = os.getenv("PROGRESS_REDIS_URL", os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0"))
+PROGRESS_HISTORY_TTL = int(os.getenv("PROGRESS_HISTORY_TTL", "3600"))
+
+CHANNEL_PREFIX = "task-progress:"
+HISTORY_PREFIX = "task-progress-history:"
+FINAL_STATES = {"SUCCESS", "FAILURE", "REVOKED"}
+
+_redis = None
+_redis_pid = None
+_redis_lock = threading.Lock()
+
+
+def _client():
+    global _redis, _redis_pid
+    if _redis is None or _redis_pid != os.getpid():
+        with _redis_lock:
+            if _redis is None or _redis_pid != os.getpid():
+                import redis
+                _redis = redis.Redis.from_url(PROGRESS_REDIS_URL)
+                _redis_pid = os.getpid()
+    return _redis
+
+
+def channel_for(task_id: str) -> str:
+    return CHANNEL_PREFIX + task_id
+
+
+def history_key_for(task_id: str) -> str:
+    return HISTORY_PREFIX + task_id
+
+
+def _publish(task_id: str, event: dict):
+    if not task_id or not PROGRESS_REDIS_URL:
+        return
+    try:
+        client = _client()
+        history_key = history_key_for(task_id)
+        # seq = position in the history, lets subscribers drop duplicates
+        seq = client.rpush(history_key, b"")
+        event = {"task_id": task_id, "seq": seq, "ts": time.time(), **event}
+        payload = json.dumps(event, default=str)
+        pipe = client.pipeline()
+        pipe.lset(history_key, seq - 1, payload)
+        pipe.expire(history_key, PROGRESS_HISTORY_TTL)
+        pipe.publish(channel_for(task_id), payload)
+        pipe.execute()
+    except Exception as e:
+        # Progress is best effort - never fail an agent because Redis hiccuped
+        print(f"Progress publish error: {e}")
+
+
+def publish_progress(stage: str, detail=None, task_id: str = None):
+    """
+    Called from inside a Celery task:
+        publish_progress("policy_retrieved", {"policy": policy_context[:80]})
+    Outside a task (e.g. LangGraph nodes run in the API) this is a no-op.
+    """
+    if task_id is None:
+        task = current_task
+        task_id = task.request.id if task else None
+    _publish(task_id, {"type": "progress", "stage": stage, "detail": detail})
+
+
+def publish_state(task_id: str, state: str, detail=None):
+    _publish(task_id, {"type": "state", "state": state, "detail": detail})
+
+
+# --- Celery lifecycle -> state events ---
+@task_prerun.connect
+def _on_task_prerun(task_id=None, task=None, **kwargs):
+    publish_state(task_id, "STARTED", {"task": task.name if task else None})
+
+
+@task_success.connect
+def _on_task_success(sender=None, result=None, **kwargs):
+    status = result.get("status") if isinstance(result, dict) else None
+    publish_state(sender.request.id, "SUCCESS", {"status": status})
+
+
+@task_failure.connect
+def _on_task_failure(task_id=None, exception=None, **kwargs):
+    publish_state(task_id, "FAILURE", {"error": str(exception)})
+
+
+@task_retry.connect
+def _on_task_retry(request=None, reason=None, **kwargs):
+    publish_state(request.id if request else None, "RETRY", {"reason": str(reason)})
+
+
+@task_revoked.connect
+def _on_task_revoked(request=None, **kwargs):
+    publish_state(request.id if request else None, "REVOKED")
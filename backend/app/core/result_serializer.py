@@ -0,0 +1,66 @@
+import datetime
+import decimal
+import json
+import os
+import uuid
+import zlib
+
+import msgpack
+from kombu.serialization import register
+
+# =============================================================================
+# COMPACT RESULT SERIALIZER ("msgpack-z")
+# =============================================================================
+# Task results (Lisa audits, Jeff drafts, Ivan POs) are mostly long text.
+# msgpack drops JSON's quoting/escaping overhead; payloads above the threshold
+# are additionally zlib-compressed. One marker byte says which:
+#   0x00 + msgpack            small payloads (compression would not pay off)
+#   0x01 + zlib(msgpack)      large payloads
+# Anything else is a result written before the switch (JSON) and still decodes.
+
+SERIALIZER_NAME = "msgpack-z"
+CONTENT_TYPE = "application/x-msgpack-z"
+
+RESULT_COMPRESS_THRESHOLD = int(os.getenv("RESULT_COMPRESS_THRESHOLD", "1024"))  # bytes of msgpack
+RESULT_COMPRESS_LEVEL = int(os.getenv("RESULT_COMPRESS_LEVEL", "6"))
+
+RAW = b"\x00"
+COMPRESSED = b"\x01"
+
+
+def _default(obj):
+    # Types psycopg2 rows and agents may hand back; results are reporting data, so lossy is fine
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    raise TypeError(f"Cannot serialize {type(obj).__name__}")
+
+
+def dumps(obj) -> bytes:
+    packed = msgpack.packb(obj, default=_default, use_bin_type=True)
+    if len(packed) > RESULT_COMPRESS_THRESHOLD:
+        return COMPRESSED + zlib.compress(packed, RESULT_COMPRESS_LEVEL)
+    return RAW + packed
+
+
+def loads(data):
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    marker, body = data[:1], data[1:]
+    if marker == COMPRESSED:
+        return msgpack.unpackb(zlib.decompress(body), raw=False)
+    if marker == RAW:
+        return msgpack.unpackb(body, raw=False)
+    return json.loads(data)
+
+
+def is_compressed(data: bytes) -> bool:
+    return data[:1] == COMPRESSED
+
+
+register(SERIALIZER_NAME, dumps, loads, content_type=CONTENT_TYPE, content_encoding="binary")
@@ -0,0 +1,111 @@
+from celery import states
+from celery.backends.redis import RedisBackend
+
+from app.core.celery_app import celery_app
+from app.core.result_serializer import is_compressed
+
+# Keys per MGET round trip; keeps a single Redis command from blocking the server
+MGET_CHUNK_SIZE = 500
+
+
+def _compact(meta: dict, include_result: bool) -> dict:
+    status = meta.get("status", states.PENDING)
+    entry = {"status": status}
+    if include_result and status in states.READY_STATES:
+        result = meta.get("result")
+        # Failures come back as exception instances; keep the map JSON-friendly
+        entry["result"] = str(result) if status in states.EXCEPTION_STATES else result
+    return entry
+
+
+def bulk_task_status(task_ids, include_result: bool = False) -> dict:
+    """
+    Resolve many task ids at once: {task_id: {"status": ..., "result": ...}}.
+
+    With the Redis result backend this is one pipelined MGET per chunk instead
+    of one AsyncResult + GET per task. Other backends fall back to per-task reads.
+    """
+    backend = celery_app.backend
+    task_ids = list(dict.fromkeys(task_ids))  # dedupe, keep order
+    statuses = {}
+
+    # Not duck-typed: the eager cache backend also has .client (a DummyClient without pipelines)
+    if isinstance(backend, RedisBackend):
+        pipe = backend.client.pipeline(transaction=False)
+        for start in range(0, len(task_ids), MGET_CHUNK_SIZE):
+            chunk = task_ids[start:start + MGET_CHUNK_SIZE]
+            pipe.mget([backend.get_key_for_task(task_id) for task_id in chunk])
+        chunks = pipe.execute() if task_ids else []
+
+        for start, values in zip(range(0, len(task_ids), MGET_CHUNK_SIZE), chunks):
+            for task_id, value in zip(task_ids[start:start + MGET_CHUNK_SIZE], values):
+                # No key yet = never started (or expired): Celery reports that as PENDING
+                meta = backend.decode_result(value) if value is not None else {"status": states.PENDING}
+                statuses[task_id] = _compact(meta, include_result)
+    else:
+        for task_id in task_ids:
+            statuses[task_id] = _compact(backend.get_task_meta(task_id), include_result)
+
+    return statuses
+
+
+# Keys inspected per report; SCAN + MEMORY USAGE is O(sample), never O(keyspace)
+MEMORY_REPORT_SAMPLE = 2000
+
+
+def result_backend_memory(sample: int = MEMORY_REPORT_SAMPLE) -> dict:
+    """
+    Footprint of the Redis result backend: server memory plus a sample of
+    celery-task-meta-* keys (size, compression, keys missing a TTL).
+    """
+    backend = celery_app.backend
+    if not isinstance(backend, RedisBackend):
+        return {"backend": type(backend).__name__, "supported": False}
+    client = backend.client
+    info = client.info("memory")
+
+    keys = []
+    prefix = backend.task_keyprefix
+    prefix = prefix.decode() if isinstance(prefix, bytes) else prefix
+    for key in client.scan_iter(match=prefix + "*", count=500):
+        keys.append(key)
+        if len(keys) >= sample:
+            break
+
+    pipe = client.pipeline(transaction=False)
+    for key in keys:
+        pipe.memory_usage(key)
+        pipe.ttl(key)
+        pipe.getrange(key, 0, 0)
+    replies = pipe.execute() if keys else []
+
+    sizes, no_ttl, compressed = [], 0, 0
+    for i in range(0, len(replies), 3):
+        size, ttl, marker = replies[i:i + 3]
+        sizes.append(size or 0)
+        no_ttl += ttl == -1
+        compressed += is_compressed(marker or b"")
+
+    keyspace = client.info("keyspace").get(f"db{client.connection_pool.connection_kwargs.get('db', 0)}", {})
+    return {
+        "backend": type(backend).__name__,
+        "supported": True,
+        "serializer": celery_app.conf.result_serializer,
+        "redis": {
+            "used_memory": info.get("used_memory"),
+            "used_memory_human": info.get("used_memory_human"),
+            "maxmemory": info.get("maxmemory"),
+            "maxmemory_policy": info.get("maxmemory_policy"),
+            "fragmentation_ratio": info.get("mem_fragmentation_ratio"),
+            "db_keys": keyspace.get("keys"),
+        },
+        "results_sample": {
+            "keys": len(sizes),
+            "complete": len(keys) < sample,  # False: more result keys exist than were sampled
+            "total_bytes": sum(sizes),
+            "avg_bytes": round(sum(sizes) / len(sizes)) if sizes else 0,
+            "max_bytes": max(sizes, default=0),
+            "compressed": compressed,
+            "without_ttl": no_ttl,
+        },
+    }
@@ -0,0 +1,175 @@
+import os
+import threading
+
+import numpy as np
+import psycopg2
+import psycopg2.errors
+
+from app.core.db import db_cursor, PoolTimeout
+from app.core.embedding_cache import embed_text
+from app.core.mock_db import MOCK_VECTOR_DB
+
+# --- ANN index settings for policies.embedding (pgvector) ---
+# hnsw: better recall/latency, slower build. ivfflat: fast build, needs data before CREATE INDEX.
+POLICY_INDEX_METHOD = os.getenv("POLICY_INDEX_METHOD", "hnsw")
+HNSW_M = int(os.getenv("HNSW_M", "16"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "64"))
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "40"))
+IVFFLAT_LISTS = int(os.getenv("IVFFLAT_LISTS", "0"))  # 0 = derive from row count
+IVFFLAT_PROBES = int(os.getenv("IVFFLAT_PROBES", "10"))
+
+# Minimum cosine similarity for a policy to count as "relevant"
+POLICY_MIN_SIMILARITY = float(os.getenv("POLICY_MIN_SIMILARITY", "0.0"))
+
+INDEX_NAMES = {
+    "hnsw": "policies_embedding_hnsw_idx",
+    "ivfflat": "policies_embedding_ivfflat_idx",
+}
+
+
+def ivfflat_lists_for(row_count: int) -> int:
+    # pgvector's guidance: rows / 1000 up to 1M rows, sqrt(rows) above that
+    if IVFFLAT_LISTS:
+        return IVFFLAT_LISTS
+    if row_count > 1_000_000:
+        return int(row_count ** 0.5)
+    return max(1, row_count // 1000)
+
+
+def ensure_policy_index(cur, method: str = None, rebuild: bool = False):
+    """
+    Create the ANN index for the chosen method and drop the other one.
+    An existing ivfflat index is kept unless its `lists` no longer fits the table,
+    or `rebuild` asks to re-cluster it (after a bulk load).
+    """
+    method = method or POLICY_INDEX_METHOD
+    if method not in INDEX_NAMES:
+        raise ValueError(f"Unknown index method '{method}' (expected one of {list(INDEX_NAMES)})")
+
+    for other, name in INDEX_NAMES.items():
+        if other != method:
+            cur.execute(f"DROP INDEX IF EXISTS {name};")
+
+    if method == "hnsw":
+        cur.execute(f"""
+            CREATE INDEX IF NOT EXISTS {INDEX_NAMES['hnsw']}
+            ON policies USING hnsw (embedding vector_cosine_ops)
+            WITH (m = %s, ef_construction = %s);
+        """, (HNSW_M, HNSW_EF_CONSTRUCTION))
+    else:
+        # IVFFlat clusters existing rows, so (re)build it after bulk ingestion
+        cur.execute("SELECT COUNT(*) FROM policies;")
+        lists = ivfflat_lists_for(cur.fetchone()[0])
+        cur.execute("SELECT reloptions FROM pg_class WHERE relname = %s;", (INDEX_NAMES["ivfflat"],))
+        row = cur.fetchone()
+        if row is not None and not rebuild and f"lists={lists}" in (row[0] or []):
+            return
+        cur.execute(f"DROP INDEX IF EXISTS {INDEX_NAMES['ivfflat']};")
+        cur.execute(f"""
+            CREATE INDEX {INDEX_NAMES['ivfflat']}
+            ON policies USING ivfflat (embedding vector_cosine_ops)
+            WITH (lists = %s);
+        """, (lists,))
+
+
+def apply_search_settings(cur, k: int = 1, method: str = None):
+    """Per-transaction recall/speed knobs. SET LOCAL resets when the transaction ends."""
+    method = method or POLICY_INDEX_METHOD
+    if method == "hnsw":
+        # ef_search below k would silently return fewer than k rows
+        cur.execute("SELECT set_config('hnsw.ef_search', %s, true);", (str(max(HNSW_EF_SEARCH, k)),))
+    else:
+        cur.execute("SELECT set_config('ivfflat.probes', %s, true);", (str(IVFFLAT_PROBES),))
+
+
+def search_policies(query_embedding, k: int = 3, min_similarity: float = POLICY_MIN_SIMILARITY):
+    """Top-k policies by cosine similarity from pgvector: [{"text", "score"}, ...]"""
+    with db_cursor() as cur:
+        apply_search_settings(cur, k)
+        # Filter on score afterwards - a WHERE on distance stops the planner using the index.
+        # Rows not embedded yet would sort last with a NULL score: leave them out.
+        cur.execute("""
+            SELECT text, 1 - (embedding <=> %s::vector) AS score
+            FROM policies
+            WHERE embedding IS NOT NULL
+            ORDER BY embedding <=> %s::vector
+            LIMIT %s;
+        """, (query_embedding, query_embedding, k))
+        rows = cur.fetchall()
+    return [{"text": text, "score": float(score)} for text, score in rows if score >= min_similarity]
+
+
+# =============================================================================
+# IN-PROCESS FALLBACK (no pgvector)
+# =============================================================================
+
+class InMemoryVectorIndex:
+    """Brute-force cosine search over a normalized float32 matrix."""
+
+    def __init__(self, dim: int = None):
+        self.dim = dim
+        self.texts = []
+        self._matrix = np.empty((0, dim or 0), dtype=np.float32)
+
+    def add(self, texts, embeddings):
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors[None, :]
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+            self._matrix = np.empty((0, self.dim), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        self._matrix = np.vstack([self._matrix, vectors / norms])
+        self.texts.extend(texts)
+
+    def __len__(self):
+        return len(self.texts)
+
+    def search(self, query_embedding, k: int = 3, min_similarity: float = POLICY_MIN_SIMILARITY):
+        if not self.texts:
+            return []
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        scores = self._matrix @ (query / norm if norm else query)
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            {"text": self.texts[i], "score": float(scores[i])}
+            for i in top if scores[i] >= min_similarity
+        ]
+
+
+_mock_index = None
+_mock_index_lock = threading.Lock()
+
+
+def get_mock_policy_index() -> InMemoryVectorIndex:
+    """Index over MOCK_VECTOR_DB, embedded once per process (through the embedding cache)."""
+    global _mock_index
+    if _mock_index is None:
+        with _mock_index_lock:
+            if _mock_index is None:
+                texts = list(MOCK_VECTOR_DB.values())
+                index = InMemoryVectorIndex()
+                index.add(texts, [embed_text(text) for text in texts])
+                _mock_index = index
+    return _mock_index
+
+
+def retrieve_policies(query_text: str, k: int = 3, min_similarity: float = POLICY_MIN_SIMILARITY):
+    """
+    Embed the query and return the top-k policies with scores.
+    Falls back to the in-process index over the mock SOPs when Postgres is unreachable
+    or not set up for RAG (no pgvector extension / policies table).
+    """
+    query_embedding = embed_text(query_text)
+    try:
+        return search_policies(query_embedding, k, min_similarity)
+    except (psycopg2.OperationalError, psycopg2.InterfaceError, PoolTimeout,
+            psycopg2.errors.UndefinedObject, psycopg2.errors.UndefinedTable) as e:
+        # Connection / schema problems only: a broken query must surface, not hide behind the mock SOPs
+        print(f"RAG: pgvector unavailable ({e}). Using in-process index.")
+        return get_mock_policy_index().search(query_embedding, k, min_similarity)
@@ -1,20 +1,33 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, Field
 from typing import List, Optional
-import time
-import random
-from app.agents.sue_graph import sue_graph
-from app.agents.jeff_graph import jeff_graph
+import json
 
-# Import the tasks
-from app.worker import jeff_task, penny_task, sue_task, adam_task, ivan_task, lisa_task
-from celery.result import AsyncResult
+# Tasks are queued by name and graphs built on first use: startup imports no agent code
+from app.agents.registry import adispatch, dispatch, get_graph, get_repricing_engine, preload
+from fastapi.concurrency import run_in_threadpool
+import redis.asyncio as aioredis
 
 # Import Mock Data
-from app.core.mock_db import MOCK_SELLERS, MOCK_INVENTORY, MOCK_ADS, MOCK_VECTOR_DB
+from app.core.mock_db import MOCK_VECTOR_DB
+from app.core.embedding_cache import embedding_cache
+from app.core.llm import llm
+from app.core.task_status import bulk_task_status, result_backend_memory
+from app.core.celery_app import CELERY_EAGER, celery_app, queue_depths
+from app.core.metrics import render_metrics
+from app.core.progress import PROGRESS_REDIS_URL, FINAL_STATES, channel_for, history_key_for
+from app.core.checkpoint import (approval_claimed, claim_approval, get_checkpointer, new_session_id,
+                                 resume_task_id, session_config)
 
 app = FastAPI(title="Amazon Agency OS - Production Sim")
 
+if CELERY_EAGER:
+    # Tasks get bound on first use; eager calls from concurrent threadpool requests race on that
+    celery_app.finalize()
+
+preload()  # AGENT_PRELOAD, empty by default
+
 # --- 1. JEFF (Sales Agent) ---
 class CampaignRequest(BaseModel):
     niche: str
@@ -26,7 +39,7 @@ def jeff_start_campaign(req: CampaignRequest):
     True Event-Driven: We dispatch the task and return ID immediately.
     """
     # 1. Dispatch to Redis
-    task = jeff_task.delay(req.niche, req.min_revenue)
+    task = dispatch("app.worker.jeff_task", (req.niche, req.min_revenue))
     
     # 2. Return the Ticket ID instantly
     return {
@@ -36,49 +49,187 @@ def jeff_start_campaign(req: CampaignRequest):
         "message": "Jeff has started scraping. Check status with /tasks/{task_id}"
     }
 
+class ProspectBatchRequest(BaseModel):
+    niches: List[str] = Field(..., min_length=1, max_length=100)
+    min_revenue: int = 0
+    per_niche: int = Field(default=3, ge=1, le=20)
+
+@app.post("/agents/jeff/prospect-batch")
+def jeff_prospect_batch(req: ProspectBatchRequest):
+    """
+    Batch prospecting: N ranked prospects for each niche, searched concurrently
+    (cached + rate limited) and deduplicated by domain. No emails are drafted.
+    """
+    task = dispatch("app.worker.jeff_batch_task", (req.niches, req.min_revenue, req.per_niche))
+    return {
+        "agent": "Jeff",
+        "status": "queued",
+        "task_id": task.id,
+        "message": f"Jeff is prospecting {len(req.niches)} niches. Check status with /tasks/{{task_id}}"
+    }
+
 @app.get("/tasks/{task_id}")
 def get_status(task_id: str):
     """
-    Polling Endpoint: Frontend calls this every 3 seconds to check progress.
+    Polling Endpoint: one-shot status lookup.
+    Prefer /tasks/{task_id}/events, which pushes progress as it happens.
     """
-    task_result = AsyncResult(task_id)
+    task_result = celery_app.AsyncResult(task_id)
     return {
         "task_id": task_id,
         "status": task_result.status,
         "result": task_result.result
     }
     
+class BatchStatusRequest(BaseModel):
+    task_ids: List[str] = Field(..., max_length=1000)
+    include_result: bool = False
+
+@app.post("/tasks/batch-status")
+def get_batch_status(req: BatchStatusRequest):
+    """
+    Bulk Polling Endpoint: resolve many task ids with pipelined MGETs against
+    the result backend. Returns {"statuses": {task_id: {"status", "result"?}}}.
+    """
+    statuses = bulk_task_status(req.task_ids, include_result=req.include_result)
+    counts = {}
+    for entry in statuses.values():
+        counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+    return {"statuses": statuses, "counts": counts}
+
+@app.get("/tasks/{task_id}/events")
+async def stream_task_events(task_id: str):
+    """
+    Push Endpoint (Server-Sent Events): streams state transitions and agent progress
+    published by the worker, replacing the 3-second polling loop.
+    Closes after SUCCESS / FAILURE / REVOKED.
+    Without PROGRESS_REDIS_URL (eager/local runs) nothing is published: the stream
+    sends the current state once and closes, and clients fall back to polling.
+    """
+    async def state_only():
+        state = await run_in_threadpool(lambda: celery_app.AsyncResult(task_id).state)
+        yield f"event: state\ndata: {json.dumps({'task_id': task_id, 'seq': 0, 'type': 'state', 'state': state})}\n\n"
+
+    async def event_stream():
+        redis = aioredis.Redis.from_url(PROGRESS_REDIS_URL)
+        pubsub = redis.pubsub()
+        # Subscribe BEFORE reading history so nothing published in between is lost
+        await pubsub.subscribe(channel_for(task_id))
+        last_seq = 0
+        try:
+            history = await redis.lrange(history_key_for(task_id), 0, -1)
+            if not history:
+                # Finished long ago (history expired) or still queued: report the backend state
+                state = await run_in_threadpool(lambda: celery_app.AsyncResult(task_id).state)
+                yield f"event: state\ndata: {json.dumps({'task_id': task_id, 'seq': 0, 'type': 'state', 'state': state})}\n\n"
+                if state in FINAL_STATES:
+                    return
+
+            for raw in history:
+                if not raw:
+                    continue
+                event = json.loads(raw)
+                last_seq = event["seq"]
+                yield f"event: {event['type']}\ndata: {raw.decode()}\n\n"
+                if event["type"] == "state" and event["state"] in FINAL_STATES:
+                    return
+
+            idle = 0.0
+            while True:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message is None:
+                    idle += 1.0
+                    if idle >= 15:
+                        # Comment line keeps proxies from closing an idle stream
+                        yield ": keep-alive\n\n"
+                        idle = 0.0
+                    continue
+                idle = 0.0
+                event = json.loads(message["data"])
+                if event["seq"] <= last_seq:
+                    continue
+                last_seq = event["seq"]
+                yield f"event: {event['type']}\ndata: {message['data'].decode()}\n\n"
+                if event["type"] == "state" and event["state"] in FINAL_STATES:
+                    return
+        finally:
+            await pubsub.unsubscribe(channel_for(task_id))
+            await pubsub.aclose()
+            await redis.aclose()
+
+    return StreamingResponse(
+        event_stream() if PROGRESS_REDIS_URL else state_only(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/llm/cache-stats")
+def llm_cache_stats():
+    """
+    Per-agent hit ratios of the LLM response cache (shared across all workers via Redis).
+    """
+    return llm.cache.stats()
+
+@app.get("/results/memory")
+def get_result_backend_memory(sample: int = Query(default=2000, ge=1, le=50000)):
+    """
+    Redis footprint of stored task results: server memory, sampled result sizes,
+    how many are compressed and how many (wrongly) have no TTL.
+    """
+    return result_backend_memory(sample)
+
+@app.get("/queues/depth")
+def get_queue_depths():
+    """
+    Messages waiting per agent queue - scale the io/db worker pools on these.
+    {"queues": {"lisa": 12, "ivan": 0, ...}, "total": 12}
+    """
+    depths = queue_depths()
+    return {"queues": depths, "total": sum(depths.values())}
+
+@app.get("/metrics")
+def get_metrics():
+    """
+    Prometheus exposition: per-stage latency histograms (llm, embed, db, fetch, parse,
+    web_search), task and graph node durations, LLM requests and token usage per agent.
+    Tasks run in the workers - scrape their CELERY_METRICS_PORT too.
+    """
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
 # --- 2. PENNY (Pricing Agent) ---
+# The catalog is static in the simulation, so it is decided once per process (on first request)
+
 @app.get("/agents/penny/repricing-log")
-def penny_optimize_prices():
+def penny_optimize_prices(offset: int = Query(default=0, ge=0), limit: Optional[int] = Query(default=None, ge=1, le=10000)):
     """
-    Simulates Penny checking all SKUs against competitors.
+    Simulates Penny checking all SKUs against competitors (vectorized over the catalog).
+    Pass offset/limit to page through large catalogs.
     """
-    logs = []
-    for sku, data in MOCK_INVENTORY.items():
-        current = data["price"]
-        comp = data["competitor_price"]
-        floor = data["min_price"]
-        
-        # Logic: Beat competitor by 5 cents, but respect floor
-        if comp < current:
-            new_target = comp - 0.05
-            if new_target >= floor:
-                logs.append({
-                    "sku": sku,
-                    "action": "DECREASE_PRICE",
-                    "old_price": current,
-                    "new_price": round(new_target, 2),
-                    "reason": "Competitor dropped price."
-                })
-            else:
-                logs.append({
-                    "sku": sku,
-                    "action": "HOLD",
-                    "reason": "Competitor below Min Price (Profit Protection)."
-                })
+    penny_engine = get_repricing_engine()
+    logs = list(penny_engine.events(offset, limit))
+    total = penny_engine.event_count()
+    next_offset = offset + len(logs)
+    
+    return {
+        "agent": "Penny",
+        "optimization_events": logs,
+        "total_events": total,
+        "next_offset": next_offset if next_offset < total else None,
+        "summary": penny_engine.summary()
+    }
+
+@app.get("/agents/penny/repricing-log/stream")
+def penny_stream_prices(offset: int = Query(default=0, ge=0)):
+    """
+    Same events as /repricing-log, streamed as NDJSON (one event per line) so a
+    million-SKU catalog never has to be materialized as a single JSON document.
+    """
+    def ndjson():
+        for event in get_repricing_engine().events(offset):
+            yield json.dumps(event) + "\n"
     
-    return {"agent": "Penny", "optimization_events": logs}
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
 
 # --- 2b. PENNY ASYNC (Pricing Analysis with LLM) ---
 class PricingRequest(BaseModel):
@@ -92,7 +243,7 @@ def penny_analyze_pricing(req: PricingRequest):
     """
     Async pricing analysis with margin calculation and LLM strategy.
     """
-    task = penny_task.delay(req.product, req.price, req.cost, req.competitor_price)
+    task = dispatch("app.worker.penny_task", (req.product, req.price, req.cost, req.competitor_price))
     return {
         "agent": "Penny",
         "status": "queued",
@@ -109,9 +260,15 @@ class AdRequest(BaseModel):
 @app.post("/agents/adam/optimize")
 async def start_adam(request: AdRequest):
     # Triggers the worker task that checks SQL DB & uses LLM
-    task = adam_task.delay(request.campaign_name)
+    task = await adispatch("app.worker.adam_task", (request.campaign_name,))
     return {"agent": "Adam", "task_id": task.id, "status": "optimizing"}
 
+@app.post("/agents/adam/optimize-portfolio")
+async def start_adam_portfolio():
+    # One task + one grouped query for every campaign; LLM only for non-HOLD decisions
+    task = await adispatch("app.worker.adam_portfolio_task")
+    return {"agent": "Adam", "task_id": task.id, "status": "optimizing_portfolio"}
+
 # --- 4. SUE (Reputation Agent - RAG) ---
 class ReviewRequest(BaseModel):
     review_text: str
@@ -151,7 +308,7 @@ def sue_handle_ticket(req: TicketRequest):
     """
     Async RAG-powered ticket handling with policy retrieval.
     """
-    task = sue_task.delay(req.ticket_text, req.order_status)
+    task = dispatch("app.worker.sue_task", (req.ticket_text, req.order_status))
     return {
         "agent": "Sue",
         "status": "queued",
@@ -159,6 +316,27 @@ def sue_handle_ticket(req: TicketRequest):
         "message": "Sue is retrieving policy and drafting response. Check status with /tasks/{task_id}"
     }
 
+@app.get("/agents/sue/embedding-cache")
+def sue_embedding_cache_stats():
+    """
+    Hit/miss counters of the RAG embedding cache (fleet-wide when the Redis tier is on).
+    """
+    return {"agent": "Sue", "embedding_cache": embedding_cache.stats(shared=True)}
+
+class PolicySearchRequest(BaseModel):
+    query: str
+    k: int = Field(default=3, ge=1, le=50)
+    min_similarity: float = 0.0
+
+@app.post("/agents/sue/search-policies")
+def sue_search_policies(req: PolicySearchRequest):
+    """
+    Top-k policy retrieval with cosine similarity scores (pgvector ANN, in-process fallback).
+    """
+    from app.core.vector_index import retrieve_policies  # numpy + index build, only when Sue searches
+    matches = retrieve_policies(req.query, k=req.k, min_similarity=req.min_similarity)
+    return {"agent": "Sue", "query": req.query, "matches": matches}
+
 # --- REQUEST MODEL ---
 class InventoryRequest(BaseModel):
     sku: str
@@ -166,9 +344,15 @@ class InventoryRequest(BaseModel):
 # --- 5. IVAN (Inventory Agent) ---
 @app.post("/agents/ivan/check-stock")
 async def start_ivan(request: InventoryRequest):
-    task = ivan_task.delay(request.sku)
+    task = await adispatch("app.worker.ivan_task", (request.sku,))
     return {"agent": "Ivan", "task_id": task.id, "status": "checking_inventory"}
 
+@app.post("/agents/ivan/reorder-sweep")
+async def start_ivan_sweep():
+    # Every low-stock SKU in one query, one consolidated PO per supplier
+    task = await adispatch("app.worker.ivan_sweep_task")
+    return {"agent": "Ivan", "task_id": task.id, "status": "sweeping_inventory"}
+
 # --- REQUEST MODEL ---
 class SeoRequest(BaseModel):
     url: str
@@ -177,13 +361,65 @@ class SeoRequest(BaseModel):
 # --- 6. LISA (SEO Agent) ---
 @app.post("/agents/lisa/audit")
 async def start_lisa(request: SeoRequest):
-    task = lisa_task.delay(request.url, request.keyword)
+    task = await adispatch("app.worker.lisa_task", (request.url, request.keyword))
     return {"agent": "Lisa", "task_id": task.id, "status": "auditing_site"}
 
+class SiteAuditRequest(BaseModel):
+    seed_url: str  # a page to crawl from, or a sitemap (*.xml)
+    keyword: str
+    max_pages: int = Field(default=50, ge=1, le=1000)
+
+@app.post("/agents/lisa/site-audit")
+async def start_lisa_site_audit(request: SiteAuditRequest):
+    task = await adispatch("app.worker.lisa_site_audit_task", (request.seed_url, request.keyword, request.max_pages))
+    return {"agent": "Lisa", "task_id": task.id, "status": "crawling_site"}
+
 # We use global variables to simulate "User Session" for the demo
 # In production, these "thread_id"s come from the Frontend (User ID)
-JEFF_THREAD_CONFIG = {"configurable": {"thread_id": "jeff_session_123"}}
-SUE_THREAD_CONFIG = {"configurable": {"thread_id": "sue_session_123"}}
+# =============================================================================
+# HITL SESSIONS
+# =============================================================================
+# Every review is its own LangGraph thread (session_id). The graph runs in a
+# Celery worker; these endpoints only dispatch and read the shared checkpointer,
+# so they return immediately and many reviews can be in flight at once.
+
+def hitl_session(graph, agent: str, session_id: str, review_node: str):
+    """(status, state values) of a session; 404 for ids of another agent or unknown sessions."""
+    if not session_id.startswith(f"{agent}-"):
+        raise HTTPException(status_code=404, detail="Session not found")
+    snapshot = graph.get_state(session_config(session_id))
+    if not snapshot.values:
+        # Nothing checkpointed yet: the start task (task_id == session_id) is queued or running
+        task = celery_app.AsyncResult(session_id)
+        if task.status == "FAILURE":
+            return "FAILED", {"error": str(task.result)}
+        if task.status == "SUCCESS":
+            # Ran, but its checkpoints are gone: rejected or expired by retention
+            raise HTTPException(status_code=404, detail="Session not found")
+        return ("QUEUED" if task.status == "PENDING" else "RUNNING"), {}
+    if snapshot.next:
+        # Mid-run: the start task (before the review) or the resume task (after it) may have died
+        # in a node, leaving its last checkpoint behind
+        for task_id in (session_id, resume_task_id(session_id)):
+            task = celery_app.AsyncResult(task_id)
+            if task.status == "FAILURE":
+                return "FAILED", {**snapshot.values, "error": str(task.result)}
+        if review_node not in snapshot.next:
+            return "RUNNING", snapshot.values
+        # Still before the review node: waiting, unless an approve already queued the resume
+        if approval_claimed(session_id):
+            return "RUNNING", snapshot.values
+        return "PENDING_APPROVAL", snapshot.values
+    return snapshot.values.get("status", "COMPLETED"), snapshot.values
+
+def approve_session(graph, agent: str, session_id: str, review_node: str, task_name: str, args: tuple):
+    """Queue the resume task once: concurrent approves of one session race on claim_approval."""
+    status, _ = hitl_session(graph, agent, session_id, review_node)
+    if status != "PENDING_APPROVAL":
+        raise HTTPException(status_code=409, detail=f"Session is {status}, not waiting for approval")
+    if not claim_approval(session_id):
+        raise HTTPException(status_code=409, detail="Session was already approved")
+    return dispatch(task_name, args, task_id=resume_task_id(session_id))
 
 # =============================================================================
 # JEFF HITL (Human-in-the-Loop) ENDPOINTS
@@ -194,76 +430,77 @@ class JeffWorkflowRequest(BaseModel):
     min_revenue: int
 
 class JeffApproveRequest(BaseModel):
+    session_id: str
     edited_email: str
 
+class JeffRejectRequest(BaseModel):
+    session_id: str
+
 @app.post("/agents/jeff/start-workflow")
 def jeff_start_workflow(req: JeffWorkflowRequest):
     """
     Step 1: Start Jeff's workflow. He will search for prospects, draft an email, then STOP.
-    Human reviews the email before it's "sent".
-    """
-    initial_state = {
-        "niche": req.niche,
-        "min_revenue": req.min_revenue,
-        "prospect_name": "",
-        "prospect_url": "",
-        "prospect_snippet": "",
-        "email_draft": "",
-        "final_email": "",
-        "status": "START"
+    Returns a session_id right away; poll /agents/jeff/sessions/{session_id}
+    (or stream /tasks/{task_id}/events) until it is PENDING_APPROVAL.
+    """
+    session_id = new_session_id("jeff")
+    task = dispatch("app.worker.jeff_workflow_task", (session_id, req.niche, req.min_revenue), task_id=session_id)
+    return {
+        "agent": "Jeff",
+        "status": "QUEUED",
+        "session_id": session_id,
+        "task_id": task.id,
+        "message": "Jeff is searching and drafting. Check /agents/jeff/sessions/{session_id}"
     }
-    
-    # Run until the interruption point (before send_node)
-    for event in jeff_graph.stream(initial_state, JEFF_THREAD_CONFIG):
-        pass
-    
-    # Fetch the current "Frozen" state
-    current_state = jeff_graph.get_state(JEFF_THREAD_CONFIG).values
-    
+
+@app.get("/agents/jeff/sessions/{session_id}")
+def jeff_session(session_id: str):
+    """Current state of a Jeff review: prospect + draft while PENDING_APPROVAL, final email once SENT."""
+    status, state = hitl_session(get_graph("jeff"), "jeff", session_id, "send_node")
     return {
         "agent": "Jeff",
-        "status": "PENDING_APPROVAL",
+        "session_id": session_id,
+        "status": status,
         "prospect": {
-            "name": current_state.get("prospect_name", ""),
-            "url": current_state.get("prospect_url", ""),
-            "snippet": current_state.get("prospect_snippet", "")
+            "name": state.get("prospect_name", ""),
+            "url": state.get("prospect_url", ""),
+            "snippet": state.get("prospect_snippet", "")
         },
-        "email_draft": current_state.get("email_draft", ""),
-        "message": "Jeff has drafted an email. Review and approve to send."
+        "email_draft": state.get("email_draft", ""),
+        "final_email": state.get("final_email") or state.get("email_draft", ""),
+        "error": state.get("error"),
+        "message": {
+            "PENDING_APPROVAL": "Jeff has drafted an email. Review and approve to send.",
+            "SENT": "Email has been sent!",
+        }.get(status, f"Session is {status}.")
     }
 
 @app.post("/agents/jeff/approve")
 def jeff_approve(req: JeffApproveRequest):
     """
-    Step 2: Human approves (or edits) the email. Resume and "send".
+    Step 2: Human approves (or edits) the email. The worker resumes the graph and "sends".
     """
-    # A. Update the state with the Human's edits
-    jeff_graph.update_state(
-        JEFF_THREAD_CONFIG,
-        {"final_email": req.edited_email}
-    )
-    
-    # B. Resume the graph (triggers send_node)
-    for event in jeff_graph.stream(None, JEFF_THREAD_CONFIG):
-        pass
-    
-    final_state = jeff_graph.get_state(JEFF_THREAD_CONFIG).values
-    
+    task = approve_session(get_graph("jeff"), "jeff", req.session_id, "send_node",
+                           "app.worker.jeff_resume_task", (req.session_id, req.edited_email))
     return {
         "agent": "Jeff",
-        "status": final_state.get("status", "SENT"),
-        "final_email": final_state.get("final_email") or final_state.get("email_draft"),
-        "message": "Email has been sent!"
+        "status": "SENDING",
+        "session_id": req.session_id,
+        "task_id": task.id,
+        "message": "Jeff is sending the approved email."
     }
 
 @app.post("/agents/jeff/reject")
-def jeff_reject():
+def jeff_reject(req: JeffRejectRequest):
     """
-    Human rejects the email. Reset the workflow.
+    Human rejects the email. The session's checkpoints are deleted.
     """
+    hitl_session(get_graph("jeff"), "jeff", req.session_id, "send_node")
+    get_checkpointer().delete_thread(req.session_id)
     return {
         "agent": "Jeff",
         "status": "REJECTED",
+        "session_id": req.session_id,
         "message": "Email draft was rejected. Start a new campaign when ready."
     }
 
@@ -276,69 +513,71 @@ class SueWorkflowRequest(BaseModel):
     order_status: str
 
 class SueApproveRequest(BaseModel):
+    session_id: str
     edited_reply: str
 
+class SueRejectRequest(BaseModel):
+    session_id: str
+
 @app.post("/agents/sue/start-workflow")
 def sue_start_workflow(req: SueWorkflowRequest):
     """
     Step 1: Start Sue's workflow. She retrieves policy, drafts a reply, then STOPS.
-    Human reviews the reply before it's "published".
-    """
-    initial_state = {
-        "ticket_text": req.ticket_text,
-        "order_status": req.order_status,
-        "policy_retrieved": "",
-        "draft_reply": "",
-        "final_reply": "",
-        "status": "START"
+    Returns a session_id right away; poll /agents/sue/sessions/{session_id}.
+    """
+    session_id = new_session_id("sue")
+    task = dispatch("app.worker.sue_workflow_task", (session_id, req.ticket_text, req.order_status), task_id=session_id)
+    return {
+        "agent": "Sue",
+        "status": "QUEUED",
+        "session_id": session_id,
+        "task_id": task.id,
+        "message": "Sue is retrieving policy and drafting. Check /agents/sue/sessions/{session_id}"
     }
-    
-    # Run until the interruption point (before publish_node)
-    for event in sue_graph.stream(initial_state, SUE_THREAD_CONFIG):
-        pass
-    
-    # Fetch the current "Frozen" state
-    current_state = sue_graph.get_state(SUE_THREAD_CONFIG).values
-    
+
+@app.get("/agents/sue/sessions/{session_id}")
+def sue_session(session_id: str):
+    """Current state of a Sue review: policy + draft while PENDING_APPROVAL, final reply once PUBLISHED."""
+    status, state = hitl_session(get_graph("sue"), "sue", session_id, "publish_node")
     return {
         "agent": "Sue",
-        "status": "PENDING_APPROVAL",
-        "policy_retrieved": current_state.get("policy_retrieved", ""),
-        "draft_reply": current_state.get("draft_reply", ""),
-        "message": "Sue has drafted a reply. Review and approve to publish."
+        "session_id": session_id,
+        "status": status,
+        "policy_retrieved": state.get("policy_retrieved", ""),
+        "draft_reply": state.get("draft_reply", ""),
+        "final_reply": state.get("final_reply") or state.get("draft_reply", ""),
+        "error": state.get("error"),
+        "message": {
+            "PENDING_APPROVAL": "Sue has drafted a reply. Review and approve to publish.",
+            "PUBLISHED": "Reply has been published to Amazon!",
+        }.get(status, f"Session is {status}.")
     }
 
 @app.post("/agents/sue/approve")
 def sue_approve(req: SueApproveRequest):
     """
-    Step 2: Human approves (or edits) the reply. Resume and "publish".
+    Step 2: Human approves (or edits) the reply. The worker resumes the graph and "publishes".
     """
-    # A. Update the state with the Human's edits
-    sue_graph.update_state(
-        SUE_THREAD_CONFIG,
-        {"final_reply": req.edited_reply}
-    )
-    
-    # B. Resume the graph (triggers publish_node)
-    for event in sue_graph.stream(None, SUE_THREAD_CONFIG):
-        pass
-    
-    final_state = sue_graph.get_state(SUE_THREAD_CONFIG).values
-    
+    task = approve_session(get_graph("sue"), "sue", req.session_id, "publish_node",
+                           "app.worker.sue_resume_task", (req.session_id, req.edited_reply))
     return {
         "agent": "Sue",
-        "status": final_state.get("status", "PUBLISHED"),
-        "final_reply": final_state.get("final_reply") or final_state.get("draft_reply"),
-        "message": "Reply has been published to Amazon!"
+        "status": "PUBLISHING",
+        "session_id": req.session_id,
+        "task_id": task.id,
+        "message": "Sue is publishing the approved reply."
     }
 
 @app.post("/agents/sue/reject")
-def sue_reject():
+def sue_reject(req: SueRejectRequest):
     """
-    Human rejects the reply. Reset the workflow.
+    Human rejects the reply. The session's checkpoints are deleted.
     """
+    hitl_session(get_graph("sue"), "sue", req.session_id, "publish_node")
+    get_checkpointer().delete_thread(req.session_id)
     return {
         "agent": "Sue",
         "status": "REJECTED",
+        "session_id": req.session_id,
         "message": "Reply draft was rejected. Handle a new ticket when ready."
-    }
\ No newline at end of file
+    }
@@ -1,60 +1,34 @@
-import time
+from concurrent.futures import ThreadPoolExecutor
 from app.core.celery_app import celery_app
-from app.core.mock_db import MOCK_SELLERS, MOCK_INVENTORY
+from app.core.db import db_cursor, PoolTimeout
+from app.core.llm import llm  # <--- Shared, rate-limited LLM gateway
+from app.core.progress import publish_progress  # <--- Also wires Celery state events
+from app.core import metrics  # <--- Task durations + per-stage traces (spans live in the shared helpers)
+from app.core.checkpoint import session_config
 from dotenv import load_dotenv
-from openai import OpenAI
 import os
-from duckduckgo_search import DDGS  # <--- The Search Engine
 import psycopg2
-import requests
-from bs4 import BeautifulSoup
+from psycopg2.extras import Json
+from app.agents.registry import get_graph
+# Agent modules (duckduckgo_search, httpx, numpy, langgraph) are imported by the tasks
+# that use them: a worker only pays for the agents on the queues it consumes
 
-# Load API Key
 load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 # --- JEFF'S TASK (The Sales Agent) ---
-def find_real_prospect(niche: str):
-    """
-    Searches DuckDuckGo for a real company selling this product.
-    Returns: Name, URL, and a snippet of text about them.
-    """
-    print(f"--- JEFF: Searching DuckDuckGo for '{niche}' brands... ---")
-    with DDGS() as ddgs:
-        # Search for real brands in this niche (without site restriction)
-        query = f"best {niche} brand company"
-        results = list(ddgs.text(query, max_results=5))
-    
-    if results:
-        # Find first result with a real company name
-        for hit in results:
-            title = hit.get('title', '')
-            # Skip generic articles
-            if any(skip in title.lower() for skip in ['best', 'top 10', 'review', 'vs']):
-                continue
-            return {
-                "name": title.split(' - ')[0].split(' | ')[0][:50],  # Clean up title
-                "url": hit['href'],
-                "snippet": hit['body'][:200]
-            }
-        # Use first result if no better match
-        top_hit = results[0]
-        return {
-            "name": top_hit['title'].split(' - ')[0][:50],
-            "url": top_hit['href'],
-            "snippet": top_hit['body'][:200]
-        }
-    else:
-        return {"name": "Generic Brand", "url": "N/A", "snippet": "No data found"}
-
 @celery_app.task(name="app.worker.jeff_task")
 def jeff_task(niche: str, min_revenue: int):
+    from app.agents.jeff import find_seller_prospect, find_real_prospect
     
-    # 1. REAL SEARCH (The Eyes)
-    prospect = find_real_prospect(niche)
+    # 1. SELLER DATABASE first (indexed by niche + revenue), web search only as a fallback
+    publish_progress("searching", {"niche": niche, "min_revenue": min_revenue})
+    # (DuckDuckGo results carry no revenue, so min_revenue cannot be applied to them)
+    prospect = find_seller_prospect(niche, min_revenue) or find_real_prospect(niche)
+    publish_progress("search_done", {"prospect": prospect["name"], "url": prospect["url"]})
     
     # 2. REAL THINKING (The Brain)
     print(f"--- JEFF: Found {prospect['name']}. Writing email... ---")
+    publish_progress("drafting", {"prospect": prospect["name"]})
     
     prompt = f"""
     You are a sales expert. Write a cold email to the brand "{prospect['name']}".
@@ -66,21 +40,38 @@ def jeff_task(niche: str, min_revenue: int):
     """
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini", # or gpt-3.5-turbo
-            messages=[{"role": "user", "content": prompt}]
-        )
-        email_content = response.choices[0].message.content
+        email_content = llm.complete(prompt, model="gpt-4o-mini", agent="jeff")
     except Exception as e:
         email_content = f"Error: {str(e)}"
 
+    leads = [f"Brand: {prospect['name']}", f"URL: {prospect['url']}"]
+    if "revenue" in prospect:
+        leads.append(f"Revenue: ${prospect['revenue']:,} ({prospect['email']})")
+    leads.append(f"Email Draft: {email_content}")
+
     return {
         "status": "COMPLETED",
-        "leads": [
-            f"Brand: {prospect['name']}",
-            f"URL: {prospect['url']}",
-            f"Email Draft: {email_content}"
-        ]
+        "leads": leads
+    }
+
+# --- JEFF BATCH PROSPECTING (many niches, no emails) ---
+@celery_app.task(name="app.worker.jeff_batch_task")
+def jeff_batch_task(niches: list, min_revenue: int = 0, per_niche: int = 3):
+    from app.agents.jeff import prospect_batch
+    print(f"--- JEFF: Prospecting {len(niches)} niches ({per_niche} each) ---")
+    publish_progress("searching", {"niches": len(niches), "per_niche": per_niche})
+
+    # Seller DB + concurrent, cached, rate-limited web searches; deduped by domain
+    prospects = prospect_batch(niches, min_revenue, per_niche)
+
+    return {
+        "status": "COMPLETED",
+        "summary": {
+            "niches": len(prospects),
+            "prospects": sum(len(found) for found in prospects.values()),
+            "unfilled_niches": [niche for niche, found in prospects.items() if len(found) < per_niche]
+        },
+        "prospects": prospects
     }
 
 # --- AGENT 2: PENNY (Pricing & Profit) ---
@@ -103,6 +94,7 @@ def penny_task(product: str, price: float, cost: float, competitor_price: float)
         flags.append(f"Competitor is ${diff:.2f} cheaper")
 
     # 3. STRATEGIC THINKING (LLM)
+    publish_progress("drafting", {"margin": f"{margin:.1f}%", "flags": flags})
     prompt = f"""
     You are Penny, a ruthless Profit Analyst. 
     Product: {product}. 
@@ -117,11 +109,7 @@ def penny_task(product: str, price: float, cost: float, competitor_price: float)
     """
     
     try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}]
-        )
-        strategy = response.choices[0].message.content
+        strategy = llm.complete(prompt, model="gpt-3.5-turbo", agent="penny")
     except Exception as e:
         strategy = f"Error generating strategy: {str(e)}"
 
@@ -136,33 +124,15 @@ def penny_task(product: str, price: float, cost: float, competitor_price: float)
 
 # --- HELPER: RAG RETRIEVAL ---
 def get_relevant_policy(query_text: str):
+    from app.core.vector_index import retrieve_policies
     try:
-        # 1. Embed the user's query
-        response = client.embeddings.create(
-            input=query_text,
-            model="text-embedding-3-small"
-        )
-        query_embedding = response.data[0].embedding
-
-        # 2. Search DB for "Nearest Neighbor"
-        # Connect to 'db' (service name) because this runs INSIDE Docker
-        conn = psycopg2.connect(
-            host="db", database="agency_os", user="admin", password="admin"
-        )
-        cur = conn.cursor()
-        
-        # The <=> operator finds the closest vector (cosine similarity)
-        cur.execute("""
-            SELECT text FROM policies 
-            ORDER BY embedding <=> %s::vector 
-            LIMIT 1;
-        """, (query_embedding,))
-        
-        result = cur.fetchone()
-        conn.close()
+        # 1. Embed the user's query (cached by content hash)
+        # 2. Search DB for "Nearest Neighbor" through the ANN index
+        #    (falls back to an in-process index over the mock SOPs without pgvector)
+        matches = retrieve_policies(query_text, k=1)
         
-        if result:
-            return result[0]
+        if matches:
+            return matches[0]["text"]
         return "No specific policy found."
         
     except Exception as e:
@@ -175,8 +145,10 @@ def sue_task(ticket_text: str, order_status: str):
     print(f"--- SUE: Handling Ticket. Status: {order_status} ---")
     
     # 1. RETRIEVE KNOWLEDGE (RAG)
+    publish_progress("retrieving_policy")
     policy_context = get_relevant_policy(ticket_text)
     print(f"--- SUE: Found Policy -> '{policy_context}' ---")
+    publish_progress("policy_retrieved", {"policy": policy_context[:120]})
 
     # 2. GENERATE ANSWER (LLM)
     prompt = f"""
@@ -194,11 +166,7 @@ def sue_task(ticket_text: str, order_status: str):
     """
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}]
-        )
-        reply = response.choices[0].message.content
+        reply = llm.complete(prompt, model="gpt-3.5-turbo", agent="sue")
     except Exception as e:
         reply = "System Error."
 
@@ -211,44 +179,16 @@ def sue_task(ticket_text: str, order_status: str):
     }
 
 # --- AGENT 4: ADAM (Advertising Manager) ---
-@celery_app.task(name="app.worker.adam_task")
-def adam_task(campaign_name: str):
-    print(f"--- ADAM: Analyzing Campaign '{campaign_name}' ---")
-    
-    # 1. FETCH DATA (The Analytics DB)
-    conn = psycopg2.connect(
-        host="db", database="agency_os", user="admin", password="admin"
-    )
-    cur = conn.cursor()
-    
-    # Get last 7 days metrics
-    cur.execute("""
-        SELECT SUM(spend), SUM(sales), SUM(clicks) 
-        FROM ad_metrics 
-        WHERE campaign_name = %s 
-        AND date > NOW() - INTERVAL '7 days';
-    """, (campaign_name,))
-    
-    row = cur.fetchone()
-    conn.close()
-    
-    if not row or row[0] is None:
-        return {"status": "FAILED", "error": "No data found for this campaign."}
+ADAM_LLM_CONCURRENCY = int(os.getenv("ADAM_LLM_CONCURRENCY", "8"))
 
-    total_spend, total_sales, total_clicks = row
-    # Handle Division by Zero
-    acos = (total_spend / total_sales * 100) if total_sales > 0 else 0
-    roas = (total_sales / total_spend) if total_spend > 0 else 0
-    cpc = (total_spend / total_clicks) if total_clicks > 0 else 0
-
-    # 2. DECISION LOGIC (The Brain)
-    action = "HOLD"
+def adam_decision(acos: float, roas: float) -> str:
     if acos > 40:
-        action = "DECREASE BID (High ACOS)"
+        return "DECREASE BID (High ACOS)"
     elif roas > 4:
-        action = "INCREASE BID (High ROAS)"
-    
-    # 3. REPORT GENERATION (LLM)
+        return "INCREASE BID (High ROAS)"
+    return "HOLD"
+
+def adam_reasoning(campaign_name, total_spend, total_sales, acos, roas, action) -> str:
     prompt = f"""
     You are Adam, a PPC Ad Manager.
     Campaign: "{campaign_name}"
@@ -263,13 +203,42 @@ def adam_task(campaign_name: str):
     """
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}]
-        )
-        reasoning = response.choices[0].message.content
+        return llm.complete(prompt, model="gpt-3.5-turbo", agent="adam")
     except:
-        reasoning = "Analysis complete."
+        return "Analysis complete."
+
+@celery_app.task(name="app.worker.adam_task")
+def adam_task(campaign_name: str):
+    print(f"--- ADAM: Analyzing Campaign '{campaign_name}' ---")
+    publish_progress("querying_metrics", {"campaign": campaign_name})
+    
+    # 1. FETCH DATA (The Analytics DB)
+    with db_cursor() as cur:
+        # Get last 7 days metrics (from the daily rollup: at most 7 rows, however long the history)
+        cur.execute("""
+            SELECT SUM(spend), SUM(sales), SUM(clicks) 
+            FROM ad_metrics_daily 
+            WHERE campaign_name = %s 
+            AND date > NOW() - INTERVAL '7 days';
+        """, (campaign_name,))
+        
+        row = cur.fetchone()
+    
+    if not row or row[0] is None:
+        return {"status": "FAILED", "error": "No data found for this campaign."}
+
+    total_spend, total_sales, total_clicks = row
+    # Handle Division by Zero
+    acos = (total_spend / total_sales * 100) if total_sales > 0 else 0
+    roas = (total_sales / total_spend) if total_spend > 0 else 0
+    cpc = (total_spend / total_clicks) if total_clicks > 0 else 0
+
+    # 2. DECISION LOGIC (The Brain)
+    action = adam_decision(acos, roas)
+    
+    # 3. REPORT GENERATION (LLM)
+    publish_progress("drafting", {"decision": action})
+    reasoning = adam_reasoning(campaign_name, total_spend, total_sales, acos, roas, action)
 
     return {
         "status": "COMPLETED",
@@ -282,19 +251,87 @@ def adam_task(campaign_name: str):
         }
     }
 
+# --- AGENT 4b: ADAM PORTFOLIO (every campaign in one pass) ---
+@celery_app.task(name="app.worker.adam_portfolio_task")
+def adam_portfolio_task():
+    print("--- ADAM: Analyzing full campaign portfolio ---")
+    publish_progress("querying_metrics")
+
+    # 1. ONE GROUPED QUERY for the whole account
+    # (reads the daily rollup, whose (campaign_name, date) primary key keeps it sorted by campaign)
+    with db_cursor() as cur:
+        cur.execute("""
+            SELECT campaign_name, SUM(spend), SUM(sales), SUM(clicks)
+            FROM ad_metrics_daily
+            WHERE date > NOW() - INTERVAL '7 days'
+            GROUP BY campaign_name
+            ORDER BY campaign_name;
+        """)
+        rows = cur.fetchall()
+
+    if not rows:
+        return {"status": "FAILED", "error": "No campaign data found for the last 7 days."}
+
+    # 2. DECISION LOGIC for every campaign (pure math, no I/O)
+    campaigns = []
+    for campaign_name, total_spend, total_sales, total_clicks in rows:
+        acos = (total_spend / total_sales * 100) if total_sales > 0 else 0
+        roas = (total_sales / total_spend) if total_spend > 0 else 0
+        campaigns.append({
+            "campaign_name": campaign_name,
+            "spend": total_spend,
+            "sales": total_sales,
+            "clicks": total_clicks,
+            "acos": acos,
+            "roas": roas,
+            "decision": adam_decision(acos, roas),
+            "reasoning": None
+        })
+
+    # 3. LLM only where we actually change a bid - HOLDs need no explanation
+    actionable = [c for c in campaigns if c["decision"] != "HOLD"]
+    publish_progress("drafting", {"campaigns": len(campaigns), "actions": len(actionable)})
+    if actionable:
+        with ThreadPoolExecutor(max_workers=min(ADAM_LLM_CONCURRENCY, len(actionable))) as pool:
+            reasons = pool.map(
+                lambda c: adam_reasoning(c["campaign_name"], c["spend"], c["sales"], c["acos"], c["roas"], c["decision"]),
+                actionable
+            )
+            for campaign, reasoning in zip(actionable, reasons):
+                campaign["reasoning"] = reasoning
+
+    return {
+        "status": "COMPLETED",
+        "summary": {
+            "campaigns": len(campaigns),
+            "actions": len(actionable),
+            "holds": len(campaigns) - len(actionable)
+        },
+        "report": [
+            {
+                "campaign": c["campaign_name"],
+                "spend": f"${c['spend']:.2f}",
+                "sales": f"${c['sales']:.2f}",
+                "clicks": int(c["clicks"] or 0),
+                "acos": f"{c['acos']:.1f}%",
+                "roas": f"{c['roas']:.2f}x",
+                "decision": c["decision"],
+                "reasoning": c["reasoning"]
+            }
+            for c in campaigns
+        ]
+    }
+
 # --- AGENT 5: IVAN (Inventory Manager) ---
 @celery_app.task(name="app.worker.ivan_task")
 def ivan_task(sku: str):
     print(f"--- IVAN: Checking Stock for SKU: {sku} ---")
+    publish_progress("checking_stock", {"sku": sku})
     
     # 1. CHECK DB
-    conn = psycopg2.connect(
-        host="db", database="agency_os", user="admin", password="admin"
-    )
-    cur = conn.cursor()
-    cur.execute("SELECT product_name, current_stock, reorder_point, reorder_qty, supplier_email, unit_cost FROM inventory WHERE sku = %s", (sku,))
-    row = cur.fetchone()
-    conn.close()
+    with db_cursor() as cur:
+        cur.execute("SELECT product_name, current_stock, reorder_point, reorder_qty, supplier_email, unit_cost FROM inventory WHERE sku = %s", (sku,))
+        row = cur.fetchone()
 
     if not row:
         return {"status": "FAILED", "error": "SKU not found."}
@@ -312,6 +349,7 @@ def ivan_task(sku: str):
     # 3. ACTION: DRAFT PO (Low Stock)
     total_cost = qty * float(cost)
     print(f"--- IVAN: LOW STOCK! Drafting PO for {qty} units ---")
+    publish_progress("drafting", {"order_qty": qty})
 
     prompt = f"""
     You are Ivan, an Inventory Manager.
@@ -327,11 +365,7 @@ def ivan_task(sku: str):
     """
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}]
-        )
-        email_draft = response.choices[0].message.content
+        email_draft = llm.complete(prompt, model="gpt-3.5-turbo", agent="ivan")
     except Exception as e:
         email_draft = "Error drafting email."
 
@@ -349,65 +383,185 @@ def ivan_task(sku: str):
         }
     }
 
+# --- AGENT 5b: IVAN REORDER SWEEP (whole catalog, one PO per supplier) ---
+IVAN_LLM_CONCURRENCY = int(os.getenv("IVAN_LLM_CONCURRENCY", "8"))
+
+def draft_supplier_po(supplier_email: str, lines: list) -> str:
+    """One consolidated Purchase Order email covering every low-stock SKU of a supplier."""
+    order_lines = "\n".join(
+        f"    - {line['product']} (SKU: {line['sku']}): {line['order_qty']} units @ ${line['unit_cost']:.2f} = ${line['line_total']:.2f}"
+        for line in lines
+    )
+    po_total = sum(line["line_total"] for line in lines)
+
+    prompt = f"""
+    You are Ivan, an Inventory Manager.
+    Write ONE formal Purchase Order email to supplier "{supplier_email}" covering all lines below.
+    
+    Order Lines:
+{order_lines}
+    - Total PO Value: ${po_total:.2f}
+    
+    Request confirmation of the shipping date. Keep it professional.
+    """
+
+    try:
+        return llm.complete(prompt, model="gpt-3.5-turbo", agent="ivan")
+    except Exception as e:
+        return "Error drafting email."
+
+@celery_app.task(name="app.worker.ivan_sweep_task")
+def ivan_sweep_task():
+    print("--- IVAN: Sweeping catalog for low stock ---")
+    publish_progress("checking_stock")
+
+    # 1. ONE QUERY for every SKU below its reorder point
+    # (partial index inventory_low_stock_idx only holds these rows, ordered by supplier)
+    with db_cursor() as cur:
+        cur.execute("""
+            SELECT sku, product_name, current_stock, reorder_point, reorder_qty, supplier_email, unit_cost
+            FROM inventory
+            WHERE current_stock < reorder_point
+            ORDER BY supplier_email, sku;
+        """)
+        rows = cur.fetchall()
+
+    if not rows:
+        return {"status": "COMPLETED", "decision": "STOCK HEALTHY", "purchase_orders": []}
+
+    # 2. GROUP BY SUPPLIER
+    by_supplier = {}
+    for sku, name, stock, point, qty, email, cost in rows:
+        by_supplier.setdefault(email, []).append({
+            "sku": sku,
+            "product": name,
+            "stock_level": f"CRITICAL ({stock} left)",
+            "order_qty": qty,
+            "unit_cost": float(cost),
+            "line_total": qty * float(cost)
+        })
+    print(f"--- IVAN: {len(rows)} SKUs low across {len(by_supplier)} suppliers. Drafting POs ---")
+    publish_progress("drafting", {"skus": len(rows), "suppliers": len(by_supplier)})
+
+    # 3. ACTION: one consolidated PO (and one LLM call) per supplier
+    suppliers = list(by_supplier.items())
+    with ThreadPoolExecutor(max_workers=min(IVAN_LLM_CONCURRENCY, len(suppliers))) as pool:
+        drafts = list(pool.map(lambda item: draft_supplier_po(*item), suppliers))
+
+    return {
+        "status": "COMPLETED",
+        "decision": "REORDER TRIGGERED",
+        "summary": {
+            "skus_to_reorder": len(rows),
+            "suppliers": len(suppliers),
+            "total_cost": f"${sum(l['line_total'] for _, lines in suppliers for l in lines):.2f}"
+        },
+        "purchase_orders": [
+            {
+                "supplier": email,
+                "lines": [
+                    {**line, "unit_cost": f"${line['unit_cost']:.2f}", "line_total": f"${line['line_total']:.2f}"}
+                    for line in lines
+                ],
+                "total_cost": f"${sum(line['line_total'] for line in lines):.2f}",
+                "email_draft": draft
+            }
+            for (email, lines), draft in zip(suppliers, drafts)
+        ]
+    }
+
 # --- AGENT 6: LISA (SEO Specialist) ---
+def load_seo_audit(url: str, keyword: str):
+    """Last stored audit for (url, keyword), or None. Persistence is best effort."""
+    try:
+        with db_cursor() as cur:
+            cur.execute("""
+                SELECT etag, last_modified, content_hash, audit, audited_at
+                FROM seo_audits WHERE url = %s AND keyword = %s;
+            """, (url, keyword))
+            row = cur.fetchone()
+    except (psycopg2.Error, PoolTimeout) as e:
+        print(f"LISA: audit history unavailable ({e}). Running a full audit.")
+        return None
+    if not row:
+        return None
+    etag, last_modified, content_hash, audit, audited_at = row
+    return {"etag": etag, "last_modified": last_modified, "content_hash": content_hash,
+            "audit": audit, "audited_at": audited_at.isoformat()}
+
+
+def save_seo_audit(url: str, keyword: str, fetched: dict, audit: dict = None):
+    """Upsert a fresh audit, or (audit=None) just refresh validators + checked_at of an unchanged page."""
+    try:
+        with db_cursor(commit=True) as cur:
+            if audit is None:
+                cur.execute("""
+                    UPDATE seo_audits
+                    SET etag = %s, last_modified = %s, checked_at = NOW()
+                    WHERE url = %s AND keyword = %s;
+                """, (fetched["etag"], fetched["last_modified"], url, keyword))
+            else:
+                cur.execute("""
+                    INSERT INTO seo_audits (url, keyword, etag, last_modified, content_hash, audit)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                    ON CONFLICT (url, keyword) DO UPDATE SET
+                        etag = EXCLUDED.etag,
+                        last_modified = EXCLUDED.last_modified,
+                        content_hash = EXCLUDED.content_hash,
+                        audit = EXCLUDED.audit,
+                        audited_at = NOW(),
+                        checked_at = NOW();
+                """, (url, keyword, fetched["etag"], fetched["last_modified"],
+                      fetched["content_hash"], Json(audit)))
+    except (psycopg2.Error, PoolTimeout) as e:
+        print(f"LISA: could not store audit ({e}).")
+
+
 @celery_app.task(name="app.worker.lisa_task")
 def lisa_task(url: str, target_keyword: str):
+    from app.agents.lisa import fetch_page, analyze_chunks, score_page, diff_audits
     print(f"--- LISA: Auditing {url} for '{target_keyword}' ---")
+    previous = load_seo_audit(url, target_keyword)
     
-    # 1. FETCH CONTENT (The Eyes)
-    headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
+    # 1. FETCH CONTENT (The Eyes) - conditional GET against the last audit, capped at LISA_MAX_BYTES
+    publish_progress("fetching", {"url": url, "conditional": previous is not None})
     try:
-        response = requests.get(url, headers=headers, timeout=10)
-        if response.status_code != 200:
-            return {"status": "FAILED", "error": f"Site returned status {response.status_code}"}
+        fetched = fetch_page(
+            url,
+            etag=previous["etag"] if previous else None,
+            last_modified=previous["last_modified"] if previous else None,
+        )
     except Exception as e:
         return {"status": "FAILED", "error": f"Could not connect: {str(e)}"}
 
-    # 2. PARSE HTML (The Analysis)
-    soup = BeautifulSoup(response.content, 'html.parser')
-    text_content = soup.get_text(" ", strip=True)
-    word_count = len(text_content.split())
-    
-    # Extract specific tags
-    title_tag = soup.title.string if soup.title else None
-    h1_tag = soup.find('h1').get_text(strip=True) if soup.find('h1') else None
-    meta_desc = soup.find('meta', attrs={'name': 'description'})
-    meta_content = meta_desc['content'] if meta_desc else None
+    # Unchanged page (304, or same bytes from a server without validators): skip parse + LLM
+    if previous and (fetched["status_code"] == 304 or
+                     (fetched["status_code"] == 200 and fetched["content_hash"] == previous["content_hash"])):
+        publish_progress("unchanged", {"since": previous["audited_at"]})
+        save_seo_audit(url, target_keyword, fetched)
+        return {
+            "status": "COMPLETED",
+            "changed": False,
+            "audited_at": previous["audited_at"],
+            "audit": previous["audit"],
+        }
+    if fetched["status_code"] != 200:
+        return {"status": "FAILED", "error": f"Site returned status {fetched['status_code']}"}
 
-    # 3. CALCULATE METRICS (Hard Logic)
-    keyword_count = text_content.lower().count(target_keyword.lower())
-    density = (keyword_count / word_count * 100) if word_count > 0 else 0
-    
-    issues = []
-    score = 100
+    # 2. PARSE HTML (The Analysis) - single streaming pass over the downloaded chunks
+    publish_progress("parsing", {"bytes": fetched["bytes"], "truncated": fetched["truncated"]})
+    page = analyze_chunks(fetched["chunks"], target_keyword, encoding=fetched["encoding"])
+    text_content = page["preview"]
+    word_count = page["word_count"]
+    title_tag = page["title"]
+    h1_tag = page["h1"]
 
-    # Edge Case: Thin Content
-    if word_count < 300:
-        issues.append("CRITICAL: Thin content (< 300 words). Google will ignore this.")
-        score -= 30
-    
-    # Edge Case: Missing H1
-    if not h1_tag:
-        issues.append("ERROR: Missing H1 Tag.")
-        score -= 20
-    
-    # Edge Case: Keyword Stuffing
-    if density > 3.5:
-        issues.append(f"WARNING: Keyword Stuffing detected ({density:.2f}% density). Aim for 1-2%.")
-        score -= 15
-    elif density == 0:
-        issues.append(f"MISSING: Target keyword '{target_keyword}' not found in text.")
-        score -= 20
-
-    # Edge Case: Title optimization
-    if not title_tag:
-        issues.append("ERROR: Missing Page Title.")
-        score -= 20
-    elif len(title_tag) > 60:
-        issues.append("WARNING: Title is too long (truncated in search results).")
-        score -= 5
+    # 3. CALCULATE METRICS (Hard Logic)
+    result = score_page(page, target_keyword)
+    density, issues, score = result["density"], result["issues"], result["score"]
 
     # 4. AI STRATEGY (The Brain)
+    publish_progress("drafting", {"score": max(0, score), "issues": len(issues)})
     prompt = f"""
     You are Lisa, a Senior SEO Strategist. 
     Audit this content summary for the keyword: "{target_keyword}".
@@ -422,26 +576,143 @@ def lisa_task(url: str, target_keyword: str):
     Focus on semantic relevance and user intent. 
     """
 
+    recommendations_ok = True
     try:
-        llm_res = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}]
-        )
-        recommendations = llm_res.choices[0].message.content
+        recommendations = llm.complete(prompt, model="gpt-3.5-turbo", agent="lisa")
     except:
         recommendations = "Could not generate AI recommendations."
+        recommendations_ok = False
+
+    audit = {
+        "url": url,
+        "score": max(0, score),
+        "metrics": {
+            "word_count": word_count,
+            "density": f"{density:.2f}%",
+            "h1_found": bool(h1_tag)
+        },
+        "truncated": fetched["truncated"],
+        "issues": issues,
+        "recommendations": recommendations
+    }
+    # Don't persist a failed LLM call - the next run should retry it instead of reusing the fallback text
+    if recommendations_ok:
+        save_seo_audit(url, target_keyword, fetched, audit)
 
     return {
         "status": "COMPLETED",
-        "audit": {
-            "url": url,
-            "score": max(0, score),
-            "metrics": {
-                "word_count": word_count,
-                "density": f"{density:.2f}%",
-                "h1_found": bool(h1_tag)
-            },
-            "issues": issues,
-            "recommendations": recommendations
-        }
-    }
\ No newline at end of file
+        "changed": True,
+        "audit": audit,
+        "diff": diff_audits(previous["audit"], audit) if previous else None,
+    }
+
+# --- AGENT 6b: LISA SITE AUDIT (whole storefront) ---
+@celery_app.task(name="app.worker.lisa_site_audit_task")
+def lisa_site_audit_task(seed_url: str, target_keyword: str, max_pages: int = 50):
+    from app.agents.lisa import crawl_site
+    print(f"--- LISA: Crawling {seed_url} (up to {max_pages} pages) for '{target_keyword}' ---")
+    publish_progress("crawling", {"seed_url": seed_url, "max_pages": max_pages})
+
+    # 1. CRAWL + SCORE every page concurrently (pooled async client, per-host limits)
+    # On the gateway's event loop: asyncio.run() fails under gevent once that loop is running
+    report = llm.run(crawl_site(seed_url, target_keyword, max_pages=max_pages))
+    summary = report["summary"]
+    print(f"--- LISA: Audited {summary['pages_audited']} pages in {summary['crawl_seconds']}s ---")
+
+    # 2. ONE AI STRATEGY for the whole site (not one per page)
+    publish_progress("drafting", {"pages_audited": summary["pages_audited"]})
+    worst = "\n".join(f"    - {p['url']} (score {p['score']}): {'; '.join(p['issues'])}" for p in report["worst_pages"])
+    prompt = f"""
+    You are Lisa, a Senior SEO Strategist.
+    Site audit for the keyword: "{target_keyword}" ({summary['pages_audited']} pages, average score {summary['average_score']}).
+    
+    Most common issues: {summary['top_issues']}
+    Weakest pages:
+{worst}
+    
+    Provide 3 actionable, site-wide recommendations to improve ranking.
+    """
+
+    try:
+        report["recommendations"] = llm.complete(prompt, model="gpt-3.5-turbo", agent="lisa")
+    except:
+        report["recommendations"] = "Could not generate AI recommendations."
+
+    return {"status": "COMPLETED", "site_audit": report}
+
+# --- HITL WORKFLOWS (Jeff & Sue LangGraphs, run here instead of inside the API request) ---
+# The graphs are imported inside the tasks so every worker process opens its own
+# checkpointer connection after the fork. State lives in the shared checkpointer,
+# keyed by session id, where the API reads it for review.
+def already_resumed(graph, session_id: str, review_node: str):
+    """Status of a session whose review is behind it (redelivered resume), else None."""
+    snapshot = graph.get_state(session_config(session_id))
+    if review_node in snapshot.next:
+        return None
+    return "RUNNING" if snapshot.next else snapshot.values.get("status", "COMPLETED")
+
+def run_graph(graph, state, session_id: str) -> str:
+    """Stream the graph to its next interrupt (or the end). Returns the session status."""
+    config = session_config(session_id)
+    for event in graph.stream(state, config):
+        for node in event:
+            publish_progress("node_done", {"node": node})
+    snapshot = graph.get_state(config)
+    return "PENDING_APPROVAL" if snapshot.next else snapshot.values.get("status", "COMPLETED")
+
+@celery_app.task(name="app.worker.jeff_workflow_task")
+def jeff_workflow_task(session_id: str, niche: str, min_revenue: int):
+    jeff_graph = get_graph("jeff")
+
+    print(f"--- JEFF: Workflow {session_id} for '{niche}' ---")
+    initial_state = {
+        "niche": niche,
+        "min_revenue": min_revenue,
+        "prospect_name": "",
+        "prospect_url": "",
+        "prospect_snippet": "",
+        "email_draft": "",
+        "final_email": "",
+        "status": "START"
+    }
+    # Runs until the interruption point (before send_node)
+    return {"session_id": session_id, "status": run_graph(jeff_graph, initial_state, session_id)}
+
+@celery_app.task(name="app.worker.jeff_resume_task")
+def jeff_resume_task(session_id: str, edited_email: str):
+    jeff_graph = get_graph("jeff")
+    # The API approves a session once; a second delivery must not send again
+    status = already_resumed(jeff_graph, session_id, "send_node")
+    if status is not None:
+        return {"session_id": session_id, "status": status}
+
+    # Human's edits go into the frozen state, then send_node runs
+    jeff_graph.update_state(session_config(session_id), {"final_email": edited_email})
+    return {"session_id": session_id, "status": run_graph(jeff_graph, None, session_id)}
+
+@celery_app.task(name="app.worker.sue_workflow_task")
+def sue_workflow_task(session_id: str, ticket_text: str, order_status: str):
+    sue_graph = get_graph("sue")
+
+    print(f"--- SUE: Workflow {session_id}. Status: {order_status} ---")
+    initial_state = {
+        "ticket_text": ticket_text,
+        "order_status": order_status,
+        "policy_retrieved": "",
+        "draft_reply": "",
+        "final_reply": "",
+        "status": "START"
+    }
+    # Runs until the interruption point (before publish_node)
+    return {"session_id": session_id, "status": run_graph(sue_graph, initial_state, session_id)}
+
+@celery_app.task(name="app.worker.sue_resume_task")
+def sue_resume_task(session_id: str, edited_reply: str):
+    sue_graph = get_graph("sue")
+    # The API approves a session once; a second delivery must not publish again
+    status = already_resumed(sue_graph, session_id, "publish_node")
+    if status is not None:
+        return {"session_id": session_id, "status": status}
+
+    sue_graph.update_state(session_config(session_id), {"final_reply": edited_reply})
+    return {"session_id": session_id, "status": run_graph(sue_graph, None, session_id)}
@@ -0,0 +1,288 @@
+"""
+End-to-end benchmark of the six agent tasks (jeff, penny, sue, adam, ivan, lisa)
+against the deterministic stand-ins in benchmarks/fakes.py - no OpenAI,
+DuckDuckGo or real storefront needed. Tasks are called in-process (plain
+function calls, no broker), so what gets measured is the agent code plus the
+configured fake latencies.
+
+Per agent it reports end-to-end latency (p50/p95/p99, sequential calls), the
+mean time spent in each stage (llm, embed, search, fetch, parse, db, ...; the
+rest is "other") and throughput with --concurrency calls in flight. Every call
+gets distinct inputs so the search/embedding caches don't turn the run into a
+cache benchmark.
+
+Adam and Ivan need Postgres: --db seeds and uses the database from POSTGRES_*
+(point it at a throwaway one, e.g. `docker run -p 5433:5432 -e POSTGRES_USER=admin
+-e POSTGRES_PASSWORD=admin -e POSTGRES_DB=agency_os pgvector/pgvector:pg16` with
+POSTGRES_HOST=localhost PGPORT=5433). Without it they are skipped, and Sue/Lisa
+take their no-database fallbacks.
+
+Baselines: --save-baseline writes the results to benchmarks/baselines/agents.json;
+later runs compare against it and exit with status 1 when an agent's p50 grew,
+or its throughput dropped, by more than --tolerance. The committed baseline was
+recorded with the default settings and no --db (what CI runs); re-record it
+when a change moves the numbers on purpose.
+
+Run from backend/:
+    python -m benchmarks.bench_agents --iterations 50 --concurrency 8
+    python -m benchmarks.bench_agents --db --save-baseline
+"""
+import argparse
+import functools
+import json
+import math
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, redirect_stdout
+
+from benchmarks.fakes import BENCH_CAMPAIGN, BENCH_SKU, FakeDDGS, FakeOpenAI, FixtureSite, Latency, seed_database
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines", "agents.json")
+AGENTS = ["jeff", "penny", "sue", "adam", "ivan", "lisa"]
+DB_AGENTS = {"adam", "ivan"}
+KEYWORD = "running shoes"
+
+
+class StageTimer:
+    """Charges the wall time of wrapped calls to a named stage of the task running on this thread."""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def begin(self):
+        self._local.stages = {}
+
+    def end(self) -> dict:
+        stages, self._local.stages = self._local.stages, None
+        return stages
+
+    def _charge(self, stage: str, seconds: float):
+        stages = getattr(self._local, "stages", None)
+        if stages is not None:
+            stages[stage] = stages.get(stage, 0.0) + seconds
+
+    def wrap(self, stage: str, fn):
+        @functools.wraps(fn)
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._charge(stage, time.perf_counter() - started)
+        return timed
+
+    def wrap_context(self, stage: str, factory):
+        # db_cursor(): the stage covers checkout, the queries and the release
+        @contextmanager
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                with factory(*args, **kwargs) as value:
+                    yield value
+            finally:
+                self._charge(stage, time.perf_counter() - started)
+        return timed
+
+
+def configure_environment(openai: FakeOpenAI, use_db: bool):
+    """Must run before anything under app/ is imported: modules read their settings at import."""
+    os.environ["OPENAI_BASE_URL"] = openai.base_url
+    os.environ["OPENAI_API_KEY"] = "bench"
+    # Measure the agents, not our own rate limiter or Redis caches
+    os.environ.setdefault("LLM_REQUESTS_PER_MINUTE", "1000000")
+    os.environ.setdefault("LLM_TOKENS_PER_MINUTE", "1000000000")
+    os.environ.setdefault("JEFF_SEARCH_MIN_INTERVAL", "0")
+    os.environ["LLM_CACHE_REDIS_URL"] = ""
+    os.environ["EMBEDDING_CACHE_REDIS_URL"] = ""
+    if not use_db:
+        # Nothing listens on the discard port: pool creation fails at once and
+        # the agents take their no-database paths instead of waiting on DNS for "db"
+        os.environ["POSTGRES_HOST"] = "127.0.0.1"
+        os.environ["PGPORT"] = "9"
+        os.environ["PGCONNECT_TIMEOUT"] = "1"
+
+
+def instrument(timer: StageTimer):
+    """Patch the fakes in and wrap each stage's entry point. Returns app.worker."""
+    import app.agents.jeff as jeff
+    import app.agents.lisa as lisa
+    import app.core.vector_index as vector_index
+    from app import worker
+    from app.core.llm import llm
+
+    jeff.DDGS = FakeDDGS
+    jeff.web_search = timer.wrap("search", jeff.web_search)
+    jeff.find_seller_prospect = timer.wrap("seller_store", jeff.find_seller_prospect)
+    llm.complete = timer.wrap("llm", llm.complete)
+    llm.embed = timer.wrap("embed", llm.embed)
+    lisa.fetch_page = timer.wrap("fetch", lisa.fetch_page)
+    lisa.analyze_chunks = timer.wrap("parse", lisa.analyze_chunks)
+    worker.db_cursor = timer.wrap_context("db", worker.db_cursor)
+    vector_index.db_cursor = timer.wrap_context("db", vector_index.db_cursor)
+    return worker
+
+
+def scenarios(worker, site: FixtureSite) -> dict:
+    """agent -> fn(i) running one task with the i-th set of inputs."""
+    return {
+        "jeff": lambda i: worker.jeff_task(f"bench niche {i}", 0),
+        "penny": lambda i: worker.penny_task(f"Bench Product {i}", 24.99, 18.0 + i % 5, 22.99),
+        "sue": lambda i: worker.sue_task(f"Order #{i} arrived damaged, can I get a replacement?", "Delivered"),
+        "adam": lambda i: worker.adam_task(BENCH_CAMPAIGN),
+        "ivan": lambda i: worker.ivan_task(BENCH_SKU),
+        "lisa": lambda i: worker.lisa_task(site.product_url(i), KEYWORD),
+    }
+
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def run_agent(run, timer: StageTimer, iterations: int, concurrency: int) -> dict:
+    def call(i):
+        timer.begin()
+        started = time.perf_counter()
+        try:
+            ok = run(i).get("status") == "COMPLETED"
+        except Exception as e:
+            print(f"  {i}: {type(e).__name__}: {e}", file=sys.stderr)
+            ok = False
+        return time.perf_counter() - started, timer.end(), ok
+
+    # Warm-up: imports, pool creation, the in-process policy index...
+    call(2 * iterations)
+
+    # 1. Latency: one call at a time
+    latencies, stage_totals, errors = [], {}, 0
+    for i in range(iterations):
+        elapsed, stages, ok = call(i)
+        latencies.append(elapsed)
+        errors += not ok
+        for stage, seconds in stages.items():
+            stage_totals[stage] = stage_totals.get(stage, 0.0) + seconds
+
+    # 2. Throughput: `concurrency` calls in flight, fresh inputs
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        errors += sum(not ok for _, _, ok in pool.map(call, range(iterations, 2 * iterations)))
+    wall = time.perf_counter() - started
+
+    stages_ms = {stage: total / iterations * 1000 for stage, total in stage_totals.items()}
+    stages_ms["other"] = max(0.0, sum(latencies) / iterations * 1000 - sum(stages_ms.values()))
+    return {
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "throughput": iterations / wall,
+        "errors": errors,
+        "stages_ms": {stage: round(ms, 3) for stage, ms in stages_ms.items()},
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    regressions = []
+    for agent, current in results.items():
+        previous = baseline.get("agents", {}).get(agent)
+        if not previous:
+            continue
+        if current["p50_ms"] > previous["p50_ms"] * (1 + tolerance):
+            regressions.append(f"{agent}: p50 {previous['p50_ms']:.1f} -> {current['p50_ms']:.1f} ms")
+        if current["throughput"] < previous["throughput"] * (1 - tolerance):
+            regressions.append(f"{agent}: throughput {previous['throughput']:.1f} -> {current['throughput']:.1f} tasks/s")
+        if current["errors"] > previous.get("errors", 0):
+            regressions.append(f"{agent}: errors {previous.get('errors', 0)} -> {current['errors']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--agents", default=",".join(AGENTS))
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--llm-ms", type=float, default=50, help="fake chat completion latency")
+    parser.add_argument("--llm-jitter-ms", type=float, default=10)
+    parser.add_argument("--embed-ms", type=float, default=20)
+    parser.add_argument("--search-ms", type=float, default=30, help="fake DuckDuckGo latency")
+    parser.add_argument("--site-ms", type=float, default=10, help="fixture storefront latency")
+    parser.add_argument("--db", action="store_true", help="seed and use the Postgres from POSTGRES_* (throwaway!)")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    parser.add_argument("--verbose", action="store_true", help="keep the agents' own prints")
+    args = parser.parse_args()
+
+    agents = [a.strip() for a in args.agents.split(",") if a.strip()]
+    unknown = set(agents) - set(AGENTS)
+    if unknown:
+        parser.error(f"unknown agents: {', '.join(sorted(unknown))}")
+    if not args.db:
+        agents = [a for a in agents if a not in DB_AGENTS]
+
+    openai = FakeOpenAI(Latency(args.llm_ms, args.llm_jitter_ms), Latency(args.embed_ms)).start()
+    site = FixtureSite(Latency(args.site_ms)).start()
+    FakeDDGS.latency = Latency(args.search_ms)
+    configure_environment(openai, args.db)
+
+    timer = StageTimer()
+    worker = instrument(timer)
+    if args.db:
+        from app.core.db import DB_CONFIG
+        seed_database(DB_CONFIG)
+    runs = scenarios(worker, site)
+
+    config = {
+        "iterations": args.iterations, "concurrency": args.concurrency, "db": args.db,
+        "llm_ms": args.llm_ms, "llm_jitter_ms": args.llm_jitter_ms, "embed_ms": args.embed_ms,
+        "search_ms": args.search_ms, "site_ms": args.site_ms,
+    }
+    print(f"--- AGENT BENCHMARK: {args.iterations} calls/agent, concurrency {args.concurrency}, "
+          f"llm {args.llm_ms:g}±{args.llm_jitter_ms:g} ms, embed {args.embed_ms:g} ms, "
+          f"search {args.search_ms:g} ms, site {args.site_ms:g} ms, db {'on' if args.db else 'off'} ---")
+    print(f"{'agent':<6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'tasks/s':>9} {'errors':>7}  stages (mean ms)")
+
+    results = {}
+    with open(os.devnull, "w") as devnull:
+        for agent in agents:
+            with redirect_stdout(sys.stdout if args.verbose else devnull):
+                result = run_agent(runs[agent], timer, args.iterations, args.concurrency)
+            results[agent] = result
+            stages = "  ".join(f"{stage} {ms:.1f}" for stage, ms in
+                               sorted(result["stages_ms"].items(), key=lambda item: -item[1]))
+            print(f"{agent:<6} {result['p50_ms']:9.1f} {result['p95_ms']:9.1f} {result['p99_ms']:9.1f} "
+                  f"{result['throughput']:9.1f} {result['errors']:7d}  {stages}")
+
+    print(f"fake OpenAI served {openai.requests['completions']} completions, {openai.requests['embeddings']} embeddings")
+    openai.stop()
+    site.stop()
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"config": config, "agents": results}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"baseline saved to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline} (record one with --save-baseline)")
+        return
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("config") != config:
+        print(f"note: baseline was recorded with different settings: {baseline.get('config')}")
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"REGRESSIONS vs {args.baseline} (tolerance {args.tolerance:.0%}):")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print(f"no regressions vs {args.baseline} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Jeff prospect selection: linear scan over a list of seller dicts (MOCK_SELLERS
+shape) vs the indexed SellerStore (niche inverted index + revenue bisect).
+
+Run from backend/:
+    python -m benchmarks.bench_jeff_store --sellers 1000000
+"""
+import argparse
+import random
+import sys
+import time
+
+from app.agents.jeff import SellerRecord, SellerStore
+
+NICHES = [f"Niche {i}" for i in range(200)]
+
+
+def make_sellers(n: int, seed: int = 42):
+    rng = random.Random(seed)
+    return [
+        {"id": f"s{i}", "brand": f"Brand {i}", "niche": rng.choice(NICHES),
+         "revenue": int(rng.lognormvariate(10, 1.5)), "email": f"ceo@brand{i}.com", "pain_point": "Bad Ads"}
+        for i in range(n)
+    ]
+
+
+def scan(sellers, niche: str, min_revenue: int, limit: int):
+    matches = [s for s in sellers if s["niche"] == niche and s["revenue"] >= min_revenue]
+    matches.sort(key=lambda s: s["revenue"], reverse=True)
+    return matches[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sellers", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    sellers = make_sellers(args.sellers)
+    rng = random.Random(7)
+    queries = [(rng.choice(NICHES), rng.choice([0, 10_000, 50_000, 250_000])) for _ in range(args.queries)]
+
+    started = time.perf_counter()
+    store = SellerStore(SellerRecord.from_dict(s) for s in sellers)
+    build_s = time.perf_counter() - started
+
+    # Scanning is slow - time a sample and check parity on it
+    sample = queries[:min(20, len(queries))]
+    started = time.perf_counter()
+    expected = [scan(sellers, niche, min_rev, args.limit) for niche, min_rev in sample]
+    scan_s = (time.perf_counter() - started) / len(sample)
+
+    started = time.perf_counter()
+    for niche, min_rev in queries:
+        store.query(niche, min_revenue=min_rev, limit=args.limit)
+    query_s = (time.perf_counter() - started) / len(queries)
+
+    # Both implementations must agree before we compare speed (revenues, since ties may reorder)
+    for (niche, min_rev), want in zip(sample, expected):
+        got = store.query(niche, min_revenue=min_rev, limit=args.limit)
+        assert [r.revenue for r in got] == [s["revenue"] for s in want]
+
+    dict_bytes = sys.getsizeof(sellers[0]) + sum(sys.getsizeof(v) for v in sellers[0].values())
+    record = SellerRecord.from_dict(sellers[0])
+    slot_bytes = sys.getsizeof(record) + sum(sys.getsizeof(getattr(record, f)) for f in record.__slots__)
+
+    print(f"--- JEFF STORE BENCHMARK: {args.sellers:,} sellers, {len(NICHES)} niches ---")
+    print(f"index build    : {build_s * 1000:10.1f} ms")
+    print(f"linear scan    : {scan_s * 1000:10.3f} ms/query")
+    print(f"indexed query  : {query_s * 1000:10.3f} ms/query  ({scan_s / query_s:.0f}x)")
+    print(f"record size    : dict ~{dict_bytes} B vs __slots__ ~{slot_bytes} B")
+
+
+if __name__ == "__main__":
+    main()
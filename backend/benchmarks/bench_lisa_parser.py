@@ -0,0 +1,96 @@
+"""
+Lisa page analysis: BeautifulSoup tree + get_text() (the old parse_page) vs
+the single-pass streaming PageAnalyzer.
+
+Run from backend/:
+    python -m benchmarks.bench_lisa_parser --products 5000
+"""
+import argparse
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup
+
+from app.agents.lisa import CHUNK_SIZE, analyze_chunks
+
+KEYWORD = "running shoes"
+
+
+def make_page(products: int) -> bytes:
+    # A storefront category page: inline JSON, styles and a long product grid
+    parts = [
+        "<html><head><title>Running Shoes | Example Store</title>",
+        '<meta name="description" content="Lightweight running shoes for every distance.">',
+        "<style>.card{display:flex}</style>",
+        '<script>window.__STATE__ = {"products": [' + ",".join('{"id": %d}' % i for i in range(products)) + "]};</script>",
+        "</head><body><h1>Running <em>Shoes</em></h1>",
+    ]
+    for i in range(products):
+        parts.append(
+            f'<div class="card"><a href="/p/{i}">Trail running shoes model {i}</a>'
+            f"<p>Breathable mesh upper, {i % 12 + 4}mm drop &amp; a grippy outsole. "
+            f"Our best running shoes for muddy trails.</p></div>"
+        )
+    parts.append("</body></html>")
+    return "".join(parts).encode("utf-8")
+
+
+def bs4_reference(html: bytes) -> dict:
+    # Same logic as the original parse_page + score_page keyword count
+    soup = BeautifulSoup(html, "html.parser")
+    text = soup.get_text(" ", strip=True)
+    h1 = soup.find("h1")
+    meta = soup.find("meta", attrs={"name": "description"})
+    return {
+        "title": soup.title.string if soup.title else None,
+        "h1": h1.get_text(strip=True) if h1 else None,
+        "meta_description": meta.get("content") if meta else None,
+        "word_count": len(text.split()),
+        "keyword_count": text.lower().count(KEYWORD),
+    }
+
+
+def streaming(html: bytes) -> dict:
+    chunks = (html[i:i + CHUNK_SIZE] for i in range(0, len(html), CHUNK_SIZE))
+    return analyze_chunks(chunks, KEYWORD)
+
+
+def measure(fn, html: bytes, repeat: int):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(html)
+        best = min(best, time.perf_counter() - started)
+
+    tracemalloc.start()
+    fn(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    html = make_page(args.products)
+    mb = len(html) / 1024 / 1024
+
+    ref_s, ref_peak, ref = measure(bs4_reference, html, args.repeat)
+    new_s, new_peak, new = measure(streaming, html, args.repeat)
+
+    # Both implementations must agree before we compare speed
+    for field in ref:
+        assert ref[field] == new[field], f"{field}: {ref[field]!r} != {new[field]!r}"
+
+    print(f"--- LISA PARSER BENCHMARK: {mb:.1f} MB page, {new['word_count']:,} words (best of {args.repeat}) ---")
+    print(f"bs4 + get_text : {ref_s * 1000:10.1f} ms  {mb / ref_s:8.1f} MB/s  peak {ref_peak / 1024 / 1024:8.1f} MB")
+    print(f"streaming      : {new_s * 1000:10.1f} ms  {mb / new_s:8.1f} MB/s  peak {new_peak / 1024 / 1024:8.1f} MB"
+          f"  ({ref_s / new_s:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Penny repricing throughput: per-SKU dict loop (the old endpoint) vs the
+vectorized RepricingEngine. Building the engine from the inventory dict
+(from_inventory, once per process) is timed apart from deciding, so the
+speedup isn't read off the decide step alone.
+
+Run from backend/:
+    python -m benchmarks.bench_penny --skus 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.agents.penny import RepricingEngine, UNDERCUT_BY
+
+
+def make_catalog(n: int, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    price = np.round(rng.uniform(5, 200, n), 2)
+    competitor = np.round(price * rng.uniform(0.85, 1.15, n), 2)
+    floor = np.round(price * rng.uniform(0.80, 0.98, n), 2)
+    skus = np.array([f"sku_{i}" for i in range(n)], dtype=object)
+    return skus, price, competitor, floor
+
+
+def loop_reprice(inventory: dict):
+    # Same logic as the original per-SKU endpoint
+    logs = []
+    for sku, data in inventory.items():
+        current, comp, floor = data["price"], data["competitor_price"], data["min_price"]
+        if comp < current:
+            new_target = comp - UNDERCUT_BY
+            if new_target >= floor:
+                logs.append({"sku": sku, "action": "DECREASE_PRICE", "old_price": current,
+                             "new_price": round(new_target, 2), "reason": "Competitor dropped price."})
+            else:
+                logs.append({"sku": sku, "action": "HOLD",
+                             "reason": "Competitor below Min Price (Profit Protection)."})
+    return logs
+
+
+def timed(fn, repeat: int):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--skus", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--page-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    skus, price, competitor, floor = make_catalog(args.skus)
+    inventory = {
+        sku: {"price": float(p), "competitor_price": float(c), "min_price": float(f)}
+        for sku, p, c, f in zip(skus, price, competitor, floor)
+    }
+
+    loop_s, loop_logs = timed(lambda: loop_reprice(inventory), args.repeat)
+    build_s, built = timed(lambda: RepricingEngine.from_inventory(inventory), args.repeat)
+
+    def vectorized():
+        # A fresh engine over the built columns, so decide() isn't served from its cache
+        engine = RepricingEngine(built.skus, built.price, built.competitor_price, built.min_price)
+        engine.decide()
+        return engine
+
+    vec_s, engine = timed(vectorized, args.repeat)
+    page_s, page = timed(lambda: list(engine.events(0, args.page_size)), args.repeat)
+
+    # Both implementations must agree before we compare speed
+    assert engine.event_count() == len(loop_logs)
+    assert page == loop_logs[:args.page_size]
+
+    print(f"--- PENNY BENCHMARK: {args.skus:,} SKUs, {len(loop_logs):,} events (best of {args.repeat}) ---")
+    print(f"dict loop      : {loop_s * 1000:10.1f} ms  {args.skus / loop_s:>14,.0f} SKUs/s")
+    print(f"from_inventory : {build_s * 1000:10.1f} ms  {args.skus / build_s:>14,.0f} SKUs/s  (once per process)")
+    print(f"decide         : {vec_s * 1000:10.1f} ms  {args.skus / vec_s:>14,.0f} SKUs/s  ({loop_s / vec_s:.1f}x)")
+    total_s = build_s + vec_s
+    print(f"build + decide : {total_s * 1000:10.1f} ms  {args.skus / total_s:>14,.0f} SKUs/s  ({loop_s / total_s:.1f}x)")
+    print(f"page of {args.page_size:<6} : {page_s * 1000:10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Startup cost of the API and the worker, and what each agent adds on first use.
+
+Every target runs in a fresh interpreter (--repeat times, median reported), so
+nothing is cached in sys.modules between measurements:
+
+- api / worker        : `import app.main` / `import app.worker` - what a uvicorn
+                        or Celery process pays before it can serve anything
+- api (preload)       : the same with AGENT_PRELOAD=jeff,sue,penny
+- jeff, lisa, ...     : first use of one agent inside an already-imported worker
+                        (its module imports, graph compile, engine build)
+
+Besides the time it counts the modules each step imported and names the heavy
+third-party packages among them. Checkpoints use the in-memory backend and no
+Redis or Postgres is contacted, so only import and construction are measured.
+
+Run from backend/:
+    python -m benchmarks.bench_startup --repeat 7
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY = ("langgraph", "langchain_core", "openai", "duckduckgo_search", "httpx", "requests",
+         "numpy", "psycopg", "psycopg2", "fastapi", "celery", "redis", "prometheus_client")
+
+# name -> (untimed setup, timed statement, extra environment)
+TARGETS = {
+    "api": ("", "import app.main", {}),
+    "api (preload)": ("", "import app.main", {"AGENT_PRELOAD": "jeff,sue,penny"}),
+    "worker": ("", "import app.worker", {}),
+    "jeff": ("import app.worker", "import app.agents.jeff", {}),
+    "jeff graph": ("import app.worker", "app.worker.get_graph('jeff')", {}),
+    "sue (policy index)": ("import app.worker", "import app.core.vector_index", {}),
+    "sue graph": ("import app.worker", "app.worker.get_graph('sue')", {}),
+    "lisa": ("import app.worker", "import app.agents.lisa", {}),
+    "penny": ("import app.worker\nfrom app.agents.registry import get_repricing_engine",
+              "get_repricing_engine()", {}),
+}
+
+PROBE = """
+import json, sys, time
+{setup}
+before = set(sys.modules)
+started = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - started
+new = set(sys.modules) - before
+heavy = sorted(p for p in {heavy!r} if p in new)
+print("BENCH " + json.dumps({{"seconds": elapsed, "modules": len(new), "heavy": heavy}}))
+"""
+
+
+def probe_environment(extra: dict) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "CHECKPOINT_BACKEND": "memory",
+        "AGENT_PRELOAD": "",
+        "PROMETHEUS_MULTIPROC_DIR": "",
+    })
+    env.update(extra)
+    return env
+
+
+def measure(setup: str, statement: str, extra_env: dict) -> dict:
+    code = PROBE.format(setup=setup, statement=statement, heavy=HEAVY)
+    proc = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, env=probe_environment(extra_env),
+                          capture_output=True, text=True)
+    for line in reversed(proc.stdout.splitlines()):
+        if line.startswith("BENCH "):
+            return json.loads(line[len("BENCH "):])
+    raise RuntimeError(f"probe failed ({statement}):\n{proc.stderr.strip()}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--targets", default=",".join(TARGETS), help="comma separated, from: " + ", ".join(TARGETS))
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    names = [n.strip() for n in args.targets.split(",") if n.strip()]
+    unknown = [n for n in names if n not in TARGETS]
+    if unknown:
+        parser.error(f"unknown targets: {', '.join(unknown)}")
+
+    # One throwaway run so the first target doesn't pay for cold .pyc / page cache
+    measure("", "import app.worker", {})
+
+    print(f"{'target':<20} {'median':>9} {'min':>9} {'modules':>8}  heavy packages imported")
+    for name in names:
+        setup, statement, extra_env = TARGETS[name]
+        runs = [measure(setup, statement, extra_env) for _ in range(args.repeat)]
+        seconds = [r["seconds"] for r in runs]
+        print(f"{name:<20} {statistics.median(seconds) * 1000:>7.0f}ms {min(seconds) * 1000:>7.0f}ms "
+              f"{runs[-1]['modules']:>8}  {', '.join(runs[-1]['heavy']) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+"""
+Deterministic local stand-ins for the services the agents talk to, so the agent
+benchmarks run offline and give the same numbers twice:
+
+- FakeOpenAI   : OpenAI-compatible /v1/chat/completions + /v1/embeddings with a
+                 configurable (seeded) latency. Point the gateway at it with
+                 OPENAI_BASE_URL.
+- FixtureSite  : storefront product pages for Lisa, with ETag / Last-Modified
+                 and 304s so conditional re-audits behave like a real server.
+- FakeDDGS     : drop-in for duckduckgo_search.DDGS (patched into app.agents.jeff).
+- seed_database: schema + the rows Adam, Ivan and Sue need, in a throwaway Postgres.
+"""
+import base64
+import hashlib
+import json
+import math
+import random
+import re
+import struct
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+EMBEDDING_DIM = 1536
+
+BENCH_CAMPAIGN = "Bench Campaign - Exact"
+BENCH_SKU = "BENCH-001"
+
+
+class Latency:
+    """base_ms +/- jitter_ms, from a seeded RNG so two runs sleep the same amounts."""
+
+    def __init__(self, base_ms: float = 0.0, jitter_ms: float = 0.0, seed: int = 42):
+        self.base = base_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sleep(self):
+        with self._lock:
+            delay = self.base + self._rng.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+
+class _Server:
+    """ThreadingHTTPServer on an ephemeral localhost port, served from a daemon thread."""
+
+    handler = None
+
+    def __init__(self):
+        owner = self
+
+        class Handler(self.handler):
+            server_owner = owner
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class _QuietHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; with Nagle on, keep-alive
+    # clients would wait ~40 ms on a delayed ACK for every response
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, body: bytes = b"", content_type: str = "application/json", headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+
+# =============================================================================
+# FAKE OPENAI
+# =============================================================================
+
+def fake_embedding(text: str, dim: int = EMBEDDING_DIM) -> list:
+    """Unit vector derived from the text's hash: same text, same vector."""
+    rng = random.Random(hashlib.sha256(text.encode("utf-8")).digest())
+    vector = [rng.gauss(0, 1) for _ in range(dim)]
+    norm = math.sqrt(sum(v * v for v in vector))
+    return [v / norm for v in vector]
+
+
+def fake_completion(prompt: str) -> str:
+    digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8]
+    return f"Benchmark reply {digest}: keep the margin, fix the title, follow up in a week."
+
+
+def _tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class _OpenAIHandler(_QuietHandler):
+    def do_POST(self):
+        owner = self.server_owner
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length) or b"{}")
+
+        if self.path.endswith("/chat/completions"):
+            owner.chat_latency.sleep()
+            prompt = "".join(m.get("content") or "" for m in payload.get("messages", []))
+            content = fake_completion(prompt)
+            body = {
+                "id": "chatcmpl-bench",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": payload.get("model", "gpt-3.5-turbo"),
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": content}}],
+                "usage": {"prompt_tokens": _tokens(prompt), "completion_tokens": _tokens(content),
+                          "total_tokens": _tokens(prompt) + _tokens(content)},
+            }
+        elif self.path.endswith("/embeddings"):
+            owner.embed_latency.sleep()
+            inputs = payload.get("input", [])
+            inputs = [inputs] if isinstance(inputs, str) else inputs
+            # The SDK asks for base64 (packed float32) unless told otherwise
+            as_base64 = payload.get("encoding_format") == "base64"
+            data = []
+            for index, text in enumerate(inputs):
+                vector = fake_embedding(text, owner.dim)
+                if as_base64:
+                    vector = base64.b64encode(struct.pack(f"<{len(vector)}f", *vector)).decode("ascii")
+                data.append({"object": "embedding", "index": index, "embedding": vector})
+            tokens = sum(_tokens(t) for t in inputs)
+            body = {"object": "list", "data": data, "model": payload.get("model"),
+                    "usage": {"prompt_tokens": tokens, "total_tokens": tokens}}
+        else:
+            self._send(404, b'{"error": {"message": "not found"}}')
+            return
+
+        with owner.lock:
+            owner.requests[self.path.rsplit("/", 1)[-1]] += 1
+        self._send(200, json.dumps(body).encode("utf-8"))
+
+
+class FakeOpenAI(_Server):
+    handler = _OpenAIHandler
+
+    def __init__(self, chat_latency: Latency = None, embed_latency: Latency = None, dim: int = EMBEDDING_DIM):
+        super().__init__()
+        self.chat_latency = chat_latency or Latency()
+        self.embed_latency = embed_latency or Latency()
+        self.dim = dim
+        self.lock = threading.Lock()
+        self.requests = {"completions": 0, "embeddings": 0}
+
+    @property
+    def base_url(self) -> str:
+        return self.url + "/v1"
+
+
+# =============================================================================
+# FIXTURE STOREFRONT (Lisa)
+# =============================================================================
+
+def product_page(product_id: int, cards: int = 200) -> bytes:
+    """A category-style product page: inline state, styles and a product grid."""
+    parts = [
+        f"<html><head><title>Running Shoes {product_id} | Bench Store</title>",
+        '<meta charset="utf-8">',
+        '<meta name="description" content="Lightweight running shoes for every distance.">',
+        "<style>.card{display:flex}</style>",
+        '<script>window.__STATE__ = {"related": [' + ",".join(str(i) for i in range(cards)) + "]};</script>",
+        f"</head><body><h1>Running Shoes {product_id}</h1>",
+    ]
+    for i in range(cards):
+        parts.append(
+            f'<div class="card"><a href="/products/{(product_id + i) % 10_000}">Trail running shoes model {i}</a>'
+            f"<p>Breathable mesh upper, {i % 12 + 4}mm drop &amp; a grippy outsole.</p></div>"
+        )
+    parts.append("</body></html>")
+    return "".join(parts).encode("utf-8")
+
+
+class _SiteHandler(_QuietHandler):
+    def do_GET(self):
+        owner = self.server_owner
+        owner.latency.sleep()
+        match = re.fullmatch(r"/products/(\d+)", self.path)
+        if not match:
+            self._send(404, b"not found", "text/plain")
+            return
+
+        body = owner.page(int(match.group(1)))
+        etag = '"%s"' % hashlib.sha256(body).hexdigest()[:16]
+        headers = {"ETag": etag, "Last-Modified": owner.last_modified}
+        if self.headers.get("If-None-Match") == etag:
+            self._send(304, headers=headers)
+            return
+        self._send(200, body, "text/html; charset=utf-8", headers)
+
+
+class FixtureSite(_Server):
+    handler = _SiteHandler
+
+    def __init__(self, latency: Latency = None, cards: int = 200):
+        super().__init__()
+        self.latency = latency or Latency()
+        self.cards = cards
+        self.last_modified = formatdate(usegmt=True)
+        self._pages = {}
+
+    def page(self, product_id: int) -> bytes:
+        if product_id not in self._pages:
+            self._pages[product_id] = product_page(product_id, self.cards)
+        return self._pages[product_id]
+
+    def product_url(self, product_id: int) -> str:
+        return f"{self.url}/products/{product_id}"
+
+
+# =============================================================================
+# FAKE DUCKDUCKGO (Jeff)
+# =============================================================================
+
+class FakeDDGS:
+    """Context manager with DDGS.text()'s shape. Hits depend only on the query."""
+
+    latency = Latency()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def text(self, query: str, max_results: int = 5):
+        self.latency.sleep()
+        slug = hashlib.sha256(query.encode("utf-8")).hexdigest()[:6]
+        hits = [{"title": f"Top 10 {query} picks - Review Weekly", "href": f"https://reviews-{slug}.example/top",
+                 "body": f"Our reviewers compared {query}."}]
+        for i in range(max_results - 1):
+            hits.append({"title": f"Brand {slug}{i} | Official Store", "href": f"https://brand-{slug}{i}.example/",
+                         "body": f"Brand {slug}{i} makes {query} for serious buyers."})
+        return hits[:max_results]
+
+
+# =============================================================================
+# THROWAWAY POSTGRES (Adam, Ivan, Sue's pgvector path, Lisa's audit history)
+# =============================================================================
+
+def seed_database(conn_kwargs: dict, days: int = 30):
+    """
+    Create the schema (init_db) and the rows the benchmarked tasks read:
+    one campaign with `days` of metrics, one low-stock SKU, the built-in policies.
+    Embeddings go through the gateway, i.e. the fake server. Meant for a
+    disposable database - the bench rows are replaced on every run.
+    """
+    import psycopg2
+
+    from app.core.db import init_db
+    from seed_policies import ingest_batch, policies
+
+    init_db(psycopg2.connect(**conn_kwargs))
+
+    conn = psycopg2.connect(**conn_kwargs)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM ad_metrics WHERE campaign_name = %s;", (BENCH_CAMPAIGN,))
+            rng = random.Random(42)
+            for day in range(days):
+                clicks = rng.randint(10, 100)
+                spend = clicks * rng.uniform(0.5, 2.5)
+                cur.execute("""
+                    INSERT INTO ad_metrics (date, campaign_name, clicks, spend, sales)
+                    VALUES (CURRENT_DATE - %s, %s, %s, %s, %s);
+                """, (days - day, BENCH_CAMPAIGN, clicks, spend, spend * 0.8))
+
+            cur.execute("""
+                INSERT INTO inventory (sku, product_name, current_stock, reorder_point, reorder_qty, supplier_email, unit_cost)
+                VALUES (%s, 'Bench Gaming Mouse', 5, 20, 100, 'orders@bench-supplier.example', 12.50)
+                ON CONFLICT (sku) DO UPDATE SET current_stock = 5, reorder_point = 20;
+            """, (BENCH_SKU,))
+
+            cur.execute("DELETE FROM seo_audits WHERE url LIKE 'http://127.0.0.1:%';")
+            ingest_batch(cur, [(None, text) for text in policies])
+        conn.commit()
+    finally:
+        conn.close()
@@ -0,0 +1,315 @@
+"""
+HTTP load test of the FastAPI app: how many concurrent /agents/* and
+/tasks/{task_id} requests one API process sustains before p99 degrades.
+
+Starts the real app under uvicorn in a subprocess with local stand-ins:
+Celery in eager mode (CELERY_EAGER=1: tasks run inline, results in memory),
+progress events off, an in-memory HITL checkpointer, and the fake OpenAI
+server + fixture storefront from benchmarks/fakes.py. Because tasks run
+inline, an /agents/* request includes the agent's own work (with --llm-ms of
+fake LLM latency); use --llm-ms 0 to see the API overhead alone. Eager tasks
+always run in the threadpool, never on the event loop (async endpoints use
+adispatch), so one slow task delays only its own request.
+
+Virtual users loop over weighted scenarios for --duration seconds at each
+--concurrency level. Scenarios (name=weight in --mix):
+    penny, jeff, sue, lisa, adam*, ivan*   dispatch + GET /tasks/{task_id}
+    status                                 GET /tasks/{task_id} of a finished task
+    jeff_hitl, sue_hitl                    start-workflow -> session -> approve -> session
+(* needs --db, see bench_agents.py). Per level it reports p50/p95/p99, error
+rate and throughput per endpoint, then flags the first level whose overall p99
+exceeds --p99-factor x the p99 of the lowest level.
+
+Run from backend/:
+    python -m benchmarks.load_test --concurrency 1,4,16,64 --duration 15
+    python -m benchmarks.load_test --mix status=1 --llm-ms 0
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.bench_agents import percentile
+from benchmarks.fakes import BENCH_CAMPAIGN, BENCH_SKU, FakeOpenAI, FixtureSite, Latency, seed_database
+
+DEFAULT_MIX = "penny=3,jeff=2,sue=2,lisa=1,status=6,jeff_hitl=1,sue_hitl=1"
+DB_SCENARIOS = {"adam", "ivan"}
+# Niches that exist in MOCK_SELLERS: Jeff answers from the seller store, no web search
+NICHES = ["Baby Care", "Tools", "Pet Supplies"]
+
+
+class Recorder:
+    """Latency + outcome of every request, grouped by endpoint (route template)."""
+
+    def __init__(self):
+        self.samples = {}
+
+    def add(self, endpoint: str, seconds: float, ok: bool):
+        self.samples.setdefault(endpoint, []).append((seconds, ok))
+
+    def summary(self, wall: float) -> dict:
+        rows = {}
+        everything = []
+        for endpoint, samples in sorted(self.samples.items()):
+            rows[endpoint] = _stats([s for s, _ in samples], sum(not ok for _, ok in samples), wall)
+            everything += samples
+        if everything:
+            rows["ALL"] = _stats([s for s, _ in everything], sum(not ok for _, ok in everything), wall)
+        return rows
+
+
+def _stats(latencies, errors: int, wall: float) -> dict:
+    return {
+        "requests": len(latencies),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "error_rate": errors / len(latencies),
+        "rps": len(latencies) / wall,
+    }
+
+
+class Session:
+    """One virtual user's view of the API: every request is timed and recorded."""
+
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, finished: list):
+        self.client = client
+        self.recorder = recorder
+        self.finished = finished  # task ids any user may poll in the "status" scenario
+
+    async def request(self, method: str, path: str, endpoint: str, expect=None, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, path, **kwargs)
+            body = response.json() if response.status_code < 400 else None
+            ok = body is not None and (expect is None or expect(body))
+        except (httpx.HTTPError, ValueError):
+            body, ok = None, False
+        self.recorder.add(endpoint, time.perf_counter() - started, ok)
+        return body if ok else None
+
+    async def dispatch(self, path: str, payload: dict):
+        body = await self.request("POST", path, path, json=payload)
+        if body is None:
+            return
+        task_id = body["task_id"]
+        # Eager mode: the task already ran, so the status must be final
+        status = await self.request("GET", f"/tasks/{task_id}", "/tasks/{task_id}",
+                                    expect=lambda b: b["status"] == "SUCCESS")
+        if status is not None:
+            self.finished.append(task_id)
+            del self.finished[:-1000]
+
+    async def hitl(self, agent: str, payload: dict, approve: dict, done_status: str):
+        start = await self.request("POST", f"/agents/{agent}/start-workflow", f"/agents/{agent}/start-workflow",
+                                   json=payload)
+        if start is None:
+            return
+        session_id = start["session_id"]
+        session_path = f"/agents/{agent}/sessions/{{session_id}}"
+        pending = await self.request("GET", f"/agents/{agent}/sessions/{session_id}", session_path,
+                                     expect=lambda b: b["status"] == "PENDING_APPROVAL")
+        if pending is None:
+            return
+        approved = await self.request("POST", f"/agents/{agent}/approve", f"/agents/{agent}/approve",
+                                      json={"session_id": session_id, **approve})
+        if approved is None:
+            return
+        await self.request("GET", f"/agents/{agent}/sessions/{session_id}", session_path,
+                           expect=lambda b: b["status"] == done_status)
+
+
+def penny_request(i: int) -> dict:
+    return {"product": f"Load Product {i}", "price": 24.99, "cost": 18.0 + i % 5, "competitor_price": 22.99}
+
+
+def scenarios(site_url: str) -> dict:
+    """name -> coroutine function(session, i)"""
+    return {
+        "penny": lambda s, i: s.dispatch("/agents/penny/analyze", penny_request(i)),
+        "jeff": lambda s, i: s.dispatch("/agents/jeff/start-campaign", {
+            "niche": NICHES[i % len(NICHES)], "min_revenue": 0}),
+        "sue": lambda s, i: s.dispatch("/agents/sue/handle-ticket", {
+            "ticket_text": f"Order #{i} arrived damaged, can I get a replacement?", "order_status": "Delivered"}),
+        "lisa": lambda s, i: s.dispatch("/agents/lisa/audit", {
+            "url": f"{site_url}/products/{i % 10_000}", "keyword": "running shoes"}),
+        "adam": lambda s, i: s.dispatch("/agents/adam/optimize", {"campaign_name": BENCH_CAMPAIGN}),
+        "ivan": lambda s, i: s.dispatch("/agents/ivan/check-stock", {"sku": BENCH_SKU}),
+        "status": status_poll,
+        "jeff_hitl": lambda s, i: s.hitl("jeff", {"niche": NICHES[i % len(NICHES)], "min_revenue": 0},
+                                         {"edited_email": f"Approved email {i}"}, "SENT"),
+        "sue_hitl": lambda s, i: s.hitl("sue", {"ticket_text": f"Ticket {i}: the box was crushed",
+                                                "order_status": "Delivered"},
+                                        {"edited_reply": f"Approved reply {i}"}, "PUBLISHED"),
+    }
+
+
+async def status_poll(session: Session, i: int):
+    if not session.finished:
+        # Nothing finished yet: make one so there is something to poll
+        await session.dispatch("/agents/penny/analyze", penny_request(i))
+        return
+    task_id = session.finished[i % len(session.finished)]
+    await session.request("GET", f"/tasks/{task_id}", "/tasks/{task_id}",
+                          expect=lambda b: b["status"] == "SUCCESS")
+
+
+async def run_level(base_url: str, mix: dict, runs: dict, concurrency: int, duration: float, seed: int) -> dict:
+    recorder, finished = Recorder(), []
+    names, weights = list(mix), list(mix.values())
+    deadline = time.perf_counter() + duration
+    counter = iter(range(10 ** 9))
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        async def user(number: int):
+            rng = random.Random(seed * 1000 + number)
+            session = Session(client, recorder, finished)
+            while time.perf_counter() < deadline:
+                await runs[rng.choices(names, weights)[0]](session, next(counter))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(user(n) for n in range(concurrency)))
+        wall = time.perf_counter() - started
+    return recorder.summary(wall)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_api(port: int, env: dict, log) -> subprocess.Popen:
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--no-access-log", "--log-level", "warning"],
+        cwd=backend_dir, env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"API exited with status {process.returncode} (see {log.name})")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/openapi.json", timeout=1).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"API did not come up within 60s (see {log.name})")
+
+
+def api_environment(openai: FakeOpenAI, use_db: bool) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "CELERY_EAGER": "1",
+        "PROGRESS_REDIS_URL": "",
+        "LLM_CACHE_REDIS_URL": "",
+        "EMBEDDING_CACHE_REDIS_URL": "",
+        "CHECKPOINT_BACKEND": "memory",
+        "OPENAI_BASE_URL": openai.base_url,
+        "OPENAI_API_KEY": "load-test",
+        "PYTHONUNBUFFERED": "1",
+    })
+    env.setdefault("LLM_REQUESTS_PER_MINUTE", "1000000")
+    env.setdefault("LLM_TOKENS_PER_MINUTE", "1000000000")
+    if not use_db:
+        # Same trick as bench_agents: connections fail at once instead of waiting on DNS for "db"
+        env.update({"POSTGRES_HOST": "127.0.0.1", "PGPORT": "9", "PGCONNECT_TIMEOUT": "1"})
+    return env
+
+
+def parse_mix(spec: str) -> dict:
+    mix = {}
+    for item in spec.split(","):
+        name, _, weight = item.strip().partition("=")
+        if name:
+            mix[name] = float(weight) if weight else 1.0
+    return mix
+
+
+def print_level(concurrency: int, rows: dict):
+    print(f"\n--- concurrency {concurrency} ---")
+    print(f"{'endpoint':<36} {'reqs':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7} {'req/s':>8}")
+    for endpoint, row in rows.items():
+        print(f"{endpoint:<36} {row['requests']:7d} {row['p50_ms']:9.1f} {row['p95_ms']:9.1f} "
+              f"{row['p99_ms']:9.1f} {row['error_rate']:7.1%} {row['rps']:8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", default="1,4,16,32", help="comma separated levels of virtual users")
+    parser.add_argument("--duration", type=float, default=10, help="seconds per level")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="scenario=weight,...")
+    parser.add_argument("--llm-ms", type=float, default=50)
+    parser.add_argument("--llm-jitter-ms", type=float, default=10)
+    parser.add_argument("--embed-ms", type=float, default=20)
+    parser.add_argument("--site-ms", type=float, default=10)
+    parser.add_argument("--db", action="store_true", help="seed and use the Postgres from POSTGRES_* (throwaway!)")
+    parser.add_argument("--p99-factor", type=float, default=2.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--log", default="load_test_api.log", help="where the API's output goes")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    openai = FakeOpenAI(Latency(args.llm_ms, args.llm_jitter_ms), Latency(args.embed_ms)).start()
+    site = FixtureSite(Latency(args.site_ms)).start()
+    runs = scenarios(site.url)
+
+    unknown = set(mix) - set(runs)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    if not args.db:
+        mix = {name: weight for name, weight in mix.items() if name not in DB_SCENARIOS}
+    env = api_environment(openai, args.db)
+    if args.db:
+        os.environ.update({"OPENAI_BASE_URL": openai.base_url, "OPENAI_API_KEY": "load-test"})
+        from app.core.db import DB_CONFIG
+        seed_database(DB_CONFIG)
+
+    port = free_port()
+    levels = [int(level) for level in args.concurrency.split(",")]
+    print(f"--- LOAD TEST: levels {levels}, {args.duration:g}s each, mix {mix}, "
+          f"llm {args.llm_ms:g}±{args.llm_jitter_ms:g} ms, db {'on' if args.db else 'off'} ---")
+
+    knee = None
+    overall = []
+    with open(args.log, "w") as log:
+        api = start_api(port, env, log)
+        try:
+            for concurrency in levels:
+                rows = asyncio.run(run_level(f"http://127.0.0.1:{port}", mix, runs, concurrency,
+                                             args.duration, args.seed))
+                print_level(concurrency, rows)
+                total = rows.get("ALL")
+                if total is None:
+                    continue
+                overall.append((concurrency, total))
+                if knee is None and total["p99_ms"] > overall[0][1]["p99_ms"] * args.p99_factor:
+                    knee = concurrency
+        finally:
+            api.terminate()
+            api.wait(timeout=10)
+            openai.stop()
+            site.stop()
+
+    print(f"\n{'users':>6} {'req/s':>8} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for concurrency, total in overall:
+        print(f"{concurrency:6d} {total['rps']:8.1f} {total['p50_ms']:9.1f} {total['p99_ms']:9.1f} "
+              f"{total['error_rate']:7.1%}")
+    if knee is None:
+        print(f"p99 stayed within {args.p99_factor:g}x of the lowest level at every level")
+    else:
+        print(f"p99 degraded beyond {args.p99_factor:g}x of the lowest level at {knee} concurrent users")
+
+
+if __name__ == "__main__":
+    main()
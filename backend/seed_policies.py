@@ -1,12 +1,22 @@
+import argparse
+import hashlib
+import json
 import os
+import time
+from itertools import islice
+
 import psycopg2
-from openai import OpenAI
+from psycopg2.extras import execute_values
 from dotenv import load_dotenv
 
+from app.core.db import ensure_policy_ingest_columns
+from app.core.embedding_cache import EMBEDDING_MODEL
+from app.core.llm import llm
+from app.core.vector_index import POLICY_INDEX_METHOD, ensure_policy_index
+
 load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
-# 1. Our "Company Policies"
+# 1. Our "Company Policies" (used when no file is given)
 policies = [
     "Refund Policy: We offer a full refund within 30 days of purchase. The item must be unopened.",
     "Shipping Policy: Standard shipping takes 5-7 business days. Expedited shipping is 2 days.",
@@ -14,33 +24,163 @@ policies = [
     "Replacement: If an item arrives damaged, we will replace it free of charge if reported within 48 hours."
 ]
 
-def seed_knowledge_base():
+# The embeddings endpoint accepts up to 2048 inputs per request
+DEFAULT_BATCH_SIZE = 256
+
+
+def content_hash(text: str) -> str:
+    # Must match the sha256 backfill in ensure_policy_ingest_columns()
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def read_policies(path: str):
+    """
+    Stream (key, text) pairs from a file without loading it into memory.
+    - .jsonl: one {"text": ..., "key": optional stable id} object per line
+    - anything else: one policy per paragraph (blank-line separated)
+    """
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                text = record["text"].strip()
+                if text:
+                    yield record.get("key"), text
+            return
+
+        paragraph = []
+        for line in f:
+            if line.strip():
+                paragraph.append(line.strip())
+            elif paragraph:
+                yield None, " ".join(paragraph)
+                paragraph = []
+        if paragraph:
+            yield None, " ".join(paragraph)
+
+
+def batched(iterable, size):
+    it = iter(iterable)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+
+def ingest_batch(cur, batch, source: str = None, seen: set = None):
+    """
+    Embed and upsert one batch. Returns (written, skipped).
+    Rows are tagged with `source` (the file they came from); every key of the batch
+    is added to `seen`.
+    """
+    # 1. Hash + dedupe inside the batch (last occurrence of a key wins)
+    rows = {}
+    for key, text in batch:
+        digest = content_hash(text)
+        rows[key or digest] = (text, digest)
+    if seen is not None:
+        seen.update(rows)
+
+    # 2. Skip policies whose stored text is already identical
+    cur.execute(
+        "SELECT policy_key, content_hash FROM policies WHERE policy_key = ANY(%s);",
+        (list(rows.keys()),)
+    )
+    stored = dict(cur.fetchall())
+    pending = [(key, text, digest) for key, (text, digest) in rows.items() if stored.get(key) != digest]
+    skipped = len(batch) - len(pending)
+    if not pending:
+        return 0, skipped
+
+    # 3. One embeddings request for the whole batch
+    embeddings = llm.embed([text for _, text, _ in pending], EMBEDDING_MODEL)
+
+    # 4. Bulk upsert - changed text replaces the old row instead of duplicating it
+    execute_values(cur, """
+        INSERT INTO policies (policy_key, text, content_hash, embedding, source)
+        VALUES %s
+        ON CONFLICT (policy_key) DO UPDATE
+        SET text = EXCLUDED.text,
+            content_hash = EXCLUDED.content_hash,
+            embedding = EXCLUDED.embedding,
+            source = EXCLUDED.source;
+    """, [
+        (key, text, digest, str(embedding), source)
+        for (key, text, digest), embedding in zip(pending, embeddings)
+    ], template="(%s, %s, %s, %s::vector, %s)", page_size=len(pending))
+    return len(pending), skipped
+
+
+def prune_source(cur, source: str, seen: set) -> int:
+    """
+    Delete the rows of `source` whose key wasn't seen in this run. In paragraph files
+    the key is the text's hash, so an edited paragraph is a new row and the old
+    version would otherwise stay searchable forever. Returns the rows deleted.
+    """
+    cur.execute(
+        "DELETE FROM policies WHERE source = %s AND NOT (policy_key = ANY(%s));",
+        (source, list(seen))
+    )
+    return cur.rowcount
+
+
+def seed_knowledge_base(path: str = None, batch_size: int = DEFAULT_BATCH_SIZE):
     conn = psycopg2.connect(
-        host="localhost", database="agency_os", user="admin", password="admin"
+        host=os.getenv("POSTGRES_HOST", "localhost"), database="agency_os", user="admin", password="admin"
     )
     cur = conn.cursor()
-    
-    print("--- Seeding Knowledge Base ---")
-    
-    for policy in policies:
-        # 1. Turn Text into Numbers (Vector Embedding)
-        response = client.embeddings.create(
-            input=policy,
-            model="text-embedding-3-small"
-        )
-        embedding = response.data[0].embedding
-        
-        # 2. Save to Postgres
-        cur.execute(
-            "INSERT INTO policies (text, embedding) VALUES (%s, %s)",
-            (policy, embedding)
-        )
-        print(f"Stored: {policy[:30]}...")
-
+    ensure_policy_ingest_columns(cur)
     conn.commit()
+
+    print(f"--- Seeding Knowledge Base from {path or 'built-in policies'} ---")
+
+    policies_in = read_policies(path) if path else ((None, p) for p in policies)
+    source = os.path.abspath(path) if path else None
+    seen = set()
+    started = time.perf_counter()
+    total = written = skipped = deleted = 0
+
+    for batch in batched(policies_in, batch_size):
+        batch_written, batch_skipped = ingest_batch(cur, batch, source, seen)
+        # Commit per batch so a crash halfway keeps everything already embedded
+        conn.commit()
+
+        total += len(batch)
+        written += batch_written
+        skipped += batch_skipped
+        elapsed = time.perf_counter() - started
+        print(f"Processed {total} policies ({written} written, {skipped} unchanged) "
+              f"- {total / elapsed:.1f} policies/s")
+
+    # Only after the whole file went through: a crash halfway must not delete its tail
+    if path and not path.endswith(".jsonl"):
+        deleted = prune_source(cur, source, seen)
+        conn.commit()
+        if deleted:
+            print(f"Removed {deleted} policies no longer in {path}")
+
+    # IVFFlat centroids are computed from existing rows, so rebuild after a bulk load
+    if POLICY_INDEX_METHOD == "ivfflat" and (written or deleted):
+        ensure_policy_index(cur, "ivfflat", rebuild=True)
+        conn.commit()
+
     cur.close()
     conn.close()
-    print("--- Knowledge Base Ready ---")
+
+    elapsed = time.perf_counter() - started
+    print(f"--- Knowledge Base Ready: {total} read, {written} embedded+upserted, "
+          f"{skipped} skipped, {deleted} removed in {elapsed:.2f}s "
+          f"({total / elapsed if elapsed else 0:.1f} policies/s) ---")
+    return {"read": total, "written": written, "skipped": skipped, "deleted": deleted, "seconds": elapsed}
+
 
 if __name__ == "__main__":
-    seed_knowledge_base()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Embed and upsert client SOPs into the policies table.")
+    parser.add_argument("path", nargs="?", help="Policy file (.jsonl with 'text'/'key', or blank-line separated text)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+    seed_knowledge_base(args.path, args.batch_size)
@@ -0,0 +1,27 @@
+import fakeredis
+import pytest
+from celery import Celery
+from celery.backends.cache import CacheBackend
+from celery.backends.redis import RedisBackend
+
+from app.core.celery_app import celery_app
+
+
+def _use_backend(monkeypatch, backend):
+    # Celery.backend is a (thread-local) property; swap it for the whole app
+    monkeypatch.setattr(Celery, "backend", property(lambda self: backend))
+    return backend
+
+
+@pytest.fixture
+def redis_backend(monkeypatch):
+    """The production result backend (RedisBackend) on an in-process fake Redis."""
+    backend = RedisBackend(app=celery_app, url="redis://localhost:6379/0")
+    backend.__dict__["client"] = fakeredis.FakeRedis()
+    return _use_backend(monkeypatch, backend)
+
+
+@pytest.fixture
+def memory_backend(monkeypatch):
+    """What CELERY_EAGER runs on: cache+memory://."""
+    return _use_backend(monkeypatch, CacheBackend(app=celery_app, backend="memory"))
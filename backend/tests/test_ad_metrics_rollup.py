@@ -0,0 +1,87 @@
+"""
+ad_metrics_daily against a real Postgres: after inserts, updates and deletes on
+ad_metrics, the trigger-maintained rollup must equal a fresh GROUP BY.
+
+Uses the database from POSTGRES_* (like the benchmarks' --db) and is skipped when
+none is reachable. Everything runs in one transaction that is rolled back.
+"""
+import uuid
+
+import psycopg2
+import pytest
+
+from app.core.db import DB_CONFIG, init_db
+
+# libpq picks up PGPORT etc. from the environment
+PG_CONFIG = dict(DB_CONFIG, connect_timeout=3)
+
+
+@pytest.fixture(scope="module")
+def schema():
+    try:
+        init_db(psycopg2.connect(**PG_CONFIG))
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"no Postgres at {PG_CONFIG['host']}: {str(e).strip()}")
+
+
+@pytest.fixture
+def cur(schema):
+    conn = psycopg2.connect(**PG_CONFIG)
+    try:
+        with conn.cursor() as cur:
+            yield cur
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+def rollup(cur, campaigns):
+    cur.execute("""
+        SELECT campaign_name, date, impressions, clicks, spend, sales, row_count
+        FROM ad_metrics_daily WHERE campaign_name = ANY(%s) ORDER BY campaign_name, date;
+    """, (campaigns,))
+    return cur.fetchall()
+
+
+def recomputed(cur, campaigns):
+    cur.execute("""
+        SELECT campaign_name, date, SUM(COALESCE(impressions, 0)), SUM(COALESCE(clicks, 0)),
+               SUM(COALESCE(spend, 0)), SUM(COALESCE(sales, 0)), COUNT(*)
+        FROM ad_metrics WHERE campaign_name = ANY(%s)
+        GROUP BY campaign_name, date ORDER BY campaign_name, date;
+    """, (campaigns,))
+    return cur.fetchall()
+
+
+def test_rollup_matches_a_fresh_group_by(cur):
+    run = uuid.uuid4().hex[:8]
+    campaigns = [f"rollup-test-{run}-a", f"rollup-test-{run}-b"]
+    a, b = campaigns
+
+    # Bulk insert: several raw rows per (campaign, day), some NULL metrics
+    cur.execute("""
+        INSERT INTO ad_metrics (date, campaign_name, impressions, clicks, spend, sales)
+        SELECT DATE '2024-05-01' + (i % 3), CASE WHEN i % 2 = 0 THEN %s ELSE %s END,
+               i * 100, NULLIF(i % 4, 0) * 5, i * 1.25, i * 2.10
+        FROM generate_series(1, 12) AS i;
+    """, (a, b))
+    assert rollup(cur, campaigns) == recomputed(cur, campaigns)
+
+    # Update in place, and move rows to another day and campaign
+    cur.execute("UPDATE ad_metrics SET spend = spend + 10, clicks = NULL WHERE campaign_name = %s AND date = '2024-05-02';", (a,))
+    cur.execute("UPDATE ad_metrics SET date = '2024-05-10', campaign_name = %s WHERE campaign_name = %s AND date = '2024-05-03';", (a, b))
+    assert rollup(cur, campaigns) == recomputed(cur, campaigns)
+
+    # Delete some rows of a day, then every row of another
+    cur.execute("""
+        DELETE FROM ad_metrics WHERE id IN (
+            SELECT id FROM ad_metrics WHERE campaign_name = %s AND date = '2024-05-01' ORDER BY id LIMIT 1
+        );
+    """, (a,))
+    cur.execute("DELETE FROM ad_metrics WHERE campaign_name = %s AND date = '2024-05-02';", (b,))
+    assert rollup(cur, campaigns) == recomputed(cur, campaigns)
+
+    # Emptied days leave the rollup instead of lingering with zeros
+    cur.execute("DELETE FROM ad_metrics WHERE campaign_name = %s;", (b,))
+    assert [row[0] for row in rollup(cur, campaigns)] == [a] * len(recomputed(cur, [a]))
+    assert rollup(cur, campaigns) == recomputed(cur, campaigns)
@@ -0,0 +1,97 @@
+import sqlite3
+from typing import TypedDict
+
+import pytest
+from langgraph.graph import END, StateGraph
+
+from app.core import checkpoint
+from app.core.checkpoint import _memory_saver_class, _sqlite_saver_class, claim_approval, approval_claimed
+
+
+class CounterState(TypedDict):
+    count: int
+
+
+def counter_graph(saver):
+    graph = StateGraph(CounterState)
+    graph.add_node("step", lambda state: {"count": state["count"] + 1})
+    graph.set_entry_point("step")
+    graph.add_edge("step", END)
+    return graph.compile(checkpointer=saver)
+
+
+def memory_saver(**kwargs):
+    return _memory_saver_class()(**kwargs)
+
+
+def sqlite_saver(**kwargs):
+    saver = _sqlite_saver_class()(sqlite3.connect(":memory:", check_same_thread=False), **kwargs)
+    saver.setup()
+    return saver
+
+
+@pytest.mark.parametrize("make_saver", [memory_saver, sqlite_saver], ids=["memory", "sqlite"])
+def test_retention_keeps_the_newest_checkpoints(make_saver):
+    saver = make_saver(keep_last=3, max_age=0)
+    graph = counter_graph(saver)
+    config = {"configurable": {"thread_id": "jeff-1"}}
+
+    count = 0
+    for _ in range(6):  # every invoke writes several checkpoints (input, step, ...)
+        count = graph.invoke({"count": count}, config)["count"]
+
+    checkpoints = list(saver.list(config))
+    assert len(checkpoints) == 3
+    # The state a paused graph resumes from is the newest one
+    assert graph.get_state(config).values == {"count": 6}
+    assert checkpoints[0].checkpoint["id"] == graph.get_state(config).config["configurable"]["checkpoint_id"]
+
+
+@pytest.mark.parametrize("make_saver", [memory_saver, sqlite_saver], ids=["memory", "sqlite"])
+def test_retention_sweeps_idle_threads(make_saver, monkeypatch):
+    saver = make_saver(keep_last=3, max_age=60, sweep_interval=0)
+    graph = counter_graph(saver)
+    idle = {"configurable": {"thread_id": "sue-idle"}}
+    active = {"configurable": {"thread_id": "sue-active"}}
+
+    clock = [1_000_000.0]
+    monkeypatch.setattr(checkpoint.time, "time", lambda: clock[0])
+    graph.invoke({"count": 0}, idle)
+    clock[0] += 120
+    graph.invoke({"count": 0}, active)
+
+    assert list(saver.list(idle)) == []
+    assert graph.get_state(active).values == {"count": 1}
+
+
+def test_a_saver_missing_a_retention_hook_cannot_be_built():
+    from langgraph.checkpoint.memory import MemorySaver
+
+    class Incomplete(checkpoint.RetentionMixin, MemorySaver):
+        def _touch_and_trim(self, thread_id, checkpoint_ns):
+            pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+@pytest.fixture
+def local_claims(monkeypatch):
+    monkeypatch.setattr(checkpoint, "_local_claims", set())
+
+
+def test_claim_approval_once_in_process(memory_backend, local_claims):
+    assert not approval_claimed("sue-1")
+    assert claim_approval("sue-1") is True
+    assert claim_approval("sue-1") is False
+    assert approval_claimed("sue-1")
+    assert claim_approval("sue-2") is True
+
+
+def test_claim_approval_once_across_processes(redis_backend):
+    assert claim_approval("jeff-1") is True
+    assert claim_approval("jeff-1") is False
+    assert approval_claimed("jeff-1")
+    # The claim lives in Redis (shared by every API worker), and expires with the checkpoints
+    key = checkpoint.APPROVAL_CLAIM_PREFIX + "jeff-1"
+    assert 0 < redis_backend.client.ttl(key) <= checkpoint.CHECKPOINT_MAX_AGE
@@ -0,0 +1,103 @@
+import fakeredis
+import pytest
+
+from app.core.embedding_cache import REDIS_KEY_PREFIX, REDIS_STATS_KEY, EmbeddingCache, embedding_cache_key
+
+VECTOR_BYTES = 4 * 4  # 4 float32s
+
+
+class FakeEmbedder:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, text):
+        self.calls.append(text)
+        return [float(len(text)), 0.5, 0.25, 1.0]
+
+
+@pytest.fixture
+def embed():
+    return FakeEmbedder()
+
+
+def shared_cache(client, **kwargs):
+    """A cache whose Redis tier is `client` (a fake shared by the 'processes' of a test)."""
+    cache = EmbeddingCache(redis_url="", **kwargs)
+    cache._redis = client
+    return cache
+
+
+def test_whitespace_variants_share_one_embedding(embed):
+    cache = EmbeddingCache(redis_url="")
+    first = cache.get_or_create("  Where is my refund?\n", embed)
+
+    assert cache.get_or_create("Where is my refund?", embed) == first
+    # embed_fn sees exactly the text the key was computed from
+    assert embed.calls == ["Where is my refund?"]
+
+
+def test_lru_is_bounded_by_bytes(embed):
+    cache = EmbeddingCache(max_bytes=3 * VECTOR_BYTES, redis_url="")
+    for text in ["a", "b", "c"]:
+        cache.get_or_create(text, embed)
+    cache.get_or_create("a", embed)  # "a" is now the most recently used
+    cache.get_or_create("d", embed)  # over budget: evicts the least recently used, "b"
+
+    assert cache.stats()["entries"] == 3
+    assert cache.stats()["bytes"] == 3 * VECTOR_BYTES
+    assert cache.stats()["evictions"] == 1
+
+    embed.calls.clear()
+    for text in ["a", "c", "d"]:
+        cache.get_or_create(text, embed)
+    assert embed.calls == []
+    cache.get_or_create("b", embed)
+    assert embed.calls == ["b"]
+
+
+def test_vectors_larger_than_the_budget_are_not_kept(embed):
+    cache = EmbeddingCache(max_bytes=VECTOR_BYTES - 1, redis_url="")
+    cache.get_or_create("a", embed)
+    cache.get_or_create("a", embed)
+
+    assert embed.calls == ["a", "a"]
+    assert cache.stats()["bytes"] == 0
+
+
+def test_redis_tier_reads_through(embed):
+    client = fakeredis.FakeRedis()
+    worker_1, worker_2 = shared_cache(client), shared_cache(client)
+
+    vector = worker_1.get_or_create("refund policy", embed)
+    # Another process: found in Redis (float32 round trip), then served from its own memory
+    assert worker_2.get_or_create("refund policy", embed) == pytest.approx(vector)
+    assert worker_2.get_or_create("refund policy", embed) == pytest.approx(vector)
+
+    assert embed.calls == ["refund policy"]
+    assert worker_2.stats()["redis_hits"] == 1
+    assert worker_2.stats()["memory_hits"] == 1
+    assert 0 < client.ttl(REDIS_KEY_PREFIX + embedding_cache_key("refund policy")) <= worker_1.ttl
+
+
+def test_memory_hits_are_flushed_lazily(embed):
+    client = fakeredis.FakeRedis()
+    cache = shared_cache(client, stats_flush_seconds=10)
+    cache.get_or_create("refund policy", embed)
+    cache.get_or_create("refund policy", embed)
+
+    # The miss was flushed with its round trip; the memory hit waits for the next flush
+    assert client.hget(REDIS_STATS_KEY, "misses") == b"1"
+    assert client.hget(REDIS_STATS_KEY, "memory_hits") is None
+    assert cache.stats(shared=True)["memory_hits"] == 1
+    assert client.hget(REDIS_STATS_KEY, "memory_hits") == b"1"
+
+
+def test_redis_outage_falls_back_to_embedding(embed):
+    class DownRedis:
+        def __getattr__(self, name):
+            raise ConnectionError("redis down")
+
+    cache = shared_cache(DownRedis())
+    assert cache.get_or_create("refund policy", embed) == [13.0, 0.5, 0.25, 1.0]
+    assert cache.get_or_create("refund policy", embed) == [13.0, 0.5, 0.25, 1.0]
+    assert embed.calls == ["refund policy"]
@@ -0,0 +1,72 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.agents import jeff
+from benchmarks.fakes import FakeDDGS, Latency
+
+
+class CountingDDGS(FakeDDGS):
+    latency = Latency(50)  # long enough for concurrent lookups to overlap
+    queries = []
+    _lock = threading.Lock()
+
+    def text(self, query, max_results=5):
+        with self._lock:
+            self.queries.append(query)
+        return super().text(query, max_results)
+
+
+@pytest.fixture
+def ddgs(monkeypatch):
+    CountingDDGS.queries = []
+    monkeypatch.setattr(jeff, "DDGS", CountingDDGS)
+    monkeypatch.setattr(jeff, "search_cache", jeff.SearchCache())
+    monkeypatch.setattr(jeff, "search_throttle", jeff.SearchThrottle(min_interval=0))
+    return CountingDDGS
+
+
+def test_duplicate_niches_search_once(ddgs):
+    results = jeff.prospect_batch(["Quantum Widgets", "quantum widgets", "  QUANTUM   widgets "], per_niche=2)
+
+    assert list(results) == ["Quantum Widgets"]
+    assert len(results["Quantum Widgets"]) == 2
+    assert ddgs.queries == ["best quantum widgets brand company"]
+
+
+def test_concurrent_lookups_share_one_search(ddgs):
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        answers = list(pool.map(lambda _: jeff.web_search("Quantum Widgets brand", 3), range(8)))
+
+    assert len(ddgs.queries) == 1
+    assert all(answer == answers[0] for answer in answers)
+    # Each lookup counted once: the search that ran is the miss, everyone else hit
+    assert jeff.search_cache.stats()["misses"] == 1
+    assert jeff.search_cache.stats()["hits"] == 7
+
+
+def test_smaller_cached_search_is_a_miss(ddgs):
+    jeff.web_search("quantum widgets", 2)
+    assert len(jeff.web_search("quantum widgets", 5)) == 5
+    assert len(jeff.web_search("quantum widgets", 3)) == 3
+
+    assert len(ddgs.queries) == 2
+    assert jeff.search_cache.stats()["misses"] == 2
+    assert jeff.search_cache.stats()["hits"] == 1
+
+
+def test_failed_search_releases_waiters(ddgs, monkeypatch):
+    calls = []
+
+    def text(self, query, max_results=5):
+        calls.append(query)
+        if len(calls) == 1:
+            raise RuntimeError("rate limited")
+        return FakeDDGS.text(self, query, max_results)
+
+    monkeypatch.setattr(CountingDDGS, "text", text)
+    with pytest.raises(RuntimeError):
+        jeff.web_search("quantum widgets", 3)
+    # Nothing left in flight: the next lookup searches instead of waiting forever
+    assert len(jeff.web_search("quantum widgets", 3)) == 3
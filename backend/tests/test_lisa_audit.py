@@ -0,0 +1,123 @@
+"""
+lisa_task's incremental re-audits against the fixture storefront: an unchanged
+page (304, or the same bytes again) reuses the stored audit without parsing or
+calling the LLM; a changed one comes back with a diff. The seo_audits table is
+replaced by an in-memory stand-in.
+"""
+import pytest
+
+from app import worker
+from app.agents.lisa import diff_audits, fetch_page
+from benchmarks.fakes import FixtureSite
+
+KEYWORD = "running shoes"
+
+
+@pytest.fixture
+def site():
+    with FixtureSite(cards=5) as server:
+        yield server
+
+
+@pytest.fixture
+def history(monkeypatch):
+    """seo_audits as a dict; records what lisa_task saves."""
+    stored, saves = {}, []
+
+    def save_seo_audit(url, keyword, fetched, audit=None):
+        saves.append(audit)
+        if audit is not None:
+            stored[(url, keyword)] = {"etag": fetched["etag"], "last_modified": fetched["last_modified"],
+                                      "content_hash": fetched["content_hash"], "audit": audit,
+                                      "audited_at": "2024-05-01T00:00:00+00:00"}
+        else:
+            stored[(url, keyword)].update(etag=fetched["etag"], last_modified=fetched["last_modified"])
+
+    monkeypatch.setattr(worker, "load_seo_audit", lambda url, keyword: stored.get((url, keyword)))
+    monkeypatch.setattr(worker, "save_seo_audit", save_seo_audit)
+    return stored, saves
+
+
+@pytest.fixture
+def llm_calls(monkeypatch):
+    calls = []
+
+    def complete(prompt, **kwargs):
+        calls.append(prompt)
+        return "1. Add the keyword to the H1."
+
+    monkeypatch.setattr(worker.llm, "complete", complete)
+    return calls
+
+
+def test_first_audit_is_stored(site, history, llm_calls):
+    stored, _ = history
+    result = worker.lisa_task(site.product_url(1), KEYWORD)
+
+    assert result["status"] == "COMPLETED"
+    assert result["changed"] is True
+    assert result["diff"] is None
+    assert stored[(site.product_url(1), KEYWORD)]["audit"] == result["audit"]
+    assert len(llm_calls) == 1
+
+
+def test_not_modified_reuses_the_stored_audit(site, history, llm_calls):
+    stored, saves = history
+    first = worker.lisa_task(site.product_url(1), KEYWORD)
+    assert fetch_page(site.product_url(1), etag=stored[(site.product_url(1), KEYWORD)]["etag"])["status_code"] == 304
+
+    again = worker.lisa_task(site.product_url(1), KEYWORD)
+
+    assert again == {"status": "COMPLETED", "changed": False,
+                     "audited_at": "2024-05-01T00:00:00+00:00", "audit": first["audit"]}
+    assert len(llm_calls) == 1
+    assert saves[-1] is None  # only the validators / checked_at are refreshed
+
+
+def test_same_bytes_without_validators_is_unchanged(site, history, llm_calls):
+    stored, saves = history
+    first = worker.lisa_task(site.product_url(1), KEYWORD)
+    # A server that sends no ETag / Last-Modified: only the content hash can tell
+    stored[(site.product_url(1), KEYWORD)].update(etag=None, last_modified=None)
+
+    again = worker.lisa_task(site.product_url(1), KEYWORD)
+
+    assert again["changed"] is False
+    assert again["audit"] == first["audit"]
+    assert len(llm_calls) == 1
+    assert saves[-1] is None
+
+
+def test_changed_page_is_re_audited_with_a_diff(site, history, llm_calls):
+    worker.lisa_task(site.product_url(1), KEYWORD)
+    site._pages[1] = site.page(1).replace(b"<h1>Running Shoes 1</h1>", b"")  # new bytes, new ETag
+
+    result = worker.lisa_task(site.product_url(1), KEYWORD)
+
+    assert result["changed"] is True
+    assert result["diff"]["metrics"]["h1_found"] == {"before": True, "after": False}
+    assert "ERROR: Missing H1 Tag." in result["diff"]["new_issues"]
+    assert result["diff"]["score"]["delta"] < 0
+    assert len(llm_calls) == 2
+
+
+def test_diff_audits():
+    previous = {"score": 70, "metrics": {"word_count": 300, "density": "0.50%", "h1_found": True},
+                "issues": ["Title tag too short", "Low keyword density"]}
+    current = {"score": 85, "metrics": {"word_count": 450, "density": "0.50%", "h1_found": True, "new": 1},
+               "issues": ["Low keyword density", "Missing meta description"]}
+
+    assert diff_audits(previous, current) == {
+        "score": {"before": 70, "after": 85, "delta": 15},
+        "metrics": {"word_count": {"before": 300, "after": 450}, "new": {"before": None, "after": 1}},
+        "new_issues": ["Missing meta description"],
+        "resolved_issues": ["Title tag too short"],
+    }
+
+
+def test_diff_of_identical_audits_is_empty():
+    audit = {"score": 90, "metrics": {"word_count": 500}, "issues": ["Low keyword density"]}
+    assert diff_audits(audit, dict(audit)) == {
+        "score": {"before": 90, "after": 90, "delta": 0},
+        "metrics": {}, "new_issues": [], "resolved_issues": [],
+    }
@@ -0,0 +1,59 @@
+"""
+Lisa's site crawler against the local fixture storefront (benchmarks/fakes.py).
+
+Run from backend/:
+    pip install -r requirements-dev.txt && python -m pytest tests
+"""
+import asyncio
+
+import pytest
+
+from app.agents import lisa
+from benchmarks.fakes import FixtureSite
+
+
+@pytest.fixture
+def site():
+    with FixtureSite(cards=5) as server:
+        yield server
+
+
+def crawl(seed_url: str, max_pages: int):
+    # A crawl that loses its workers hangs on queue.join(): fail the test instead
+    return asyncio.run(asyncio.wait_for(
+        lisa.crawl_site(seed_url, "running shoes", max_pages=max_pages, min_delay=0), timeout=30,
+    ))
+
+
+def test_crawl_follows_links_up_to_max_pages(site):
+    report = crawl(site.product_url(1), max_pages=4)
+
+    assert report["summary"]["pages_audited"] == 4
+    assert report["summary"]["pages_failed"] == 0
+    assert {p["url"] for p in report["pages"]} == {site.product_url(i) for i in range(1, 5)}
+    assert all(p["title"].startswith("Running Shoes") for p in report["pages"])
+
+
+def test_crawl_reports_missing_pages(site):
+    report = crawl(f"{site.url}/missing", max_pages=3)
+
+    assert report["summary"]["pages_audited"] == 0
+    assert report["pages"] == [
+        {"url": f"{site.url}/missing", "status": "FAILED", "error": "Site returned status 404"},
+    ]
+
+
+def test_page_errors_fail_the_page_not_the_crawl(site, monkeypatch):
+    score_page = lisa.score_page
+
+    def flaky_score_page(page, keyword):
+        if page["title"].startswith("Running Shoes 2 "):
+            raise UnicodeError("bad page")
+        return score_page(page, keyword)
+
+    monkeypatch.setattr(lisa, "score_page", flaky_score_page)
+    report = crawl(site.product_url(1), max_pages=4)
+
+    failed = [p for p in report["pages"] if p["status"] == "FAILED"]
+    assert failed == [{"url": site.product_url(2), "status": "FAILED", "error": "UnicodeError: bad page"}]
+    assert report["summary"]["pages_audited"] == 3
@@ -0,0 +1,69 @@
+"""
+PageAnalyzer (the streaming parser) must read pages the way the BeautifulSoup
+code it replaced did: same title, H1, meta description, word and keyword counts.
+"""
+import pytest
+
+from app.agents.lisa import analyze_chunks
+from benchmarks.bench_lisa_parser import KEYWORD, bs4_reference, make_page
+from benchmarks.fakes import product_page
+
+FIXTURES = {
+    "category page": make_page(25),
+    "product page": product_page(7, cards=10),
+    "markup edge cases": """<!DOCTYPE html>
+        <html><head>
+          <title>Running Shoes &amp; Trail Gear</title>
+          <meta name="description" content="Caf&eacute; &quot;running shoes&quot; guide">
+          <style>h1 { color: red } /* running shoes */</style>
+          <script type="application/ld+json">{"name": "running shoes"}</script>
+        </head><body>
+          <!-- running shoes in a comment -->
+          <h1>  Best <em>Running</em>
+             <span>Shoes</span> 2024 </h1>
+          <p>Running<b> shoes</b> for runners: running&nbsp;shoes, RUNNING SHOES.</p>
+          <template><p>running shoes</p></template>
+          <p>Überleichte Laufschuhe – 日本語のテキスト – émoji 🏃 running shoes</p>
+          <p>Unclosed paragraph <div>nested running shoes
+          <br/><img src="/a.png" alt="running shoes"/>
+        </body></html>""".encode("utf-8"),
+    "no title, h1 or meta": b"<html><body><p>Just text about running shoes.</p></body></html>",
+    "second h1 and title ignored": b"""<html><head><title>First</title><title>Second</title></head>
+        <body><h1>One running shoes</h1><h1>Two</h1></body></html>""",
+    "title with markup": b"<title>Running <b>Shoes</b></title><h1></h1><p>running shoes</p>",
+}
+
+
+def chunked(html: bytes, size: int):
+    return [html[i:i + size] for i in range(0, len(html), size)]
+
+
+@pytest.mark.parametrize("name", FIXTURES)
+@pytest.mark.parametrize("chunk_size", [1, 7, 64 * 1024])
+def test_matches_beautifulsoup(name, chunk_size):
+    html = FIXTURES[name]
+    # Small chunks split tags, entities and multi-byte characters mid-way
+    result = analyze_chunks(chunked(html, chunk_size), KEYWORD)
+
+    assert {field: result[field] for field in bs4_reference(html)} == bs4_reference(html)
+
+
+def test_keyword_across_tags_is_counted():
+    result = analyze_chunks(chunked(FIXTURES["markup edge cases"], 3), KEYWORD)
+    # title, the split H1, Running<b> shoes</b>, RUNNING SHOES, the 🏃 line and the unclosed div;
+    # not running&nbsp;shoes, the comment, <style>, <script>, <template> or the alt text
+    assert result["keyword_count"] == 6
+    assert result["title"] == "Running Shoes & Trail Gear"
+    assert result["h1"] == "BestRunningShoes2024"  # like get_text(strip=True)
+
+
+def test_links_are_resolved_against_the_page():
+    html = b'<a href="/products/2">two</a><a href="https://other.example/x">x</a><a>none</a><a href=""/>'
+    result = analyze_chunks([html], base_url="https://shop.example/products/1")
+    assert result["links"] == ["https://shop.example/products/2", "https://other.example/x"]
+
+
+def test_preview_is_capped():
+    result = analyze_chunks([make_page(200)], KEYWORD)
+    assert len(result["preview"]) == 1500
+    assert result["preview"].startswith("Running Shoes | Example Store Running Shoes")
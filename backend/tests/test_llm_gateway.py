@@ -0,0 +1,138 @@
+"""TokenBucket and the gateway's retry/backoff on a fake clock: nothing here really sleeps."""
+import asyncio
+
+import httpx
+import openai
+import pytest
+
+from app.core import llm as llm_module
+from app.core.llm import LLMGateway, TokenBucket
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """time.monotonic() that only moves when the code under test sleeps. Yields the list of sleeps."""
+    now = [1000.0]
+    sleeps = []
+    real_sleep = asyncio.sleep
+
+    async def fake_sleep(delay, *args):
+        sleeps.append(delay)
+        now[0] += delay
+        await real_sleep(0)
+
+    monkeypatch.setattr(llm_module.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(llm_module.asyncio, "sleep", fake_sleep)
+    return sleeps
+
+
+def test_token_bucket_waits_for_refill(clock):
+    async def scenario():
+        bucket = TokenBucket(per_minute=60)  # 1 unit / second
+        assert await bucket.acquire(60) == 0
+        assert await bucket.acquire(1) == pytest.approx(1.0)
+        assert await bucket.acquire(30) == pytest.approx(30.0)
+        # Larger than the bucket: capped at capacity instead of waiting forever
+        assert await bucket.acquire(1000) == pytest.approx(60.0)
+
+    asyncio.run(scenario())
+    assert sum(clock) == pytest.approx(91.0)
+
+
+def test_token_bucket_adjust(clock):
+    async def scenario():
+        bucket = TokenBucket(per_minute=60)
+        await bucket.acquire(60)
+        bucket.adjust(10)  # over-reserved: give back
+        assert await bucket.acquire(10) == 0
+        bucket.adjust(-20)  # under-reserved: the next caller pays for it
+        assert await bucket.acquire(1) == pytest.approx(21.0)
+
+    asyncio.run(scenario())
+
+
+def api_error(cls, status, headers=None):
+    response = httpx.Response(status, headers=headers or {},
+                              request=httpx.Request("POST", "https://api.openai.com/v1/chat/completions"))
+    return cls(f"HTTP {status}", response=response, body=None)
+
+
+class FakeClient:
+    """make_request for _call: raises the queued errors in order, then answers."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    async def create(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+def call(gateway, client, times=1):
+    """`times` sequential _call()s on one set of primitives (what _init_primitives builds). Last result."""
+    async def scenario():
+        gateway._semaphore = asyncio.Semaphore(gateway.max_concurrency)
+        gateway._request_bucket = TokenBucket(gateway.requests_per_minute)
+        gateway._token_bucket = TokenBucket(gateway.tokens_per_minute)
+        for _ in range(times):
+            result = await gateway._call(client.create, 10)
+        return result
+
+    return asyncio.run(scenario())
+
+
+@pytest.fixture
+def max_backoff(monkeypatch):
+    # Full jitter picks uniform(0, cap); take the cap so delays are predictable
+    monkeypatch.setattr(llm_module.random, "uniform", lambda low, high: high)
+
+
+def test_rate_limits_are_retried_with_exponential_backoff(clock, max_backoff):
+    gateway = LLMGateway(max_retries=4)
+    client = FakeClient(api_error(openai.RateLimitError, 429), api_error(openai.RateLimitError, 429),
+                        api_error(openai.InternalServerError, 503))
+
+    assert call(gateway, client) == "ok"
+    assert client.calls == 4
+    assert clock == [1.0, 2.0, 4.0]  # LLM_BACKOFF_BASE * 2 ** attempt
+    assert gateway.stats()["retries"] == 3
+    assert gateway.stats()["failures"] == 0
+
+
+def test_retry_after_header_wins_over_backoff(clock, max_backoff):
+    client = FakeClient(api_error(openai.RateLimitError, 429, {"retry-after": "7"}))
+
+    assert call(LLMGateway(max_retries=4), client) == "ok"
+    assert clock == [7.0]
+
+
+def test_gives_up_after_max_retries(clock, max_backoff):
+    gateway = LLMGateway(max_retries=2)
+    client = FakeClient(*[api_error(openai.RateLimitError, 429) for _ in range(5)])
+
+    with pytest.raises(openai.RateLimitError):
+        call(gateway, client)
+    assert client.calls == 3
+    assert gateway.stats()["failures"] == 1
+
+
+def test_client_errors_are_not_retried(clock):
+    gateway = LLMGateway(max_retries=4)
+    client = FakeClient(api_error(openai.BadRequestError, 400))
+
+    with pytest.raises(openai.BadRequestError):
+        call(gateway, client)
+    assert client.calls == 1
+    assert clock == []
+
+
+def test_request_bucket_throttles_calls(clock):
+    gateway = LLMGateway(requests_per_minute=2, tokens_per_minute=1000)
+
+    # The third request within the minute waits for the bucket: 1 request / 30s
+    assert call(gateway, FakeClient(), times=3) == "ok"
+    assert clock == [pytest.approx(30.0)]
+    assert gateway.stats()["throttled_seconds"] == pytest.approx(30.0)
@@ -0,0 +1,51 @@
+import pytest
+
+from app.agents.penny import RepricingEngine, UNDERCUT_BY
+from app.core.mock_db import MOCK_INVENTORY
+from benchmarks.bench_penny import loop_reprice  # the old per-SKU endpoint logic
+
+INVENTORY = {
+    "no-competition": {"price": 20.00, "competitor_price": 25.00, "min_price": 15.00},
+    "same-price": {"price": 20.00, "competitor_price": 20.00, "min_price": 15.00},
+    "undercut": {"price": 20.00, "competitor_price": 18.49, "min_price": 15.00},
+    "below-floor": {"price": 20.00, "competitor_price": 14.99, "min_price": 15.00},
+    "at-floor": {"price": 20.00, "competitor_price": 15.05, "min_price": 15.00},
+    "just-under-floor": {"price": 20.00, "competitor_price": 15.04, "min_price": 15.00},
+    "cents": {"price": 0.10, "competitor_price": 0.09, "min_price": 0.01},
+    "undercut-2": {"price": 129.99, "competitor_price": 119.95, "min_price": 99.00},
+}
+
+
+def test_decisions_match_the_per_sku_loop():
+    engine = RepricingEngine.from_inventory(INVENTORY)
+
+    assert list(engine.events()) == loop_reprice(INVENTORY)
+    assert [e["sku"] for e in engine.events()] == [
+        "undercut", "below-floor", "at-floor", "just-under-floor", "cents", "undercut-2",
+    ]
+    assert next(e for e in engine.events() if e["sku"] == "undercut")["new_price"] == round(18.49 - UNDERCUT_BY, 2)
+
+
+def test_summary_counts_the_loop_events():
+    engine = RepricingEngine.from_inventory(INVENTORY)
+    logs = loop_reprice(INVENTORY)
+
+    assert engine.summary() == {
+        "skus_checked": len(INVENTORY),
+        "events": len(logs),
+        "decrease_price": sum(e["action"] == "DECREASE_PRICE" for e in logs),
+        "hold": sum(e["action"] == "HOLD" for e in logs),
+    }
+
+
+@pytest.mark.parametrize("offset, limit", [(0, 2), (2, 2), (4, 10), (6, 5), (0, None)])
+def test_event_pages_are_slices_of_the_loop(offset, limit):
+    engine = RepricingEngine.from_inventory(INVENTORY)
+    end = None if limit is None else offset + limit
+    assert list(engine.events(offset, limit)) == loop_reprice(INVENTORY)[offset:end]
+
+
+def test_mock_catalog_matches_the_loop():
+    engine = RepricingEngine.from_inventory(MOCK_INVENTORY)
+    assert list(engine.events()) == loop_reprice(MOCK_INVENTORY)
+    assert engine.event_count() == len(loop_reprice(MOCK_INVENTORY))
@@ -0,0 +1,79 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app.core import result_serializer
+from app.core.celery_app import CELERY_RESULT_EXPIRES, _expire_result, result_ttl_for
+from app.core.result_serializer import COMPRESSED, RAW, dumps, is_compressed, loads
+from app.core.task_status import result_backend_memory
+
+
+# --- msgpack-z wire format ---
+def test_small_payloads_are_raw_msgpack():
+    data = dumps({"status": "COMPLETED", "leads": ["Brand: Acme"]})
+    assert data[:1] == RAW
+    assert not is_compressed(data)
+    assert loads(data) == {"status": "COMPLETED", "leads": ["Brand: Acme"]}
+
+
+def test_large_payloads_are_compressed(monkeypatch):
+    monkeypatch.setattr(result_serializer, "RESULT_COMPRESS_THRESHOLD", 64)
+    report = {"audit": "Add the keyword to the H1. " * 50}
+    data = dumps(report)
+    assert data[:1] == COMPRESSED
+    assert is_compressed(data)
+    assert len(data) < len(json.dumps(report))
+    assert loads(data) == report
+
+
+def test_results_written_as_json_still_decode():
+    legacy = json.dumps({"status": "COMPLETED", "n": 3})
+    assert loads(legacy) == {"status": "COMPLETED", "n": 3}
+    assert loads(legacy.encode("utf-8")) == {"status": "COMPLETED", "n": 3}
+    assert not is_compressed(legacy.encode("utf-8"))
+
+
+def test_reporting_types_are_converted():
+    import datetime
+    import decimal
+    import uuid
+
+    value = {"day": datetime.date(2024, 5, 1), "spend": decimal.Decimal("12.50"),
+             "id": uuid.UUID(int=1), "skus": ("A", "B")}
+    assert loads(dumps(value)) == {"day": "2024-05-01", "spend": 12.5,
+                                   "id": "00000000-0000-0000-0000-000000000001", "skus": ["A", "B"]}
+    with pytest.raises(TypeError):
+        dumps({"obj": object()})
+
+
+# --- Per-agent result expiry ---
+def test_result_ttl_per_agent():
+    assert result_ttl_for("app.worker.penny_task") == 3600
+    assert result_ttl_for("app.worker.lisa_site_audit_task") == 21600
+    assert result_ttl_for("app.worker.jeff_task") == CELERY_RESULT_EXPIRES
+    assert result_ttl_for("unrouted") == CELERY_RESULT_EXPIRES
+
+
+def test_expire_hook_shortens_the_stored_result(redis_backend):
+    redis_backend.store_result("penny-1", {"ok": True}, "SUCCESS")
+    redis_backend.store_result("jeff-1", {"ok": True}, "SUCCESS")
+    key = redis_backend.get_key_for_task
+
+    _expire_result(task_id="penny-1", task=SimpleNamespace(name="app.worker.penny_task", ignore_result=False))
+    _expire_result(task_id="jeff-1", task=SimpleNamespace(name="app.worker.jeff_task", ignore_result=False))
+
+    assert 3590 < redis_backend.client.ttl(key("penny-1")) <= 3600
+    # Default TTL: left as result_expires wrote it
+    assert redis_backend.client.ttl(key("jeff-1")) > 3600
+
+
+def test_expire_hook_skips_ignored_results(redis_backend):
+    redis_backend.store_result("penny-2", {"ok": True}, "SUCCESS")
+    _expire_result(task_id="penny-2", task=SimpleNamespace(name="app.worker.penny_task", ignore_result=True))
+    assert redis_backend.client.ttl(redis_backend.get_key_for_task("penny-2")) > 3600
+
+
+# --- /results/memory ---
+def test_memory_report_unsupported_on_the_eager_backend(memory_backend):
+    assert result_backend_memory() == {"backend": "CacheBackend", "supported": False}
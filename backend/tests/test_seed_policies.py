@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+from seed_policies import batched, content_hash, read_policies
+
+
+def write(tmp_path, name, content):
+    path = tmp_path / name
+    path.write_text(content, encoding="utf-8")
+    return str(path)
+
+
+def test_jsonl_records(tmp_path):
+    path = write(tmp_path, "sops.jsonl", "\n".join([
+        json.dumps({"key": "refund", "text": "  Refunds within 30 days.  "}),
+        "",
+        json.dumps({"text": "Ship in 5-7 business days."}),
+        json.dumps({"key": "blank", "text": "   "}),
+        json.dumps({"key": "warranty", "text": "1-year warranty.", "owner": "legal"}),
+    ]) + "\n")
+
+    assert list(read_policies(path)) == [
+        ("refund", "Refunds within 30 days."),
+        (None, "Ship in 5-7 business days."),
+        ("warranty", "1-year warranty."),
+    ]
+
+
+def test_jsonl_without_text_fails_loudly(tmp_path):
+    path = write(tmp_path, "sops.jsonl", json.dumps({"key": "refund"}) + "\n")
+    with pytest.raises(KeyError):
+        list(read_policies(path))
+
+
+def test_paragraphs(tmp_path):
+    path = write(tmp_path, "sops.txt", (
+        "\n\n"
+        "Refund Policy: full refund\n"
+        "  within 30 days.\n"
+        "\n   \n\n"
+        "Shipping Policy: 5-7 days.\n"
+        "\n"
+        "Warranty: 1 year."  # no trailing newline
+    ))
+
+    assert list(read_policies(path)) == [
+        (None, "Refund Policy: full refund within 30 days."),
+        (None, "Shipping Policy: 5-7 days."),
+        (None, "Warranty: 1 year."),
+    ]
+
+
+def test_rewrapped_paragraph_keeps_its_key(tmp_path):
+    # Paragraph keys are content hashes: re-wrapping lines must not look like an edit
+    # (a new row to embed, and the old one pruned)
+    a = write(tmp_path, "a.txt", "Refund Policy: full refund within 30 days.\n")
+    b = write(tmp_path, "b.txt", "Refund Policy: full refund\n    within 30 days.\n")
+    [(_, text_a)], [(_, text_b)] = read_policies(a), read_policies(b)
+    assert content_hash(text_a) == content_hash(text_b)
+
+
+@pytest.mark.parametrize("items, size, expected", [
+    (range(7), 3, [[0, 1, 2], [3, 4, 5], [6]]),
+    (range(6), 3, [[0, 1, 2], [3, 4, 5]]),
+    (range(2), 5, [[0, 1]]),
+    ([], 3, []),
+])
+def test_batched(items, size, expected):
+    assert list(batched(items, size)) == expected
+
+
+def test_batched_streams():
+    consumed = []
+
+    def source():
+        for i in range(10):
+            consumed.append(i)
+            yield i
+
+    batches = batched(source(), 4)
+    assert next(batches) == [0, 1, 2, 3]
+    assert consumed == [0, 1, 2, 3]
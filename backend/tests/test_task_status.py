@@ -0,0 +1,60 @@
+import pytest
+
+from app.core.task_status import bulk_task_status
+
+
+def _store(backend):
+    backend.store_result("done", {"leads": ["Brand: Acme"]}, "SUCCESS")
+    backend.store_result("broken", ValueError("no data"), "FAILURE")
+
+
+@pytest.mark.parametrize("backend_fixture", ["redis_backend", "memory_backend"])
+def test_bulk_task_status(backend_fixture, request):
+    _store(request.getfixturevalue(backend_fixture))
+
+    statuses = bulk_task_status(["done", "broken", "unknown", "done"], include_result=True)
+
+    assert list(statuses) == ["done", "broken", "unknown"]
+    assert statuses["done"] == {"status": "SUCCESS", "result": {"leads": ["Brand: Acme"]}}
+    assert statuses["broken"]["status"] == "FAILURE"
+    assert "no data" in statuses["broken"]["result"]
+    assert statuses["unknown"] == {"status": "PENDING"}
+
+
+def test_bulk_task_status_without_results(redis_backend):
+    _store(redis_backend)
+    assert bulk_task_status(["done"]) == {"done": {"status": "SUCCESS"}}
+
+
+def test_bulk_task_status_chunks(redis_backend, monkeypatch):
+    monkeypatch.setattr("app.core.task_status.MGET_CHUNK_SIZE", 2)
+    for i in range(5):
+        redis_backend.store_result(f"t{i}", i, "SUCCESS")
+
+    statuses = bulk_task_status([f"t{i}" for i in range(6)], include_result=True)
+
+    assert [s.get("result") for s in statuses.values()] == [0, 1, 2, 3, 4, None]
+
+
+def test_batch_status_endpoint_in_eager_mode(memory_backend):
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    _store(memory_backend)
+    response = TestClient(app).post("/tasks/batch-status", json={"task_ids": ["done", "unknown"]})
+
+    assert response.status_code == 200
+    assert response.json()["counts"] == {"SUCCESS": 1, "PENDING": 1}
+
+
+def test_events_stream_without_progress_redis(memory_backend, monkeypatch):
+    from fastapi.testclient import TestClient
+    from app import main
+
+    monkeypatch.setattr(main, "PROGRESS_REDIS_URL", "")
+    _store(memory_backend)
+    response = TestClient(main.app).get("/tasks/done/events")
+
+    # One state event, then the stream ends (clients poll /tasks/{id} if it isn't final)
+    assert response.status_code == 200
+    assert response.text == 'event: state\ndata: {"task_id": "done", "seq": 0, "type": "state", "state": "SUCCESS"}\n\n'
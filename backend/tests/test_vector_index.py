@@ -0,0 +1,67 @@
+import psycopg2
+import psycopg2.errors
+import pytest
+
+from app.core import vector_index
+from app.core.db import PoolTimeout
+from app.core.vector_index import InMemoryVectorIndex, ensure_policy_index
+
+
+class RecordingCursor:
+    """Answers ensure_policy_index's two lookups (row count, existing index options)."""
+
+    def __init__(self, rows: int, reloptions=None):
+        self.results = [(rows,), None if reloptions is None else (reloptions,)]
+        self.statements = []
+
+    def execute(self, sql, params=None):
+        self.statements.append(" ".join(sql.split()))
+
+    def fetchone(self):
+        return self.results.pop(0)
+
+    def created(self):
+        return [s for s in self.statements if s.startswith("CREATE INDEX")]
+
+
+@pytest.mark.parametrize("reloptions, rebuild, expect_build", [
+    (None, False, True),            # no index yet
+    (["lists=5"], False, False),    # up to date: keep it
+    (["lists=2"], False, True),     # the table grew
+    (["lists=5"], True, True),      # re-cluster after a bulk load
+])
+def test_ivfflat_index_rebuilt_only_when_needed(reloptions, rebuild, expect_build):
+    cur = RecordingCursor(rows=5000, reloptions=reloptions)
+    ensure_policy_index(cur, "ivfflat", rebuild=rebuild)
+    assert len(cur.created()) == (1 if expect_build else 0)
+
+
+@pytest.fixture
+def mock_policies(monkeypatch):
+    index = InMemoryVectorIndex()
+    index.add(["Refunds within 30 days", "Ship in 2 days"], [[1.0, 0.0], [0.0, 1.0]])
+    monkeypatch.setattr(vector_index, "embed_text", lambda text: [1.0, 0.1])
+    monkeypatch.setattr(vector_index, "get_mock_policy_index", lambda: index)
+
+
+@pytest.mark.parametrize("error", [
+    psycopg2.OperationalError("connection refused"),
+    PoolTimeout("no connection"),
+    psycopg2.errors.UndefinedTable('relation "policies" does not exist'),
+    psycopg2.errors.UndefinedObject('type "vector" does not exist'),
+])
+def test_retrieve_falls_back_without_pgvector(mock_policies, monkeypatch, error):
+    def search_policies(*args):
+        raise error
+
+    monkeypatch.setattr(vector_index, "search_policies", search_policies)
+    assert [p["text"] for p in vector_index.retrieve_policies("refund?", k=1)] == ["Refunds within 30 days"]
+
+
+def test_broken_queries_are_not_hidden(mock_policies, monkeypatch):
+    def search_policies(*args):
+        raise psycopg2.errors.SyntaxError("syntax error at or near")
+
+    monkeypatch.setattr(vector_index, "search_policies", search_policies)
+    with pytest.raises(psycopg2.errors.SyntaxError):
+        vector_index.retrieve_policies("refund?")
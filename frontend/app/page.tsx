@@ -51,6 +51,7 @@ function JeffCard() {
     // Workflow states: idle, searching, pending_approval, sending, completed, rejected
     const [workflowState, setWorkflowState] = useState<'idle' | 'searching' | 'pending_approval' | 'sending' | 'completed' | 'rejected'>('idle')
     const [workflowData, setWorkflowData] = useState<{
+        session_id?: string
         prospect?: { name: string; url: string; snippet: string }
         email_draft?: string
         final_email?: string
@@ -62,6 +63,7 @@ function JeffCard() {
         onMutate: () => setWorkflowState('searching'),
         onSuccess: (res) => {
             setWorkflowData({
+                session_id: res.data.session_id,
                 prospect: res.data.prospect,
                 email_draft: res.data.email_draft,
             })
@@ -73,7 +75,7 @@ function JeffCard() {
 
     // Approve workflow
     const approveMutation = useMutation({
-        mutationFn: () => jeffApi.approve(editedEmail),
+        mutationFn: () => jeffApi.approve(workflowData?.session_id ?? '', editedEmail),
         onMutate: () => setWorkflowState('sending'),
         onSuccess: (res) => {
             setWorkflowData(prev => ({ ...prev, final_email: res.data.final_email }))
@@ -84,7 +86,7 @@ function JeffCard() {
 
     // Reject workflow
     const rejectMutation = useMutation({
-        mutationFn: () => jeffApi.reject(),
+        mutationFn: () => jeffApi.reject(workflowData?.session_id ?? ''),
         onSuccess: () => {
             setWorkflowState('rejected')
             setTimeout(() => {
@@ -448,6 +450,7 @@ function SueCard() {
     // Workflow states: idle, drafting, pending_approval, publishing, completed, rejected
     const [workflowState, setWorkflowState] = useState<'idle' | 'drafting' | 'pending_approval' | 'publishing' | 'completed' | 'rejected'>('idle')
     const [workflowData, setWorkflowData] = useState<{
+        session_id?: string
         policy_retrieved?: string
         draft_reply?: string
         final_reply?: string
@@ -459,6 +462,7 @@ function SueCard() {
         onMutate: () => setWorkflowState('drafting'),
         onSuccess: (res) => {
             setWorkflowData({
+                session_id: res.data.session_id,
                 policy_retrieved: res.data.policy_retrieved,
                 draft_reply: res.data.draft_reply,
             })
@@ -470,7 +474,7 @@ function SueCard() {
 
     // Approve workflow
     const approveMutation = useMutation({
-        mutationFn: () => sueApi.approve(editedReply),
+        mutationFn: () => sueApi.approve(workflowData?.session_id ?? '', editedReply),
         onMutate: () => setWorkflowState('publishing'),
         onSuccess: (res) => {
             setWorkflowData(prev => ({ ...prev, final_reply: res.data.final_reply }))
@@ -481,7 +485,7 @@ function SueCard() {
 
     // Reject workflow
     const rejectMutation = useMutation({
-        mutationFn: () => sueApi.reject(),
+        mutationFn: () => sueApi.reject(workflowData?.session_id ?? ''),
         onSuccess: () => {
             setWorkflowState('rejected')
             setTimeout(() => {
@@ -20,8 +20,48 @@ export interface TaskStatus {
     result: unknown
 }
 
+// HITL workflows run in a worker: start/approve return a session handle immediately
+export interface WorkflowSession {
+    agent: string
+    status: string
+    session_id: string
+    task_id: string
+    message: string
+}
+
+// Resolves once the worker task finishes (via the task's SSE progress stream).
+// If the stream fails (no progress Redis, proxy cut it), polls /tasks/{id} instead.
+const TASK_POLL_INTERVAL_MS = 3000
+
+const waitForTask = (taskId: string) =>
+    new Promise<void>((resolve, reject) => {
+        const poll = async () => {
+            try {
+                const { data } = await api.get<TaskStatus>(`/tasks/${taskId}`)
+                if (FINAL_TASK_STATES.includes(data.status)) resolve()
+                else setTimeout(poll, TASK_POLL_INTERVAL_MS)
+            } catch (err) {
+                reject(err)
+            }
+        }
+        const stop = subscribeToTask(
+            taskId,
+            (event) => {
+                if (event.type === 'state' && event.state && FINAL_TASK_STATES.includes(event.state)) {
+                    stop()
+                    resolve()
+                }
+            },
+            () => {
+                stop()
+                poll()
+            },
+        )
+    })
+
 export interface JeffWorkflowResponse {
     agent: string
+    session_id: string
     status: string
     prospect: {
         name: string
@@ -34,11 +74,18 @@ export interface JeffWorkflowResponse {
 
 export interface JeffApproveResponse {
     agent: string
+    session_id: string
     status: string
     final_email: string
     message: string
 }
 
+export interface ProspectBatchRequest {
+    niches: string[]
+    min_revenue?: number
+    per_niche?: number
+}
+
 export const jeffApi = {
     // Legacy Celery-based endpoint (for reference)
     startCampaign: (data: CampaignRequest) =>
@@ -47,15 +94,29 @@ export const jeffApi = {
     getTaskStatus: (taskId: string) =>
         api.get<TaskStatus>(`/tasks/${taskId}`),
 
+    prospectBatch: (data: ProspectBatchRequest) =>
+        api.post('/agents/jeff/prospect-batch', data),
+
     // HITL Workflow endpoints
-    startWorkflow: (data: CampaignRequest) =>
-        api.post<JeffWorkflowResponse>('/agents/jeff/start-workflow', data),
+    getSession: <T = JeffWorkflowResponse>(sessionId: string) =>
+        api.get<T>(`/agents/jeff/sessions/${sessionId}`),
+
+    startWorkflow: async (data: CampaignRequest) => {
+        const { data: session } = await api.post<WorkflowSession>('/agents/jeff/start-workflow', data)
+        await waitForTask(session.task_id)
+        const res = await jeffApi.getSession(session.session_id)
+        if (res.data.status !== 'PENDING_APPROVAL') throw new Error(res.data.message)
+        return res
+    },
 
-    approve: (edited_email: string) =>
-        api.post<JeffApproveResponse>('/agents/jeff/approve', { edited_email }),
+    approve: async (session_id: string, edited_email: string) => {
+        const { data: session } = await api.post<WorkflowSession>('/agents/jeff/approve', { session_id, edited_email })
+        await waitForTask(session.task_id)
+        return jeffApi.getSession<JeffApproveResponse>(session_id)
+    },
 
-    reject: () =>
-        api.post('/agents/jeff/reject'),
+    reject: (session_id: string) =>
+        api.post('/agents/jeff/reject', { session_id }),
 }
 
 // --- Penny (Pricing Agent) ---
@@ -70,6 +131,8 @@ export interface PricingLog {
 export interface PennyResponse {
     agent: string
     optimization_events: PricingLog[]
+    total_events: number
+    next_offset: number | null
 }
 
 export interface PricingAnalysisRequest {
@@ -80,8 +143,8 @@ export interface PricingAnalysisRequest {
 }
 
 export const pennyApi = {
-    getRepricingLog: () =>
-        api.get<PennyResponse>('/agents/penny/repricing-log'),
+    getRepricingLog: (offset = 0, limit?: number) =>
+        api.get<PennyResponse>('/agents/penny/repricing-log', { params: { offset, limit } }),
 
     analyzePricing: (data: PricingAnalysisRequest) =>
         api.post('/agents/penny/analyze', data),
@@ -99,6 +162,10 @@ export const adamApi = {
     optimizeCampaign: (data: AdCampaignRequest) =>
         api.post('/agents/adam/optimize', data),
 
+    // Whole account in one task (LLM reasoning only for non-HOLD campaigns)
+    optimizePortfolio: () =>
+        api.post('/agents/adam/optimize-portfolio'),
+
     getTaskStatus: (taskId: string) =>
         api.get<TaskStatus>(`/tasks/${taskId}`),
 }
@@ -111,6 +178,7 @@ export interface TicketRequest {
 
 export interface SueWorkflowResponse {
     agent: string
+    session_id: string
     status: string
     policy_retrieved: string
     draft_reply: string
@@ -119,6 +187,7 @@ export interface SueWorkflowResponse {
 
 export interface SueApproveResponse {
     agent: string
+    session_id: string
     status: string
     final_reply: string
     message: string
@@ -133,14 +202,25 @@ export const sueApi = {
         api.get<TaskStatus>(`/tasks/${taskId}`),
 
     // HITL Workflow endpoints
-    startWorkflow: (data: TicketRequest) =>
-        api.post<SueWorkflowResponse>('/agents/sue/start-workflow', data),
+    getSession: <T = SueWorkflowResponse>(sessionId: string) =>
+        api.get<T>(`/agents/sue/sessions/${sessionId}`),
+
+    startWorkflow: async (data: TicketRequest) => {
+        const { data: session } = await api.post<WorkflowSession>('/agents/sue/start-workflow', data)
+        await waitForTask(session.task_id)
+        const res = await sueApi.getSession(session.session_id)
+        if (res.data.status !== 'PENDING_APPROVAL') throw new Error(res.data.message)
+        return res
+    },
 
-    approve: (edited_reply: string) =>
-        api.post<SueApproveResponse>('/agents/sue/approve', { edited_reply }),
+    approve: async (session_id: string, edited_reply: string) => {
+        const { data: session } = await api.post<WorkflowSession>('/agents/sue/approve', { session_id, edited_reply })
+        await waitForTask(session.task_id)
+        return sueApi.getSession<SueApproveResponse>(session_id)
+    },
 
-    reject: () =>
-        api.post('/agents/sue/reject'),
+    reject: (session_id: string) =>
+        api.post('/agents/sue/reject', { session_id }),
 }
 
 // --- Ivan (Inventory Agent) ---
@@ -152,6 +232,10 @@ export const ivanApi = {
     checkStock: (data: InventoryRequest) =>
         api.post('/agents/ivan/check-stock', data),
 
+    // Whole catalog in one task (one consolidated PO per supplier)
+    reorderSweep: () =>
+        api.post('/agents/ivan/reorder-sweep'),
+
     getTaskStatus: (taskId: string) =>
         api.get<TaskStatus>(`/tasks/${taskId}`),
 }
@@ -162,12 +246,65 @@ export interface SeoRequest {
     keyword: string
 }
 
+export interface SiteAuditRequest {
+    seed_url: string
+    keyword: string
+    max_pages?: number
+}
+
 export const lisaApi = {
     auditSite: (data: SeoRequest) =>
         api.post('/agents/lisa/audit', data),
 
+    // Crawl a whole storefront (seed page or sitemap.xml)
+    auditWholeSite: (data: SiteAuditRequest) =>
+        api.post('/agents/lisa/site-audit', data),
+
     getTaskStatus: (taskId: string) =>
         api.get<TaskStatus>(`/tasks/${taskId}`),
 }
 
+// --- Bulk task status (one request for many task ids) ---
+export interface BatchTaskStatus {
+    statuses: Record<string, { status: string; result?: unknown }>
+    counts: Record<string, number>
+}
+
+export const getBatchTaskStatus = (taskIds: string[], includeResult = false) =>
+    api.post<BatchTaskStatus>('/tasks/batch-status', { task_ids: taskIds, include_result: includeResult })
+
+// --- Task progress (Server-Sent Events, replaces 3s polling) ---
+export interface TaskEvent {
+    task_id: string
+    seq: number
+    ts?: number
+    type: 'state' | 'progress'
+    state?: string
+    stage?: string
+    detail?: unknown
+}
+
+const FINAL_TASK_STATES = ['SUCCESS', 'FAILURE', 'REVOKED']
+
+export const subscribeToTask = (
+    taskId: string,
+    onEvent: (event: TaskEvent) => void,
+    onError?: () => void,
+) => {
+    const source = new EventSource(`/api/tasks/${taskId}/events`)
+    const handle = (e: MessageEvent) => {
+        const event: TaskEvent = JSON.parse(e.data)
+        onEvent(event)
+        // The server closes the stream after a final state; stop EventSource from reconnecting
+        if (event.type === 'state' && event.state && FINAL_TASK_STATES.includes(event.state)) {
+            source.close()
+        }
+    }
+    source.addEventListener('state', handle as EventListener)
+    source.addEventListener('progress', handle as EventListener)
+    // Also fires when the server ends a stream early; without a handler EventSource just reconnects
+    if (onError) source.onerror = onError
+    return () => source.close()
+}
+
 export default api